@@ -396,7 +396,7 @@ function BairrosPage() {
   useEffect(() => {
     let mounted = true;
     api
-      .get("/nodes", { params: { graph: "part1" } })
+      .get("/nodes", { params: { graph: "part1", fields: "id" } })
       .then((res) => {
         if (!mounted) return;
         const nodes = (res.data && res.data.nodes) || [];
@@ -601,7 +601,7 @@ function MusicasPage() {
   useEffect(() => {
     let mounted = true;
     api
-      .get("/nodes", { params: { graph: "part2" } })
+      .get("/nodes", { params: { graph: "part2", fields: "id" } })
       .then((res) => {
         if (!mounted) return;
         const list = (res.data && res.data.nodes) || [];
@@ -4,9 +4,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 DATA_DIR = BASE_DIR / "data"
 OUT_DIR = BASE_DIR / "out"
+CACHE_DIR = BASE_DIR / ".cache"
 
 ADJACENCIAS_CSV = DATA_DIR / "adjacencias_bairros.csv"
 BAIRROS_UNIQUE_CSV = DATA_DIR / "bairros_unique.csv"
+PARTE2_ADJACENCIAS_CSV = DATA_DIR / "parte2_adjacencias.csv"
+
+# Acima desse número de nós a matriz de distâncias (n x n) não é pré-calculada
+APSP_MAX_NODES = 5000
+
+# Intervalo (s) entre verificações dos CSVs pelo registro de grafos da API
+GRAPH_WATCH_INTERVAL = 2.0
 
 API_HOST = "127.0.0.1"
 API_PORT = 3000
@@ -1,11 +1,30 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from collections import deque
+from itertools import chain
+from array import array
 import heapq
 import time
 import math
 
+from src.graphs.csr import CSRGraph, csr_view
+from src.graphs import apsp as apsp
+
+INF = math.inf
+
+# Arestas (direcionadas) por nó a partir das quais bellman_ford(method="auto") usa as
+# passadas vetorizadas em vez do SPFA
+BF_DENSE_DEGREE = 32
+
 # helpers mínimos
 def _iter_neighbors(graph, u: str):
+    csr = csr_view(graph)
+
+    if csr is not None:
+        for v, w, _ in csr.neighbors(u):
+            yield v, w
+
+        return
+
     for nbr in getattr(graph, "adj", {}).get(u, []):
         if isinstance(nbr, (list, tuple)):
             v = nbr[0] if len(nbr) >= 1 else None
@@ -23,8 +42,101 @@ def _iter_neighbors(graph, u: str):
 
         yield v, w
 
+# Visão da vizinhança ordenada por (peso, nome) que as travessias com desempate por peso
+# percorrem direto, sem montar e ordenar candidatos a cada visita.
+#
+# Cada linha (destinos, pesos) é ordenada na primeira vez que um nó é visitado e fica
+# guardada no grafo junto com a `version` em que foi montada; quando a versão muda (aresta
+# adicionada, removida ou com peso trocado) a visão é descartada e refeita sob demanda.
+# Pesos não numéricos viram INF e ficam no fim da linha.
+class SortedAdjacency:
+    def __init__(self, graph, version: int):
+        self.graph = graph
+        self.version = version
+        self._rows: Dict[str, Tuple[List[str], List[float]]] = {}
+
+    def row(self, u: str) -> Tuple[List[str], List[float]]:
+        r = self._rows.get(u)
+
+        if r is None:
+            nbrs = []
+
+            for v, w in _iter_neighbors(self.graph, u):
+                try:
+                    weight = float(w)
+                except Exception:
+                    weight = INF
+
+                nbrs.append((weight, v))
+
+            nbrs.sort(key=lambda x: (x[0], x[1]))
+            r = ([v for _, v in nbrs], [w for w, _ in nbrs])
+            self._rows[u] = r
+
+        return r
+
+    def targets(self, u: str) -> List[str]:
+        return self.row(u)[0]
+
+# Visão ordenada do grafo na versão atual (CSRGraph não tem version: é imutável)
+def sorted_adjacency(graph) -> SortedAdjacency:
+    version = getattr(graph, "version", 0)
+    view = getattr(graph, "_sorted_adj", None)
+
+    if view is None or view.version != version:
+        view = SortedAdjacency(graph, version)
+        graph._sorted_adj = view
+
+    return view
+
+# Converte vetores indexados por id do CSR em dicionários por nome
+def _csr_to_dict(csr: CSRGraph, values: List[Any]) -> Dict[str, Any]:
+    return dict(zip(csr.node_names, values))
+
+def _csr_parent_dict(csr: CSRGraph, parent: List[int]) -> Dict[str, Optional[str]]:
+    names = csr.node_names
+
+    return {names[i]: (names[p] if p >= 0 else None) for i, p in enumerate(parent)}
+
+def _bfs_csr(csr: CSRGraph, source: str, t0: float) -> Dict[str, Any]:
+    s = csr.index.get(source)
+
+    if s is None:
+        return {"time_sec": 0.0, "error": f"source '{source}' not in graph"}
+
+    offsets = csr.offsets
+    targets = csr.targets
+    names = csr.node_names
+    n = csr.n_nodes
+    dist: List[Optional[int]] = [None] * n
+    parent = [-1] * n
+    order: List[str] = []
+    q = deque()
+    dist[s] = 0
+    q.append(s)
+
+    while q:
+        u = q.popleft()
+        order.append(names[u])
+        du = dist[u] + 1
+
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+
+            if dist[v] is None:
+                dist[v] = du
+                parent[v] = u
+                q.append(v)
+
+    return {"time_sec": time.time() - t0, "dist": _csr_to_dict(csr, dist), "parent": _csr_parent_dict(csr, parent), "order": order}
+
 def bfs(graph, source: str) -> Dict[str, Any]:
     t0 = time.time()
+    csr = csr_view(graph)
+
+    if csr is not None:
+        return _bfs_csr(csr, source, t0)
+
     nodes = list(graph.nodes_list())
 
     if source not in nodes:
@@ -49,125 +161,161 @@ def bfs(graph, source: str) -> Dict[str, Any]:
 
     return {"time_sec": time.time() - t0, "dist": dist, "parent": parent, "order": order}
 
-def dfs(graph, sources: Optional[List[str]] = None) -> Dict[str, Any]:
-    t0 = time.time()
-    nodes = list(graph.nodes_list())
-    color = {n: "white" for n in nodes}
-    discovery: Dict[str, Optional[int]] = {n: None for n in nodes}
-    finish: Dict[str, Optional[int]] = {n: None for n in nodes}
-    parent: Dict[str, Optional[str]] = {n: None for n in nodes}
-    order: List[str] = []
-    edge_classes: List[Tuple[str, str, str]] = []
-    timer = 0
-
-    def _visit(u: str):
-        nonlocal timer
-        color[u] = "gray"
-        timer += 1
-        discovery[u] = timer
-        order.append(u)
-
-        for v, _ in _iter_neighbors(graph, u):
-            if color[v] == "white":
-                parent[v] = u
-                edge_classes.append((u, v, "tree"))
-                _visit(v)
-            else:
-                if color[v] == "gray":
-                    edge_classes.append((u, v, "back"))
-                else:
-                    if discovery.get(u) and discovery.get(v) and discovery[u] < discovery[v]:
-                        edge_classes.append((u, v, "forward"))
-                    else:
-                        edge_classes.append((u, v, "cross"))
-
-        color[u] = "black"
-        timer += 1
-        finish[u] = timer
+# BFS como gerador, no molde de DFSWalk: BFSWalk.nodes() devolve (nó, posição, distância,
+# pai) assim que o nó sai da fila, e dist/parent/order ficam completos quando ele termina
+# (nós não alcançados mantêm dist None). É o que a API transmite em /bfs?stream=true.
+class BFSWalk:
+    def __init__(self, graph, source: str):
+        self.graph = graph
+        self.source = source
+        self.dist: Dict[str, Optional[int]] = {n: None for n in graph.nodes_list()}
+        self.parent: Dict[str, Optional[str]] = {n: None for n in self.dist}
+        self.order: List[str] = []
+
+    def nodes(self) -> Iterator[Tuple[str, int, int, Optional[str]]]:
+        graph = self.graph
+        dist = self.dist
+        parent = self.parent
+        order = self.order
+
+        if self.source not in dist:
+            return
+
+        dist[self.source] = 0
+        q = deque([self.source])
+
+        while q:
+            u = q.popleft()
+            yield u, len(order), dist[u], parent[u]
+            order.append(u)
+            du = dist[u] + 1
+
+            for v, _ in _iter_neighbors(graph, u):
+                if dist.get(v) is None:
+                    dist[v] = du
+                    parent[v] = u
+                    q.append(v)
 
-    if sources:
-        for s in sources:
-            if s in color and color[s] == "white":
-                _visit(s)
+def iter_bfs(graph, source: str) -> BFSWalk:
+    return BFSWalk(graph, source)
+
+# Códigos das classes de aresta no formato edge_classes="compact"
+EDGE_TREE, EDGE_BACK, EDGE_FORWARD, EDGE_CROSS = 0, 1, 2, 3
+EDGE_CLASS_LABELS = ("tree", "back", "forward", "cross")
+EDGE_CLASS_MODES = ("tuples", "compact", "none")
+
+# DFS com pilha explícita (sem limite de recursão): cada quadro guarda o nó e o iterador
+# dos vizinhos que faltam, então descoberta/término/pais/ordem e a sequência das arestas
+# classificadas são as mesmas da versão recursiva.
+#
+# DFSWalk.edges() é um gerador: as arestas classificadas (u, v, código) saem à medida que
+# a busca anda, e discovery/finish/parent/order ficam completos quando ele termina. Assim a
+# API pode transmitir a classificação sem guardar a lista inteira (src.web.streaming).
+class DFSWalk:
+    def __init__(self, graph, sources: Optional[List[str]], neighbors):
+        self.nodes = list(graph.nodes_list())
+        self.sources = sources
+        self.neighbors = neighbors
+        self.discovery: Dict[str, Optional[int]] = {n: None for n in self.nodes}
+        self.finish: Dict[str, Optional[int]] = {n: None for n in self.nodes}
+        self.parent: Dict[str, Optional[str]] = {n: None for n in self.nodes}
+        self.order: List[str] = []
+
+    def edges(self) -> Iterator[Tuple[str, str, int]]:
+        neighbors = self.neighbors
+        discovery = self.discovery
+        finish = self.finish
+        parent = self.parent
+        order = self.order
+        # 0 = branco, 1 = cinza, 2 = preto
+        state = {n: 0 for n in self.nodes}
+        timer = 0
+        roots = [s for s in (self.sources or []) if s in state] + self.nodes
+
+        for root in roots:
+            if state[root] != 0:
+                continue
 
-    for n in nodes:
-        if color[n] == "white":
-            _visit(n)
+            timer += 1
+            state[root] = 1
+            discovery[root] = timer
+            order.append(root)
+            stack = [(root, iter(neighbors(root)))]
+
+            while stack:
+                u, it = stack[-1]
+
+                for v in it:
+                    sv = state[v]
+
+                    if sv == 0:
+                        yield u, v, EDGE_TREE
+                        parent[v] = u
+                        timer += 1
+                        state[v] = 1
+                        discovery[v] = timer
+                        order.append(v)
+                        stack.append((v, iter(neighbors(v))))
+                        break
+
+                    if sv == 1:
+                        yield u, v, EDGE_BACK
+                    elif discovery[u] < discovery[v]:
+                        yield u, v, EDGE_FORWARD
+                    else:
+                        yield u, v, EDGE_CROSS
+                else:
+                    stack.pop()
+                    state[u] = 2
+                    timer += 1
+                    finish[u] = timer
+
+def iter_dfs(graph, sources: Optional[List[str]] = None, weighted: bool = False) -> DFSWalk:
+    neighbors = sorted_adjacency(graph).targets if weighted else (lambda u: (v for v, _ in _iter_neighbors(graph, u)))
+
+    return DFSWalk(graph, sources, neighbors)
+
+# edge_classes:
+#   "tuples"   lista de (u, v, "tree"|"back"|"forward"|"cross") — formato de sempre
+#   "compact"  vetores inteiros {"src", "dst", "kind"} com ids na ordem de nodes_list()
+#              e kind segundo EDGE_CLASS_LABELS
+#   "none"     não classifica (edge_classes = None)
+def _dfs_run(walk: DFSWalk, edge_classes: str, t0: float) -> Dict[str, Any]:
+    if edge_classes not in EDGE_CLASS_MODES:
+        raise ValueError(f"edge_classes inválido: {edge_classes} (use {', '.join(EDGE_CLASS_MODES)})")
+
+    if edge_classes == "tuples":
+        out_classes: Any = [(u, v, EDGE_CLASS_LABELS[k]) for u, v, k in walk.edges()]
+    elif edge_classes == "compact":
+        ids = {n: i for i, n in enumerate(walk.nodes)}
+        src = array("i")
+        dst = array("i")
+        kind = array("b")
+
+        for u, v, k in walk.edges():
+            src.append(ids[u])
+            dst.append(ids[v])
+            kind.append(k)
+
+        out_classes = {"src": src, "dst": dst, "kind": kind, "labels": list(EDGE_CLASS_LABELS)}
+    else:
+        deque(walk.edges(), maxlen=0)
+        out_classes = None
 
     return {
         "time_sec": time.time() - t0,
-        "discovery": discovery,
-        "finish": finish,
-        "parent": parent,
-        "order": order,
-        "edge_classes": edge_classes
+        "discovery": walk.discovery,
+        "finish": walk.finish,
+        "parent": walk.parent,
+        "order": walk.order,
+        "edge_classes": out_classes
     }
 
-def dfs_weighted_tiebreak(graph, sources: Optional[List[str]] = None) -> Dict[str, Any]:
-    t0 = time.time()
-    nodes = list(graph.nodes_list())
-    color = {n: "white" for n in nodes}
-    discovery: Dict[str, Optional[int]] = {n: None for n in nodes}
-    finish: Dict[str, Optional[int]] = {n: None for n in nodes}
-    parent: Dict[str, Optional[str]] = {n: None for n in nodes}
-    order: List[str] = []
-    edge_classes: List[Tuple[str, str, str]] = []
-    timer = 0
-
-    def _visit(u: str):
-        nonlocal timer
-        color[u] = "gray"
-        timer += 1
-        discovery[u] = timer
-        order.append(u)
+def dfs(graph, sources: Optional[List[str]] = None, edge_classes: str = "tuples") -> Dict[str, Any]:
+    return _dfs_run(iter_dfs(graph, sources), edge_classes, time.time())
 
-        nbrs = []
-        for v, w in _iter_neighbors(graph, u):
-            try:
-                weight = float(w)
-            except Exception:
-                weight = float("inf")
-            nbrs.append((weight, v))
-
-        nbrs.sort(key=lambda x: (x[0], x[1]))  
-        
-        for weight, v in nbrs:
-            if color[v] == "white":
-                parent[v] = u
-                edge_classes.append((u, v, "tree"))
-                _visit(v)
-            else:
-                if color[v] == "gray":
-                    edge_classes.append((u, v, "back"))
-                else:
-                    du = discovery.get(u)
-                    dv = discovery.get(v)
-                    if du is not None and dv is not None and du < dv:
-                        edge_classes.append((u, v, "forward"))
-                    else:
-                        edge_classes.append((u, v, "cross"))
-
-        color[u] = "black"
-        timer += 1
-        finish[u] = timer
-
-    if sources:
-        for s in sources:
-            if s in color and color[s] == "white":
-                _visit(s)
-
-    for n in nodes:
-        if color[n] == "white":
-            _visit(n)
-
-    return {
-        "time_sec": time.time() - t0,
-        "discovery": discovery,
-        "finish": finish,
-        "parent": parent,
-        "order": order,
-        "edge_classes": edge_classes
-    }
+def dfs_weighted_tiebreak(graph, sources: Optional[List[str]] = None, edge_classes: str = "tuples") -> Dict[str, Any]:
+    return _dfs_run(iter_dfs(graph, sources, weighted=True), edge_classes, time.time())
 
 def bfs_weighted_tiebreak(graph, source: str) -> Dict[str, Any]:
     t0 = time.time()
@@ -182,6 +330,7 @@ def bfs_weighted_tiebreak(graph, source: str) -> Dict[str, Any]:
     order: List[str] = []
     in_queue = {n: False for n in nodes}
 
+    view = sorted_adjacency(graph)
     q = deque()
     dist[source] = 0.0
     q.append(source)
@@ -192,19 +341,9 @@ def bfs_weighted_tiebreak(graph, source: str) -> Dict[str, Any]:
         in_queue[u] = False
         order.append(u)
 
-        candidates = []
-
-        for v, w in _iter_neighbors(graph, u):
-            try:
-                weight = float(w)
-            except Exception:
-                weight = INF
-
-            candidates.append((weight, v))
+        targets, weights = view.row(u)
 
-        candidates.sort(key=lambda x: (x[0], x[1]))
-
-        for weight, v in candidates:
+        for v, weight in zip(targets, weights):
             if weight == INF:
                 continue
             
@@ -222,8 +361,337 @@ def bfs_weighted_tiebreak(graph, source: str) -> Dict[str, Any]:
 
     return {"time_sec": time.time() - t0, "dist": out_dist, "parent": parent, "order": order}
 
-def dijkstra(graph, source: str, dest: Optional[str] = None) -> Dict[str, Any]:
+def _dijkstra_csr(csr: CSRGraph, source: str, dest: Optional[str], t0: float) -> Dict[str, Any]:
+    s = csr.index.get(source)
+
+    if s is None:
+        return {"time_sec": 0.0, "error": f"source '{source}' not in graph"}
+
+    t = csr.index.get(dest) if dest is not None else None
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    names = csr.node_names
+    n = csr.n_nodes
+    INF = float("inf")
+    dist = [INF] * n
+    prev = [-1] * n
+    prev_pos = [-1] * n
+
+    dist[s] = 0.0
+    heap: List[Tuple[float, int]] = [(0.0, s)]
+
+    while heap:
+        d, u = heapq.heappop(heap)
+
+        if d > dist[u]:
+            continue
+
+        if t is not None and u == t:
+            break
+
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            w = weights[j]
+
+            if w < 0:
+                return {"time_sec": time.time() - t0, "error": "negative_weight_detected", "edge": (names[u], names[v], float(w))}
+
+            nd = d + w
+
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                prev_pos[v] = j
+                heapq.heappush(heap, (nd, v))
+
+    prev_edge = {names[i]: (csr.meta_at(j) if j >= 0 else None) for i, j in enumerate(prev_pos)}
+
+    return {"time_sec": time.time() - t0, "dist": _csr_to_dict(csr, dist), "prev": _csr_parent_dict(csr, prev), "prev_edge": prev_edge}
+
+# Landmarks (ALT) para o A*: distâncias de alguns nós "periféricos" para todos os outros.
+# Para grafos não-direcionados, |d(l, t) - d(l, v)| é limite inferior admissível de d(v, t).
+class Landmarks:
+    def __init__(self, ids: List[int], dists: List[List[float]]):
+        self.ids = ids
+        self.dists = dists
+
+    def heuristic(self, v: int, t: int) -> float:
+        best = 0.0
+
+        for d in self.dists:
+            dv = d[v]
+            dt = d[t]
+
+            if dv == math.inf or dt == math.inf:
+                continue
+
+            h = dt - dv if dt > dv else dv - dt
+
+            if h > best:
+                best = h
+
+        return best
+
+def _sssp_ids(csr: CSRGraph, s: int) -> Optional[List[float]]:
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    INF = math.inf
+    dist = [INF] * csr.n_nodes
+    dist[s] = 0.0
+    heap: List[Tuple[float, int]] = [(0.0, s)]
+
+    while heap:
+        d, u = heapq.heappop(heap)
+
+        if d > dist[u]:
+            continue
+
+        for j in range(offsets[u], offsets[u + 1]):
+            w = weights[j]
+
+            if w < 0:
+                return None
+
+            nd = d + w
+            v = targets[j]
+
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+
+    return dist
+
+# Escolhe k landmarks por "mais distante primeiro" a partir do nó de maior grau.
+# Retorna None se o grafo tiver pesos negativos (A* não se aplica).
+def build_landmarks(graph, k: int = 4) -> Optional[Landmarks]:
+    csr = _p2p_view(graph)
+
+    if csr is None or csr.n_nodes == 0 or csr.directed:
+        return None
+
+    offsets = csr.offsets
+    n = csr.n_nodes
+    start = max(range(n), key=lambda i: offsets[i + 1] - offsets[i])
+    ids: List[int] = []
+    dists: List[List[float]] = []
+    # menor distância de cada nó até os landmarks já escolhidos
+    closest = [math.inf] * n
+    cur = start
+
+    for _ in range(min(k, n)):
+        d = _sssp_ids(csr, cur)
+
+        if d is None:
+            return None
+
+        ids.append(cur)
+        dists.append(d)
+
+        for i in range(n):
+            if d[i] < closest[i]:
+                closest[i] = d[i]
+
+        candidates = [i for i in range(n) if closest[i] != math.inf and i not in ids]
+
+        if not candidates:
+            break
+
+        cur = max(candidates, key=lambda i: closest[i])
+
+    return Landmarks(ids, dists)
+
+# Visão CSR para os modos ponto-a-ponto. Sem um CSR congelado, monta um CSR próprio da
+# consulta, guardado no grafo com a `version` em que foi montado (como sorted_adjacency):
+# o grafo não é congelado (os outros algoritmos continuam percorrendo adj) e qualquer
+# mutação faz o CSR ser refeito na próxima consulta.
+def _p2p_view(graph) -> Optional[CSRGraph]:
+    csr = csr_view(graph)
+
+    if csr is not None or not hasattr(graph, "adj"):
+        return csr
+
+    version = getattr(graph, "version", 0)
+    cached = getattr(graph, "_p2p_csr", None)
+
+    if cached is None or cached[0] != version:
+        with_meta = next((len(e) > 2 for lst in graph.adj.values() for e in lst), False)
+        cached = (version, CSRGraph.from_adj(graph.adj, nodes=list(graph.nodes), directed=getattr(graph, "directed", False), with_meta=with_meta))
+        graph._p2p_csr = cached
+
+    return cached[1]
+
+def _landmarks_for(csr: CSRGraph) -> Optional[Landmarks]:
+    # o CSR é imutável, então os landmarks ficam cacheados nele
+    if not hasattr(csr, "_landmarks"):
+        csr._landmarks = build_landmarks(csr)
+
+    return csr._landmarks
+
+# Monta o dicionário de resultado (dist/prev/prev_edge esparsos, só com nós rotulados)
+def _p2p_result(csr: CSRGraph, dist: Dict[int, float], prev: Dict[int, int], prev_pos: Dict[int, int], t0: float, scanned: int) -> Dict[str, Any]:
+    names = csr.node_names
+
+    return {
+        "time_sec": time.time() - t0,
+        "dist": {names[i]: d for i, d in dist.items()},
+        "prev": {names[i]: (names[p] if p >= 0 else None) for i, p in prev.items()},
+        "prev_edge": {names[i]: (csr.meta_at(j) if j >= 0 else None) for i, j in prev_pos.items()},
+        "scanned": scanned,
+    }
+
+def _bidirectional_csr(csr: CSRGraph, s: int, t: int, t0: float) -> Dict[str, Any]:
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    names = csr.node_names
+    INF = math.inf
+
+    # índice 0 = busca a partir da origem, 1 = busca a partir do destino
+    dist = ({s: 0.0}, {t: 0.0})
+    prev = ({s: -1}, {t: -1})
+    prev_pos = ({s: -1}, {t: -1})
+    heaps = ([(0.0, s)], [(0.0, t)])
+    best = INF if s != t else 0.0
+    meet = s if s == t else -1
+    scanned = 0
+
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, u = heapq.heappop(heaps[side])
+        dist_s = dist[side]
+
+        if d > dist_s[u]:
+            continue
+
+        scanned += 1
+        other = dist[1 - side]
+        prev_s = prev[side]
+        pos_s = prev_pos[side]
+
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            w = weights[j]
+
+            if w < 0:
+                return {"time_sec": time.time() - t0, "error": "negative_weight_detected", "edge": (names[u], names[v], float(w))}
+
+            nd = d + w
+
+            if nd < dist_s.get(v, INF):
+                dist_s[v] = nd
+                prev_s[v] = u
+                pos_s[v] = j
+                heapq.heappush(heaps[side], (nd, v))
+
+                dv = other.get(v)
+
+                if dv is not None and nd + dv < best:
+                    best = nd + dv
+                    meet = v
+
+    fdist, fprev, fpos = dist[0], prev[0], prev_pos[0]
+
+    # Completa o caminho do ponto de encontro até o destino com a árvore reversa
+    if meet >= 0 and meet != t:
+        bdist, bprev, bpos = dist[1], prev[1], prev_pos[1]
+        cur = meet
+
+        while cur != t:
+            nxt = bprev[cur]
+            fprev[nxt] = cur
+            fpos[nxt] = bpos[cur]
+            fdist[nxt] = best - bdist[nxt]
+            cur = nxt
+
+    return _p2p_result(csr, fdist, fprev, fpos, t0, scanned)
+
+def _astar_csr(csr: CSRGraph, s: int, t: int, landmarks: Landmarks, t0: float) -> Dict[str, Any]:
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    names = csr.node_names
+    INF = math.inf
+    h = landmarks.heuristic
+
+    dist = {s: 0.0}
+    prev = {s: -1}
+    prev_pos = {s: -1}
+    heap: List[Tuple[float, float, int]] = [(h(s, t), 0.0, s)]
+    scanned = 0
+
+    while heap:
+        _, d, u = heapq.heappop(heap)
+
+        if d > dist[u]:
+            continue
+
+        if u == t:
+            break
+
+        scanned += 1
+
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            w = weights[j]
+
+            if w < 0:
+                return {"time_sec": time.time() - t0, "error": "negative_weight_detected", "edge": (names[u], names[v], float(w))}
+
+            nd = d + w
+
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                prev[v] = u
+                prev_pos[v] = j
+                heapq.heappush(heap, (nd + h(v, t), nd, v))
+
+    return _p2p_result(csr, dist, prev, prev_pos, t0, scanned)
+
+# Menor caminho ponto-a-ponto: "bidirectional" (Dijkstra bidirecional) ou "astar"
+# (A* com landmarks ALT). O retorno tem as mesmas chaves do dijkstra(), mas dist/prev/
+# prev_edge só trazem os nós rotulados pela busca (o destino incluso quando alcançável).
+def dijkstra_point_to_point(graph, source: str, dest: str, method: str = "bidirectional", landmarks: Optional[Landmarks] = None) -> Dict[str, Any]:
     t0 = time.time()
+    csr = _p2p_view(graph)
+
+    # sem CSR ou com grafo direcionado, cai no Dijkstra unidirecional
+    if csr is None or csr.directed:
+        return dijkstra(graph, source, dest)
+
+    s = csr.index.get(source)
+
+    if s is None:
+        return {"time_sec": 0.0, "error": f"source '{source}' not in graph"}
+
+    t = csr.index.get(dest)
+
+    if t is None:
+        return _p2p_result(csr, {s: 0.0}, {s: -1}, {s: -1}, t0, 0)
+
+    if method == "astar":
+        if landmarks is None:
+            landmarks = _landmarks_for(csr)
+
+        if landmarks is not None:
+            return _astar_csr(csr, s, t, landmarks, t0)
+
+    return _bidirectional_csr(csr, s, t, t0)
+
+def dijkstra(graph, source: str, dest: Optional[str] = None, method: str = "dijkstra") -> Dict[str, Any]:
+    if dest is not None and method in ("bidirectional", "astar"):
+        return dijkstra_point_to_point(graph, source, dest, method=method)
+
+    t0 = time.time()
+    csr = csr_view(graph)
+
+    if csr is not None:
+        return _dijkstra_csr(csr, source, dest, t0)
+
     nodes = list(graph.nodes_list())
 
     if source not in nodes:
@@ -277,14 +745,275 @@ def dijkstra(graph, source: str, dest: Optional[str] = None) -> Dict[str, Any]:
 
     return {"time_sec": time.time() - t0, "dist": dist, "prev": prev, "prev_edge": prev_edge}
 
-def bellman_ford(graph, source: str) -> Dict[str, Any]:
+def _bellman_ford_csr(csr: CSRGraph, source: str, t0: float) -> Dict[str, Any]:
+    s = csr.index.get(source)
+
+    if s is None:
+        return {"time_sec": 0.0, "error": f"source '{source}' not in graph"}
+
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    n = csr.n_nodes
+    dist = [INF] * n
+    prev = [-1] * n
+    dist[s] = 0.0
+
+    # origem de cada aresta (targets/weights já estão em vetores)
+    sources = [u for u in range(n) for _ in range(offsets[u], offsets[u + 1])]
+    edges = list(zip(sources, targets, weights))
+
+    for _ in range(n - 1):
+        updated = False
+
+        for u, v, w in edges:
+            du = dist[u]
+
+            if du == INF:
+                continue
+
+            nd = du + w
+
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                updated = True
+
+        if not updated:
+            break
+
+    prev_d = _csr_parent_dict(csr, prev)
+    neg_cycle = None
+
+    for u, v, w in edges:
+        if dist[u] == INF:
+            continue
+
+        if dist[u] + w < dist[v]:
+            neg_cycle = _reconstruct_negative_cycle(prev_d, csr.node_names[v], csr.node_names)
+            break
+
+    return {"time_sec": time.time() - t0, "dist": _csr_to_dict(csr, dist), "prev": prev_d, "negative_cycle": neg_cycle}
+
+# Um nó sobre um ciclo do grafo de predecessores (-1 se não houver ciclo). Nos algoritmos da
+# família Bellman-Ford, um ciclo em prev só aparece quando há ciclo negativo.
+def _parent_cycle_node(prev: List[int]) -> int:
+    n = len(prev)
+    state = [0] * n  # 0 = não visitado, 1 = no caminho atual, 2 = resolvido
+
+    for start in range(n):
+        if state[start]:
+            continue
+
+        path = []
+        v = start
+
+        while v >= 0 and state[v] == 0:
+            state[v] = 1
+            path.append(v)
+            v = prev[v]
+
+        if v >= 0 and state[v] == 1:
+            return v
+
+        for u in path:
+            state[u] = 2
+
+    return -1
+
+# Monta o resultado a partir de um nó num ciclo de prev (ou de onde a detecção apontou)
+def _negative_cycle_result(csr: CSRGraph, dist: List[float], prev: List[int], t0: float, hint: int) -> Dict[str, Any]:
+    prev_d = _csr_parent_dict(csr, prev)
+    node = _parent_cycle_node(prev)
+
+    if node < 0:
+        node = hint
+
+    neg_cycle = _reconstruct_negative_cycle(prev_d, csr.node_names[node], csr.node_names)
+
+    return {"time_sec": time.time() - t0, "dist": _csr_to_dict(csr, dist), "prev": prev_d, "negative_cycle": neg_cycle}
+
+# SPFA: fila de nós cuja distância melhorou; só as arestas que saem deles são relaxadas.
+# Um nó que entra na fila n vezes denuncia um ciclo negativo; além disso, a cada n
+# relaxações o grafo de predecessores é verificado (O(n)), o que pega ciclos curtos (como
+# uma aresta negativa num grafo não-direcionado) sem esperar as n entradas na fila.
+#
+# patch/extra aplicam as mudanças de um overlay de pesos (WeightOverlay.csr_patch) sobre os
+# vetores do CSR da base sem copiá-los: patch[u] = {posição: peso novo} e extra[u] = lista
+# de (v, peso) relaxadas depois das arestas da base.
+def _spfa_csr(
+    csr: CSRGraph,
+    source: str,
+    t0: float,
+    patch: Optional[Dict[int, Dict[int, float]]] = None,
+    extra: Optional[Dict[int, List[Tuple[int, float]]]] = None,
+) -> Dict[str, Any]:
+    s = csr.index.get(source)
+
+    if s is None:
+        return {"time_sec": 0.0, "error": f"source '{source}' not in graph"}
+
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    n = csr.n_nodes
+    dist = [INF] * n
+    prev = [-1] * n
+    count = [0] * n
+    in_queue = [False] * n
+    dist[s] = 0.0
+    q = deque([s])
+    in_queue[s] = True
+    relaxations = 0
+    patch = patch or {}
+    extra = extra or {}
+
+    while q:
+        u = q.popleft()
+        in_queue[u] = False
+        du = dist[u]
+        lo, hi = offsets[u], offsets[u + 1]
+        pu = patch.get(u)
+
+        if pu is None:
+            row = zip(targets[lo:hi], weights[lo:hi])
+        else:
+            row = ((targets[j], pu.get(j, weights[j])) for j in range(lo, hi))
+
+        if u in extra:
+            row = chain(row, extra[u])
+
+        for v, w in row:
+            nd = du + w
+
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                relaxations += 1
+
+                if relaxations % n == 0 and _parent_cycle_node(prev) >= 0:
+                    return _negative_cycle_result(csr, dist, prev, t0, v)
+
+                if not in_queue[v]:
+                    count[v] += 1
+
+                    if count[v] >= n:
+                        return _negative_cycle_result(csr, dist, prev, t0, v)
+
+                    q.append(v)
+                    in_queue[v] = True
+
+    return {"time_sec": time.time() - t0, "dist": _csr_to_dict(csr, dist), "prev": _csr_parent_dict(csr, prev), "negative_cycle": None}
+
+# Bellman-Ford com relaxação vetorizada: cada passada relaxa todas as arestas de uma vez
+# sobre os vetores do CSR (com as distâncias da passada anterior), até nenhuma distância
+# melhorar; se ainda melhora depois de n passadas, há ciclo negativo
+#
+# Com patch/extra (overlay de pesos, ver _spfa_csr) os pesos e as arestas extras entram em
+# vetores próprios da execução; as passadas já alocam vetores do tamanho das arestas.
+def _bellman_ford_numpy(
+    csr: CSRGraph,
+    source: str,
+    t0: float,
+    patch: Optional[Dict[int, Dict[int, float]]] = None,
+    extra: Optional[Dict[int, List[Tuple[int, float]]]] = None,
+) -> Dict[str, Any]:
+    s = csr.index.get(source)
+
+    if s is None:
+        return {"time_sec": 0.0, "error": f"source '{source}' not in graph"}
+
+    np = apsp.np
+    n = csr.n_nodes
+    offsets, targets, weights = csr.as_numpy()
+    sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    targets = targets.astype(np.int64)
+
+    if patch:
+        weights = weights.copy()
+
+        for changes in patch.values():
+            weights[list(changes)] = list(changes.values())
+
+    if extra:
+        rows = [(u, v, w) for u, lst in extra.items() for v, w in lst]
+        sources = np.concatenate([sources, np.array([r[0] for r in rows], dtype=np.int64)])
+        targets = np.concatenate([targets, np.array([r[1] for r in rows], dtype=np.int64)])
+        weights = np.concatenate([weights, np.array([r[2] for r in rows], dtype=np.float64)])
+    dist = np.full(n, np.inf)
+    prev = np.full(n, -1, dtype=np.int64)
+    dist[s] = 0.0
+    improving = False
+
+    for _ in range(n):
+        cand = dist[sources] + weights
+        better = np.flatnonzero(cand < dist[targets])
+        improving = better.size > 0
+
+        if not improving:
+            break
+
+        # vários candidatos para o mesmo destino: fica o menor
+        better = better[np.lexsort((cand[better], targets[better]))]
+        tb = targets[better]
+        first = np.ones(better.size, dtype=bool)
+        first[1:] = tb[1:] != tb[:-1]
+        better = better[first]
+
+        dist[targets[better]] = cand[better]
+        prev[targets[better]] = sources[better]
+
+    if improving:
+        return _negative_cycle_result(csr, dist.tolist(), prev.tolist(), t0, int(targets[better[0]]))
+
+    return {"time_sec": time.time() - t0, "dist": _csr_to_dict(csr, dist.tolist()), "prev": _csr_parent_dict(csr, prev.tolist()), "negative_cycle": None}
+
+# Caminhos mínimos com pesos negativos. method:
+#   "classic" passadas completas sobre a lista de arestas (parando quando nada melhora)
+#   "spfa"    fila de nós com distância melhorada e contagem de entradas por nó
+#   "numpy"   passadas vetorizadas sobre os vetores do CSR
+#   "auto"    numpy em grafos densos (muitas arestas por nó), senão spfa
+# Todos devolvem dist/prev/negative_cycle no mesmo formato. "classic" é o padrão porque só
+# ele mantém em prev o mesmo desempate da implementação original entre pais de mesmo custo;
+# spfa/numpy/auto são mais rápidos mas podem escolher outro pai de mesmo custo,
+# e com ciclo negativo alcançável dist e o ciclo reportado também dependem do método.
+def bellman_ford(graph, source: str, method: str = "classic") -> Dict[str, Any]:
     t0 = time.time()
+
+    if method not in ("auto", "classic", "spfa", "numpy"):
+        raise ValueError(f"método de Bellman-Ford desconhecido: {method}")
+
+    csr = csr_view(graph)
+    patch = extra = None
+
+    if method != "classic" and csr is None:
+        # overlay de pesos: vetores da base mais as mudanças, sem copiar o grafo
+        view = graph.csr_patch() if hasattr(graph, "csr_patch") else None
+
+        if view is not None:
+            csr, patch, extra = view
+        else:
+            csr = CSRGraph.from_adj(getattr(graph, "adj", {}), nodes=list(graph.nodes_list()), directed=getattr(graph, "directed", False))
+
+    if method == "auto":
+        dense = csr.n_nodes > 0 and csr.n_edges >= BF_DENSE_DEGREE * csr.n_nodes
+        method = "numpy" if dense and apsp.np is not None else "spfa"
+
+    if method == "numpy" and apsp.np is not None:
+        return _bellman_ford_numpy(csr, source, t0, patch, extra)
+
+    if method in ("spfa", "numpy"):
+        return _spfa_csr(csr, source, t0, patch, extra)
+
+    if csr is not None:
+        return _bellman_ford_csr(csr, source, t0)
+
     nodes = list(graph.nodes_list())
 
     if source not in nodes:
         return {"time_sec": 0.0, "error": f"source '{source}' not in graph"}
     
-    dist = {n: float("inf") for n in nodes}
+    dist = {n: INF for n in nodes}
     prev: Dict[str, Optional[str]] = {n: None for n in nodes}
     dist[source] = 0.0
     edges: List[Tuple[str, str, float]] = []
@@ -299,10 +1028,12 @@ def bellman_ford(graph, source: str) -> Dict[str, Any]:
         updated = False
 
         for u, v, w in edges:
-            if dist[u] == float("inf"):
+            du = dist[u]
+
+            if du == INF:
                 continue
 
-            nd = dist[u] + w
+            nd = du + w
 
             if nd < dist[v]:
                 dist[v] = nd
@@ -315,7 +1046,7 @@ def bellman_ford(graph, source: str) -> Dict[str, Any]:
     neg_cycle = None
 
     for u, v, w in edges:
-        if dist[u] == float("inf"):
+        if dist[u] == INF:
             continue
 
         if dist[u] + w < dist[v]:
@@ -348,8 +1079,29 @@ def _reconstruct_negative_cycle(prev: Dict[str, Optional[str]], start: str, node
         if cur is None:
             return None
 
+# Distâncias entre todos os pares com pesos negativos (Johnson, ver src.graphs.apsp).
+# Devolve a DistanceMatrix em "matrix", ou o ciclo negativo em "negative_cycle".
+def johnson(graph, workers: Optional[int] = None) -> Dict[str, Any]:
+    t0 = time.time()
+
+    try:
+        m = apsp.johnson_matrix(graph, workers=workers)
+    except apsp.NegativeCycleError as e:
+        return {"time_sec": time.time() - t0, "matrix": None, "negative_cycle": e.cycle}
+
+    return {"time_sec": time.time() - t0, "matrix": m, "negative_cycle": None}
+
 def floyd_warshall(graph) -> Dict[str, Dict[str, float]]:
-    nodes = list(graph.nodes_list())
+    csr = csr_view(graph)
+
+    # Com numpy, usa a versão vetorizada (min-plus por linha) de src.graphs.apsp
+    if apsp.np is not None:
+        view = csr if csr is not None else CSRGraph.from_adj(getattr(graph, "adj", {}), nodes=list(graph.nodes_list()), directed=getattr(graph, "directed", False))
+        m = apsp.floyd_warshall_matrix(view)
+
+        return {u: dict(zip(m.nodes, row)) for u, row in zip(m.nodes, m.dist.tolist())}
+
+    nodes = list(csr.node_names if csr is not None else graph.nodes_list())
     idx = {n: i for i, n in enumerate(nodes)}
     n = len(nodes)
     inf = float("inf")
@@ -361,16 +1113,34 @@ def floyd_warshall(graph) -> Dict[str, Dict[str, float]]:
 
     directed = getattr(graph, "directed", False)
 
-    for u in getattr(graph, "adj", {}):
-        for v, w in _iter_neighbors(graph, u):
-            i = idx[u]; j = idx[v]
+    if csr is not None:
+        # ids do CSR já são os índices da matriz
+        offsets = csr.offsets
+        targets = csr.targets
+        weights = csr.weights
 
-            if w < dist[i][j]:
-                dist[i][j] = float(w)
-            
-            if not directed:
-                if w < dist[j][i]:
-                    dist[j][i] = float(w)
+        for i in range(n):
+            for p in range(offsets[i], offsets[i + 1]):
+                j = targets[p]
+                w = weights[p]
+
+                if w < dist[i][j]:
+                    dist[i][j] = w
+
+                if not directed:
+                    if w < dist[j][i]:
+                        dist[j][i] = w
+    else:
+        for u in getattr(graph, "adj", {}):
+            for v, w in _iter_neighbors(graph, u):
+                i = idx[u]; j = idx[v]
+
+                if w < dist[i][j]:
+                    dist[i][j] = float(w)
+                
+                if not directed:
+                    if w < dist[j][i]:
+                        dist[j][i] = float(w)
     
     for k in range(n):
         for i in range(n):
@@ -0,0 +1,422 @@
+from typing import Dict, List, Tuple, Optional, Any
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from array import array
+from pathlib import Path
+import heapq
+import shutil
+import json
+import math
+import os
+
+from src.graphs.csr import CSRGraph, csr_view
+from src.graphs.io import file_digest
+
+try:
+    import numpy as np
+except ImportError:  # sem numpy não há matriz de distâncias
+    np = None
+
+# Distâncias entre todos os pares (APSP) guardadas em matrizes densas.
+#
+# dist[i, j] é o custo do menor caminho de i até j e pred[i, j] o predecessor de j nesse
+# caminho (-1 quando não há caminho ou i == j). As matrizes podem ser salvas em disco
+# (.npy) e recarregadas com memory-map, numa pasta identificada pelo hash do CSV de
+# adjacências que gerou o grafo; assim consultas viram leituras O(1) na matriz.
+
+APSP_FORMAT_VERSION = 1
+
+class DistanceMatrix:
+    def __init__(self, nodes: List[str], dist: Any, pred: Any, source_hash: Optional[str] = None):
+        self.nodes: List[str] = list(nodes)
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.nodes)}
+        self.dist = dist
+        self.pred = pred
+        self.source_hash = source_hash
+
+    @property
+    def negative_cycle(self) -> bool:
+        return bool((np.diagonal(self.dist) < 0).any()) if len(self.nodes) else False
+
+    def has_node(self, node: str) -> bool:
+        return node in self.index
+
+    def distance(self, u: str, v: str) -> float:
+        i = self.index.get(u)
+        j = self.index.get(v)
+
+        if i is None or j is None:
+            return math.inf
+
+        return float(self.dist[i, j])
+
+    def path(self, u: str, v: str) -> List[str]:
+        i = self.index.get(u)
+        j = self.index.get(v)
+
+        if i is None or j is None or math.isinf(self.dist[i, j]):
+            return []
+
+        out = [j]
+        cur = j
+
+        # o limite evita laço infinito se houver ciclo negativo
+        for _ in range(len(self.nodes)):
+            if cur == i:
+                break
+
+            cur = int(self.pred[i, cur])
+
+            if cur < 0:
+                return []
+
+            out.append(cur)
+
+        return [self.nodes[k] for k in reversed(out)]
+
+    # Persiste as matrizes em out_dir (escrita numa pasta temporária + rename atômico)
+    def save(self, out_dir: str | Path) -> Path:
+        out_dir = Path(out_dir)
+        tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp{os.getpid()}")
+
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+
+        tmp_dir.mkdir(parents=True)
+        np.save(tmp_dir / "dist.npy", np.ascontiguousarray(self.dist, dtype=np.float64))
+        np.save(tmp_dir / "pred.npy", np.ascontiguousarray(self.pred, dtype=np.int32))
+
+        with open(tmp_dir / "nodes.json", "w", encoding="utf-8") as f:
+            json.dump({"version": APSP_FORMAT_VERSION, "source_hash": self.source_hash, "nodes": self.nodes}, f, ensure_ascii=False)
+
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+
+        os.replace(tmp_dir, out_dir)
+
+        return out_dir
+
+    @classmethod
+    def load(cls, in_dir: str | Path, mmap_mode: Optional[str] = "r") -> "DistanceMatrix":
+        in_dir = Path(in_dir)
+
+        with open(in_dir / "nodes.json", encoding="utf-8") as f:
+            header = json.load(f)
+
+        if header.get("version") != APSP_FORMAT_VERSION:
+            raise ValueError(f"versão de matriz APSP incompatível em {in_dir}")
+
+        dist = np.load(in_dir / "dist.npy", mmap_mode=mmap_mode)
+        pred = np.load(in_dir / "pred.npy", mmap_mode=mmap_mode)
+
+        return cls(header["nodes"], dist, pred, source_hash=header.get("source_hash"))
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy é necessário para as matrizes de distâncias (src.graphs.apsp)")
+
+def _as_csr(graph) -> CSRGraph:
+    csr = csr_view(graph)
+
+    if csr is None:
+        csr = graph.to_csr() if hasattr(graph, "to_csr") else CSRGraph.from_adj(getattr(graph, "adj", {}))
+
+    return csr
+
+# Floyd-Warshall vetorizado: para cada k, uma atualização min-plus de todas as linhas
+def floyd_warshall_matrix(graph) -> DistanceMatrix:
+    _require_numpy()
+    csr = _as_csr(graph)
+    n = csr.n_nodes
+    offsets, targets, weights = csr.as_numpy()
+
+    sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    targets = targets.astype(np.int64)
+
+    # arestas paralelas: fica a de menor peso
+    flat = np.full(n * n, np.inf)
+    np.minimum.at(flat, sources * n + targets, weights)
+
+    if not csr.directed:
+        np.minimum.at(flat, targets * n + sources, weights)
+
+    dist = flat.reshape(n, n)
+    idx = np.arange(n)
+    dist[idx, idx] = np.minimum(dist[idx, idx], 0.0)
+
+    pred = np.where(np.isfinite(dist), idx[:, None], -1).astype(np.int32)
+    pred[idx, idx] = -1
+
+    for k in range(n):
+        cand = dist[:, k, None] + dist[None, k, :]
+        better = cand < dist
+
+        if better.any():
+            dist = np.where(better, cand, dist)
+            pred = np.where(better, pred[k][None, :], pred)
+
+    return DistanceMatrix(csr.node_names, dist, pred)
+
+def _dijkstra_row(csr: CSRGraph, s: int) -> Tuple[List[float], List[int]]:
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    dist = [math.inf] * csr.n_nodes
+    pred = [-1] * csr.n_nodes
+    dist[s] = 0.0
+    heap: List[Tuple[float, int]] = [(0.0, s)]
+
+    while heap:
+        d, u = heapq.heappop(heap)
+
+        if d > dist[u]:
+            continue
+
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            nd = d + weights[j]
+
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+
+    return dist, pred
+
+# Dijkstra repetido a partir de cada nó (melhor que Floyd-Warshall em grafos esparsos)
+def repeated_dijkstra_matrix(graph) -> DistanceMatrix:
+    _require_numpy()
+    csr = _as_csr(graph)
+    n = csr.n_nodes
+
+    if n and min(csr.weights, default=0.0) < 0:
+        raise ValueError("Dijkstra repetido não suporta pesos negativos; use method='floyd'")
+
+    dist = np.empty((n, n))
+    pred = np.empty((n, n), dtype=np.int32)
+
+    for s in range(n):
+        row_d, row_p = _dijkstra_row(csr, s)
+        dist[s] = row_d
+        pred[s] = row_p
+
+    return DistanceMatrix(csr.node_names, dist, pred)
+
+# Ciclo negativo encontrado ao calcular distâncias entre todos os pares
+class NegativeCycleError(ValueError):
+    def __init__(self, cycle: List[str]):
+        super().__init__(f"ciclo negativo: {' -> '.join(cycle)}")
+        self.cycle = cycle
+
+# Potenciais de Johnson: distâncias a partir de um nó virtual ligado a todos com peso 0,
+# calculadas com SPFA (todos os nós começam na fila com potencial 0). Devolve os
+# potenciais e, se houver ciclo negativo, o ciclo (reconstruído pelo mesmo
+# _reconstruct_negative_cycle do Bellman-Ford).
+def johnson_potentials(csr: CSRGraph) -> Tuple[List[float], Optional[List[str]]]:
+    from src.graphs import algorithms as algorithms
+
+    offsets = csr.offsets
+    targets = csr.targets
+    weights = csr.weights
+    n = csr.n_nodes
+    h = [0.0] * n
+    prev = [-1] * n
+    count = [0] * n
+    in_queue = [True] * n
+    q = deque(range(n))
+    relaxations = 0
+    hit = -1
+
+    while q and hit < 0:
+        u = q.popleft()
+        in_queue[u] = False
+        hu = h[u]
+
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            nh = hu + weights[j]
+
+            if nh < h[v]:
+                h[v] = nh
+                prev[v] = u
+                relaxations += 1
+
+                if relaxations % n == 0 and algorithms._parent_cycle_node(prev) >= 0:
+                    hit = v
+                    break
+
+                if not in_queue[v]:
+                    count[v] += 1
+
+                    # n + 1 nós contando o virtual
+                    if count[v] > n:
+                        hit = v
+                        break
+
+                    q.append(v)
+                    in_queue[v] = True
+
+    if hit < 0:
+        return h, None
+
+    node = algorithms._parent_cycle_node(prev)
+    prev_d = algorithms._csr_parent_dict(csr, prev)
+    cycle = algorithms._reconstruct_negative_cycle(prev_d, csr.node_names[node if node >= 0 else hit], csr.node_names)
+
+    return h, cycle or [csr.node_names[hit]]
+
+# CSR usado pelos processos de johnson_matrix (preenchido por _init_johnson_worker)
+_WORKER_CSR: Optional[CSRGraph] = None
+
+def _init_johnson_worker(csr: CSRGraph) -> None:
+    global _WORKER_CSR
+    _WORKER_CSR = csr
+
+def _johnson_rows(sources: List[int]) -> List[Tuple[int, List[float], List[int]]]:
+    return [(s,) + _dijkstra_row(_WORKER_CSR, s) for s in sources]
+
+# Johnson: uma passada de Bellman-Ford (potenciais h) deixa todos os pesos não-negativos
+# (w + h[u] - h[v]) e então roda Dijkstra a partir de cada nó, em processos paralelos quando
+# há muitos nós; as distâncias voltam à escala original com d - h[s] + h[t].
+# Num grafo não-direcionado qualquer aresta negativa já é um ciclo negativo (u-v-u).
+# Levanta NegativeCycleError com o ciclo quando houver um.
+def johnson_matrix(graph, workers: Optional[int] = None, chunk_size: int = 32, min_parallel_sources: int = 256) -> DistanceMatrix:
+    _require_numpy()
+    csr = _as_csr(graph)
+    n = csr.n_nodes
+    h, cycle = johnson_potentials(csr)
+
+    if cycle is not None:
+        raise NegativeCycleError(cycle)
+
+    offsets, targets, weights = csr.as_numpy()
+    src = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    hv = np.asarray(h, dtype=np.float64)
+
+    # arredondamentos podem deixar resíduos negativos minúsculos
+    reweighted = np.maximum(weights + hv[src] - hv[targets.astype(np.int64)], 0.0)
+    rcsr = CSRGraph(csr.node_names, array("q", offsets.tolist()), array("i", targets.tolist()), array("d", reweighted.tolist()), directed=csr.directed)
+
+    dist = np.empty((n, n))
+    pred = np.empty((n, n), dtype=np.int32)
+
+    if workers is None:
+        workers = (os.cpu_count() or 1) if n >= min_parallel_sources else 1
+
+    chunks = [list(range(i, min(n, i + chunk_size))) for i in range(0, n, chunk_size)]
+
+    if workers <= 1 or len(chunks) <= 1:
+        for s in range(n):
+            dist[s], pred[s] = _dijkstra_row(rcsr, s)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_johnson_worker, initargs=(rcsr,)) as ex:
+            for rows in ex.map(_johnson_rows, chunks):
+                for s, row_d, row_p in rows:
+                    dist[s] = row_d
+                    pred[s] = row_p
+
+    # volta à escala original (inf - h continua inf)
+    dist += hv[None, :] - hv[:, None]
+
+    return DistanceMatrix(csr.node_names, dist, pred)
+
+# method: "floyd", "dijkstra", "johnson" ou "auto" (em grafos esparsos, Dijkstra repetido
+# sem pesos negativos e Johnson com eles; em grafos densos, Floyd-Warshall)
+def all_pairs(graph, method: str = "auto") -> DistanceMatrix:
+    csr = _as_csr(graph)
+
+    if method == "auto":
+        n = max(1, csr.n_nodes)
+        sparse = csr.n_edges < n * n / 8
+        negative = csr.n_edges > 0 and min(csr.weights) < 0
+        method = ("johnson" if negative else "dijkstra") if sparse else "floyd"
+
+    if method == "floyd":
+        return floyd_warshall_matrix(csr)
+
+    if method == "dijkstra":
+        return repeated_dijkstra_matrix(csr)
+
+    if method == "johnson":
+        return johnson_matrix(csr)
+
+    raise ValueError(f"método APSP desconhecido: {method}")
+
+# Carrega a matriz do cache em disco se o hash do CSV bater; senão calcula e salva
+def load_or_build(graph, source_csv: str | Path, cache_dir: Optional[str | Path] = None, method: str = "auto") -> DistanceMatrix:
+    _require_numpy()
+
+    if cache_dir is None:
+        from src.config import CACHE_DIR
+        cache_dir = CACHE_DIR
+
+    digest = file_digest(source_csv)
+    target = Path(cache_dir) / f"apsp-{digest[:16]}"
+
+    if (target / "nodes.json").exists():
+        try:
+            m = DistanceMatrix.load(target)
+
+            if m.source_hash == digest:
+                return m
+        except (OSError, ValueError):
+            pass
+
+    m = all_pairs(graph, method=method)
+    m.source_hash = digest
+    m.save(target)
+
+    return DistanceMatrix.load(target)
+
+# Anexa ao grafo uma matriz de distâncias; mutações no grafo descartam a matriz
+def attach(graph, matrix: Optional[DistanceMatrix]) -> None:
+    graph._apsp = matrix
+
+# Anexa a matriz lida do cache (ou calculada) se o grafo for pequeno o bastante e não
+# tiver ciclo negativo; falhas de disco só deixam o grafo sem matriz
+def attach_cached(graph, source_csv: str | Path, max_nodes: Optional[int] = None) -> Optional[DistanceMatrix]:
+    if max_nodes is None:
+        from src.config import APSP_MAX_NODES
+        max_nodes = APSP_MAX_NODES
+
+    if np is None or len(graph.nodes) > max_nodes:
+        return None
+
+    try:
+        m = load_or_build(graph, source_csv)
+    except (OSError, ValueError):
+        return None
+
+    if m.negative_cycle:
+        return None
+
+    attach(graph, m)
+
+    return m
+
+def matrix_for(graph) -> Optional[DistanceMatrix]:
+    m = getattr(graph, "_apsp", None)
+
+    return m if isinstance(m, DistanceMatrix) else None
+
+# Logradouros (metadados) ao longo de um caminho: para cada par consecutivo, a aresta de
+# menor peso (a primeira, em caso de empate), como escolheria o Dijkstra
+def path_edge_metas(graph, path: List[str]) -> List[Any]:
+    csr = _as_csr(graph)
+    out = []
+
+    for u, v in zip(path, path[1:]):
+        i = csr.index.get(u)
+        j = csr.index.get(v)
+        best_w = math.inf
+        best_meta = None
+
+        if i is not None and j is not None:
+            for p in range(csr.offsets[i], csr.offsets[i + 1]):
+                if csr.targets[p] == j and csr.weights[p] < best_w:
+                    best_w = csr.weights[p]
+                    best_meta = csr.meta_at(p)
+
+        out.append(best_meta if best_meta is not None else "")
+
+    return out
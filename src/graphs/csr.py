@@ -0,0 +1,198 @@
+from typing import Dict, List, Tuple, Optional, Any, Iterator, Sequence
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional: sem ele os vetores ficam em array.array
+    np = None
+
+# Representação CSR (compressed sparse row) congelada de um grafo.
+#
+# Os nós são internados em ids inteiros seguindo a ordem de nodes_list() (ordenada),
+# e as arestas de cada nó u ficam em targets[offsets[u]:offsets[u + 1]], na mesma
+# ordem das listas de adjacência originais. Os pesos ficam em weights e, quando o
+# grafo tem metadado por aresta (logradouro), edge_meta guarda o índice em meta_table.
+class CSRGraph:
+    def __init__(
+        self,
+        nodes: List[str],
+        offsets: Sequence[int],
+        targets: Sequence[int],
+        weights: Sequence[float],
+        edge_meta: Optional[Sequence[int]] = None,
+        meta_table: Optional[List[Any]] = None,
+        directed: bool = False,
+    ):
+        self.node_names: List[str] = list(nodes)
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.node_names)}
+        # conjunto imutável (e serializável, ao contrário de index.keys()) para testes "n in nodes"
+        self.nodes = frozenset(self.node_names)
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.edge_meta = edge_meta
+        self.meta_table = meta_table
+        self.directed = directed
+
+    # a vizinhança ordenada (algorithms.sorted_adjacency) é refeita sob demanda; vetores em
+    # memoryview (snapshot mapeado, ver src.graphs.snapshot) viajam como array.array
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state.pop("_sorted_adj", None)
+
+        for key in ("offsets", "targets", "weights", "edge_meta"):
+            vec = state.get(key)
+
+            if isinstance(vec, memoryview):
+                state[key] = array(vec.format, vec.tobytes())
+
+        return state
+
+    # Constrói o CSR a partir de um dicionário de adjacências {u: [(v, peso, meta?), ...]}
+    @classmethod
+    def from_adj(cls, adj: Dict[str, list], nodes: Optional[List[str]] = None, directed: bool = False, with_meta: bool = False) -> "CSRGraph":
+        names = sorted(set(nodes) if nodes is not None else set(adj))
+
+        # Destinos que não aparecem como chave também viram nós
+        extra = set()
+
+        for nbrs in adj.values():
+            for nbr in nbrs:
+                v = nbr[0] if isinstance(nbr, (list, tuple)) else nbr
+
+                if v is not None and v not in adj:
+                    extra.add(v)
+
+        if extra - set(names):
+            names = sorted(set(names) | extra)
+
+        index = {n: i for i, n in enumerate(names)}
+
+        offsets = array("q", [0])
+        targets = array("i")
+        weights = array("d")
+        edge_meta = array("i") if with_meta else None
+        meta_table: Optional[List[Any]] = [] if with_meta else None
+        meta_ids: Dict[Any, int] = {}
+
+        for u in names:
+            for nbr in adj.get(u, []):
+                if isinstance(nbr, (list, tuple)):
+                    v = nbr[0] if len(nbr) >= 1 else None
+
+                    try:
+                        w = float(nbr[1]) if len(nbr) >= 2 else 1.0
+                    except Exception:
+                        w = 1.0
+
+                    meta = nbr[2] if len(nbr) >= 3 else None
+                else:
+                    v = nbr
+                    w = 1.0
+                    meta = None
+
+                if v is None:
+                    continue
+
+                targets.append(index[v])
+                weights.append(w)
+
+                if edge_meta is not None:
+                    mid = meta_ids.get(meta)
+
+                    if mid is None:
+                        mid = len(meta_table)
+                        meta_ids[meta] = mid
+                        meta_table.append(meta)
+
+                    edge_meta.append(mid)
+
+            offsets.append(len(targets))
+
+        return cls(names, offsets, targets, weights, edge_meta=edge_meta, meta_table=meta_table, directed=directed)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_names)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.targets)
+
+    # Interface compatível com Graph/MusicGraph usada pelos algoritmos
+    def nodes_list(self) -> List[str]:
+        return self.node_names
+
+    def has_node(self, node: str) -> bool:
+        return node in self.index
+
+    def node_id(self, node: str) -> Optional[int]:
+        return self.index.get(node)
+
+    def degree(self, node: str) -> int:
+        i = self.index.get(node)
+
+        if i is None:
+            return 0
+
+        return int(self.offsets[i + 1] - self.offsets[i])
+
+    # Itera (vizinho, peso, meta) de um nó pelo nome
+    def neighbors(self, node: str) -> Iterator[Tuple[str, float, Any]]:
+        i = self.index.get(node)
+
+        if i is None:
+            return
+
+        names = self.node_names
+        meta_ids = self.edge_meta
+        table = self.meta_table
+
+        for j in range(self.offsets[i], self.offsets[i + 1]):
+            meta = table[meta_ids[j]] if meta_ids is not None else None
+            yield names[self.targets[j]], float(self.weights[j]), meta
+
+    # Retorna o metadado da aresta na posição j (ou None se o grafo não tiver)
+    def meta_at(self, j: int) -> Any:
+        if self.edge_meta is None:
+            return None
+
+        return self.meta_table[self.edge_meta[j]]
+
+    # Visões NumPy (sem cópia quando os vetores são array.array) dos vetores CSR
+    def as_numpy(self) -> Tuple[Any, Any, Any]:
+        if np is None:
+            raise ImportError("numpy é necessário para CSRGraph.as_numpy()")
+
+        return (
+            np.asarray(self.offsets, dtype=np.int64),
+            np.asarray(self.targets, dtype=np.int32),
+            np.asarray(self.weights, dtype=np.float64),
+        )
+
+    # Bytes ocupados pelos vetores numéricos (não inclui a tabela de nomes)
+    def memory_bytes(self) -> int:
+        total = 0
+
+        for arr in (self.offsets, self.targets, self.weights, self.edge_meta):
+            if arr is None:
+                continue
+
+            if hasattr(arr, "nbytes"):
+                total += int(arr.nbytes)
+            elif isinstance(arr, array):
+                total += arr.itemsize * len(arr)
+
+        return total
+
+# Retorna a visão CSR usada pelos algoritmos: o próprio CSRGraph ou o CSR congelado do grafo
+def csr_view(graph) -> Optional[CSRGraph]:
+    if isinstance(graph, CSRGraph):
+        return graph
+
+    csr = getattr(graph, "_csr", None)
+
+    if isinstance(csr, CSRGraph):
+        return csr
+
+    return None
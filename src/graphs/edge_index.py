@@ -0,0 +1,92 @@
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+# Índice de arestas sobre um dicionário de adjacências (Graph e MusicGraph).
+#
+# pos[(u, chave)] é a posição da entrada em adj[u], onde a chave identifica a aresta a
+# partir de u: o destino (MusicGraph) ou (destino, logradouro) (Graph). Com isso achar,
+# reescrever e remover uma entrada é O(1); a remoção troca a entrada com a última da lista,
+# então a ordem dos vizinhos de u muda a partir dali. adj não pode ter duas entradas com
+# a mesma chave (os loaders de Graph e MusicGraph fundem as repetidas, com o menor peso).
+#
+# pairs[(a, b)] (a <= b) conta quantas arestas distintas ligam o par, para saber quando
+# dois nós deixam de ser (ou passam a ser) vizinhos; n_edges conta as arestas distintas sem
+# laços, o mesmo que len(edges_list()).
+
+Node = str
+
+class EdgeIndex:
+    def __init__(self, adj: Dict[Node, List[tuple]], key_of: Callable[[tuple], Hashable]):
+        self.adj = adj
+        self.key_of = key_of
+        self.pos: Dict[Tuple[Node, Hashable], int] = {}
+        self.pairs: Dict[Tuple[Node, Node], int] = {}
+        self.n_edges = 0
+
+        for u, lst in adj.items():
+            keys = [key_of(e) for e in lst]
+
+            # o índice é montado na primeira leitura (edge_count, has_edge): ele não altera
+            # adj, então entradas repetidas têm de ser removidas ao carregar o grafo
+            if len(set(keys)) != len(keys):
+                raise ValueError(f"adjacência de {u!r} tem arestas repetidas")
+
+            for i, (e, k) in enumerate(zip(lst, keys)):
+                self.pos[(u, k)] = i
+                v = e[0]
+
+                if u <= v:
+                    self.link(u, v)
+
+    def get(self, u: Node, key: Hashable) -> Optional[int]:
+        return self.pos.get((u, key))
+
+    def entry(self, u: Node, key: Hashable) -> Optional[tuple]:
+        i = self.pos.get((u, key))
+
+        return None if i is None else self.adj[u][i]
+
+    def insert(self, u: Node, entry: tuple) -> None:
+        lst = self.adj.setdefault(u, [])
+        self.pos[(u, self.key_of(entry))] = len(lst)
+        lst.append(entry)
+
+    def replace(self, u: Node, entry: tuple) -> None:
+        self.adj[u][self.pos[(u, self.key_of(entry))]] = entry
+
+    def delete(self, u: Node, key: Hashable) -> tuple:
+        i = self.pos.pop((u, key))
+        lst = self.adj[u]
+        removed = lst[i]
+        last = lst.pop()
+
+        if i < len(lst):
+            lst[i] = last
+            self.pos[(u, self.key_of(last))] = i
+
+        return removed
+
+    # Registra mais uma aresta entre u e v; True se o par acabou de virar vizinho
+    def link(self, u: Node, v: Node) -> bool:
+        pair = (u, v) if u <= v else (v, u)
+        count = self.pairs.get(pair, 0) + 1
+        self.pairs[pair] = count
+
+        if u != v:
+            self.n_edges += 1
+
+        return count == 1
+
+    # Desfaz um link(); True se não sobrou nenhuma aresta entre u e v
+    def unlink(self, u: Node, v: Node) -> bool:
+        pair = (u, v) if u <= v else (v, u)
+        count = self.pairs.get(pair, 0) - 1
+
+        if count > 0:
+            self.pairs[pair] = count
+        else:
+            self.pairs.pop(pair, None)
+
+        if u != v:
+            self.n_edges -= 1
+
+        return count <= 0
@@ -1,7 +1,11 @@
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Iterator, List, Tuple, Optional, Any
 from pathlib import Path
 import pandas as pd
-import unicodedata
+import numpy as np
+
+from src.graphs.csr import CSRGraph
+from src.graphs.edge_index import EdgeIndex
+from src.graphs.names import normalize_name
 
 # Definição dos tipos das variáveis
 Node = str
@@ -12,9 +16,32 @@ Edge = Tuple[Node, Node, Peso, Logradouro]
 class Graph:
     # Construtor
     def __init__(self):
-        self.adj: Dict[Node, List[Tuple[Node, Peso, Logradouro]]] = {}
+        # adj de um grafo carregado de snapshot só é montado no primeiro acesso (ver a propriedade)
+        self._adj_loader = None
+        self._adj: Optional[Dict[Node, List[Tuple[Node, Peso, Logradouro]]]] = {}
         self.nodes: set = set()
         self.bairro_to_microrregiao: Dict[Node, Any] = {}
+        # Representação CSR congelada (None até to_csr() ser chamado)
+        self._csr: Optional[CSRGraph] = None
+        # Matriz de distâncias entre todos os pares (src.graphs.apsp.attach)
+        self._apsp = None
+        # Métricas de ego de todos os nós (preenchido por ego_metrics_all())
+        self._ego: Optional[Dict[Node, Dict[str, Any]]] = None
+        # Índice invertido microrregião -> bairros e estatísticas de todas as microrregiões
+        self._mr_index: Optional[Dict[str, List[Node]]] = None
+        self._mr_region_of: Dict[Node, str] = {}
+        self._mr_stats: Optional[Dict[str, Dict[str, Any]]] = None
+        # Índice de arestas (montado na primeira mutação) e contador de versão: cada
+        # add/remove/reweight incrementa version e descarta o CSR e a matriz APSP
+        self._edges: Optional[EdgeIndex] = None
+        self.version = 0
+        # Vizinhança ordenada por peso das travessias com desempate (algorithms.sorted_adjacency)
+        self._sorted_adj = None
+        # CSR das consultas ponto-a-ponto quando o grafo não está congelado (algorithms._p2p_view)
+        self._p2p_csr = None
+        # Tabelas de nós/arestas servidas por /nodes e /edges (src.graphs.tables)
+        self._node_table = None
+        self._edge_table = None
 
     # Método que constrói o grafo a partir dos datframes já EM MEMÓRIA
     @classmethod
@@ -25,36 +52,81 @@ class Graph:
         if df_microrregiao is not None:
             g.set_microrregiao_from_df(df_microrregiao)
 
-        # Conveniência: função local para normalizar nomes (chama o método da classe)
-        normalize = cls._normalize_name 
+        if df_adjacencias is None or len(df_adjacencias) == 0:
+            return g
+
+        cols = df_adjacencias.columns
+        n = len(df_adjacencias)
+
+        # Normaliza cada nome distinto uma única vez e mapeia as colunas inteiras
+        u_col = cls._normalize_column(df_adjacencias['bairro_origem']) if 'bairro_origem' in cols else [""] * n
+        v_col = cls._normalize_column(df_adjacencias['bairro_destino']) if 'bairro_destino' in cols else [""] * n
+        log_col = df_adjacencias['logradouro'].tolist() if 'logradouro' in cols else [''] * n
+
+        if 'peso' in cols:
+            peso_raw = df_adjacencias['peso']
+            peso_num = pd.to_numeric(peso_raw, errors='coerce')
+
+            # Como no float() linha a linha: None e textos não numéricos viram infinito, NaN continua NaN
+            if peso_raw.dtype == object:
+                is_float = peso_raw.map(lambda x: isinstance(x, float))
+                peso_num = peso_num.mask(peso_num.isna() & ~is_float, float('inf'))
+
+            peso_col = peso_num.astype(float).tolist()
+        else:
+            peso_col = [1.0] * n
 
-        for _, r in df_adjacencias.iterrows():
-            u_raw = r.get('bairro_origem')
-            v_raw = r.get('bairro_destino')
-            log = r.get('logradouro', '') if 'logradouro' in r.index else ''
-            peso_raw = r.get('peso', 1.0)
+        # Arestas direcionadas intercaladas (u->v, v->u por linha), na mesma ordem em que
+        # o laço linha a linha as inseria; o agrupamento por origem preserva essa ordem.
+        src = np.empty(2 * n, dtype=object)
+        src[0::2] = u_col
+        src[1::2] = v_col
 
-            u = normalize(u_raw)
-            v = normalize(v_raw)
+        dst = np.empty(2 * n, dtype=object)
+        dst[0::2] = v_col
+        dst[1::2] = u_col
 
-            try:
-                peso = float(peso_raw)
-            except Exception:
-                peso = float('inf')
+        peso = np.repeat(np.asarray(peso_col, dtype=float), 2).tolist()
+        log = np.repeat(np.asarray(log_col, dtype=object), 2).tolist()
+        dst = dst.tolist()
 
-            if u not in g.adj:
-                g.adj[u] = []
-            if v not in g.adj:
-                g.adj[v] = []
+        for u, idx in pd.Series(src).groupby(src, sort=False).indices.items():
+            # uma aresta é (destino, logradouro): linhas repetidas (e a volta de um laço
+            # u-u) viram uma entrada só, como as mutações de EdgeIndex exigem. Ela fica na
+            # posição da primeira linha com o menor peso entre as repetidas, o mesmo custo
+            # que o Dijkstra enxergava quando todas as entradas ficavam em adj.
+            pos: Dict[Tuple[Node, Logradouro], int] = {}
+            lst = []
 
-            # adicionar ambas as direções (grafo não-direcionado)
-            g.adj[u].append((v, peso, log))
-            g.adj[v].append((u, peso, log))
+            for i in idx:
+                key = (dst[i], log[i])
+                j = pos.get(key)
 
-            g.nodes.add(u)
-            g.nodes.add(v)
+                if j is None:
+                    pos[key] = len(lst)
+                    lst.append((dst[i], peso[i], log[i]))
+                elif peso[i] < lst[j][1]:
+                    lst[j] = (dst[i], peso[i], log[i])
+
+            g.adj[u] = lst
+
+        g.nodes.update(g.adj)
 
         return g
+
+    # Normaliza uma coluna de nomes: cada valor distinto passa uma vez por _normalize_name
+    @classmethod
+    def _normalize_column(cls, col: pd.Series) -> List[str]:
+        values = col.astype(object).tolist()
+        mapping = {}
+
+        for x in values:
+            key = (type(x), x)
+
+            if key not in mapping:
+                mapping[key] = cls._normalize_name(x)
+
+        return [mapping[(type(x), x)] for x in values]
     
     # Método que constrói o grafo a partir dos datframes a partir dos csvs
     @classmethod
@@ -87,23 +159,51 @@ class Graph:
         if bairro_col not in df_microrregiao.columns or micror_col not in df_microrregiao.columns:
             return
         
-        for _, r in df_microrregiao.iterrows():
-            bn = self._normalize_name(r[bairro_col])
-            self.bairro_to_microrregiao[bn] = r[micror_col]
+        bairros = self._normalize_column(df_microrregiao[bairro_col])
+        micror = df_microrregiao[micror_col].tolist()
 
-    # Método para normalizar uma string
-    @staticmethod
-    def _normalize_name(s: str) -> str:
-        if s is None:
-            return ""
-        
-        if not isinstance(s, str):
-            s = str(s)
+        self.bairro_to_microrregiao.update(zip(bairros, micror))
+        self.build_microrregiao_index()
+
+    # Monta o índice invertido microrregião -> bairros (chave: id como texto, sem espaços),
+    # com os bairros na ordem de bairro_to_microrregiao
+    def build_microrregiao_index(self) -> Dict[str, List[Node]]:
+        index: Dict[str, List[Node]] = {}
+
+        for b, mr in self.bairro_to_microrregiao.items():
+            index.setdefault(str(mr).strip(), []).append(b)
+
+        self._mr_index = index
+        self._mr_region_of = {b: key for key, members in index.items() for b in members}
+        self._mr_stats = None
+
+        return index
+
+    def microrregiao_index(self) -> Dict[str, List[Node]]:
+        if self._mr_index is None:
+            return self.build_microrregiao_index()
+
+        return self._mr_index
+
+    # Método para normalizar uma string (cacheado e internado em src.graphs.names)
+    # Grafos carregados de um snapshot (src.graphs.snapshot) começam só com o CSR mapeado;
+    # as listas de adjacência são montadas a partir dele no primeiro acesso a adj
+    @property
+    def adj(self) -> Dict[Node, List[Tuple[Node, Peso, Logradouro]]]:
+        if self._adj is None:
+            self._adj = self._adj_loader()
+            self._adj_loader = None
+
+        return self._adj
 
-        s2 = unicodedata.normalize("NFD", s)
-        s2 = "".join(c for c in s2 if unicodedata.category(c) != "Mn")
+    @adj.setter
+    def adj(self, value: Dict[Node, List[Tuple[Node, Peso, Logradouro]]]) -> None:
+        self._adj = value
+        self._adj_loader = None
 
-        return s2.strip().upper()
+    @staticmethod
+    def _normalize_name(s: str) -> str:
+        return normalize_name(s, upper=True)
 
     # Método para normalizar o nome de um nó
     def normalize_node(self, name: str) -> str:
@@ -117,11 +217,21 @@ class Graph:
     def nodes_list(self) -> List[str]:
         return sorted(self.nodes)
 
+    # Método que congela o grafo numa representação CSR (ids inteiros + vetores de offsets/destinos/pesos).
+    # Depois de chamado, os algoritmos passam a percorrer o CSR diretamente.
+    def to_csr(self) -> CSRGraph:
+        if self._csr is None:
+            self._csr = CSRGraph.from_adj(self.adj, nodes=list(self.nodes), with_meta=True)
+
+        return self._csr
+
     # Método para retornar as arestas
     def edges_list(self) -> List[Dict[str, Any]]:
-        seen = set()
+        return list(self.iter_edges())
 
-        out = []
+    # Mesmas arestas e mesma ordem de edges_list(), uma de cada vez
+    def iter_edges(self) -> Iterator[Dict[str, Any]]:
+        seen = set()
 
         for u, nbrs in self.adj.items():
             for v, peso, log in nbrs:
@@ -137,91 +247,308 @@ class Graph:
 
                 seen.add(key)
 
-                out.append({"bairro_origem": a, "bairro_destino": b, "logradouro": log, "peso": float(peso)})
-
-        return out
+                yield {"bairro_origem": a, "bairro_destino": b, "logradouro": log, "peso": float(peso)}
 
     # Método para retornar os nós com informação do grau 
     def nodes_metadata(self) -> List[Dict[str, Any]]:
-        out = []
+        return list(self.iter_nodes_metadata())
 
+    def iter_nodes_metadata(self) -> Iterator[Dict[str, Any]]:
         for n in sorted(self.nodes):
             grau = len(self.adj.get(n, []))
 
-            out.append({"id": n, "grau": int(grau), "microrregiao": self.bairro_to_microrregiao.get(n)})
-
-        return out
+            yield {"id": n, "grau": int(grau), "microrregiao": self.bairro_to_microrregiao.get(n)}
 
-    # Calcula métricas para ego-network radius=1 do bairro:
+    # Calcula métricas para ego-network radius=1 do bairro (lidas do cache de ego_metrics_all)
     def ego_metrics(self, bairro: str) -> Dict[str, Any]:
         b = self._normalize_name(bairro)
     
         if b not in self.nodes:
             return {"bairro": bairro, "grau": 0, "ordem_ego": 0, "tamanho_ego": 0, "densidade_ego": 0.0}
 
-        # vizinhos diretos
-        vizs = {v for v, _, _ in self.adj.get(b, [])}
-        vizs.add(b)
-
-        N = len(vizs)
+        return dict(self.ego_metrics_all()[b])
+
+    # Métricas de ego de todos os nós numa passada só.
+    #
+    # A ego-network de b tem b e seus vizinhos distintos; suas arestas (pares distintos) são:
+    # as de b aos vizinhos (grau), as entre dois vizinhos (triângulos que passam por b) e os
+    # laços de qualquer nó da ego-network. Os triângulos são contados uma vez cada com
+    # adjacências ordenadas por posto (grau, nome): cada nó só olha para vizinhos de posto
+    # maior e a interseção desses conjuntos fecha o triângulo.
+    def ego_metrics_all(self) -> Dict[Node, Dict[str, Any]]:
+        if self._ego is not None:
+            return self._ego
+
+        nbrs: Dict[Node, set] = {n: set() for n in self.nodes}
+        loops = set()
+
+        for u, lst in self.adj.items():
+            s = nbrs.setdefault(u, set())
+
+            for v, _, _ in lst:
+                if v == u:
+                    loops.add(u)
+                else:
+                    s.add(v)
+
+        order = sorted(nbrs, key=lambda n: (len(nbrs[n]), n))
+        rank = {n: i for i, n in enumerate(order)}
+        forward = {n: {v for v in nbrs[n] if v in rank and rank[v] > rank[n]} for n in order}
+        triangles = dict.fromkeys(order, 0)
+
+        for u in order:
+            fu = forward[u]
+
+            for v in fu:
+                common = fu & forward[v]
+
+                if common:
+                    triangles[u] += len(common)
+                    triangles[v] += len(common)
+
+                    for w in common:
+                        triangles[w] += 1
+
+        # guardados para as mutações atualizarem as métricas sem recalcular tudo
+        self._ego_nbrs = nbrs
+        self._ego_loops = loops
+        self._ego_tri = triangles
+        self._ego = {b: self._ego_row(b) for b in self.nodes}
+
+        return self._ego
+
+    def _ego_row(self, b: Node) -> Dict[str, Any]:
+        vizs = self._ego_nbrs.get(b, set())
+        loops = self._ego_loops
+        grau = len(vizs)
+        N = grau + 1
+        E = grau + self._ego_tri.get(b, 0) + (b in loops) + (len(vizs & loops) if loops else 0)
+        dens = (2.0 * E) / (N * (N - 1)) if N > 1 else 0.0
 
-        m_count = 0
-        seen_pairs = set()
-        
-        for u in vizs:
-            for v in self.adj.get(u, []):
-                if v[0] in vizs:
-                    a, c = (u, v[0]) if u <= v[0] else (v[0], u)
-                    
-                    key = (a, c)
-
-                    if key not in seen_pairs:
-                        seen_pairs.add(key)
-                        m_count += 1
-                        
-        E = m_count
-        dens = 0.0
-        
-        if N > 1:
-            dens = (2.0 * E) / (N * (N - 1))
-            
-        grau = max(0, len(vizs) - 1)
-        
         return {"bairro": b, "grau": int(grau), "ordem_ego": int(N), "tamanho_ego": int(E), "densidade_ego": round(dens, 4)}
 
-    # Calcula ordem/tamanho/densidade para uma microrregião.
+    # Calcula ordem/tamanho/densidade para uma microrregião (lidas de microrregiao_stats_all)
     def microrregiao_stats(self, microrregiao_id: Any) -> Optional[Dict[str, Any]]:        
         target = "" if microrregiao_id is None else str(microrregiao_id).strip()
 
-        bairros = [b for b, mr in self.bairro_to_microrregiao.items() if str(mr).strip() == target]
+        stats = self.microrregiao_stats_all().get(target)
 
-        if not bairros:
+        if stats is None:
             return None
 
-        N = len(bairros)
+        return {**stats, "microrregiao": microrregiao_id}
+
+    # Ordem/tamanho/densidade de todas as microrregiões numa única varredura das arestas:
+    # uma aresta conta para a microrregião quando as duas pontas pertencem a ela (pares
+    # distintos, laços incluídos)
+    def microrregiao_stats_all(self) -> Dict[str, Dict[str, Any]]:
+        if self._mr_stats is not None:
+            return self._mr_stats
 
+        index = self.microrregiao_index()
+        region_of = self._mr_region_of
         seen = set()
-        E = 0
+        sizes = dict.fromkeys(index, 0)
 
-        for u in bairros:
-            for v in self.adj.get(u, []):
-                if v[0] in bairros:
-                    a, b_ = (u, v[0]) if u <= v[0] else (v[0], u)
+        for u, nbrs in self.adj.items():
+            key = region_of.get(u)
 
-                    key = (a, b_)
+            if key is None:
+                continue
 
-                    if key not in seen:
-                        seen.add(key)
-                        E += 1
+            for v, _, _ in nbrs:
+                if region_of.get(v) != key:
+                    continue
+
+                pair = (u, v) if u <= v else (v, u)
+
+                if pair not in seen:
+                    seen.add(pair)
+                    sizes[key] += 1
+
+        out: Dict[str, Dict[str, Any]] = {}
+
+        for key, members in index.items():
+            N = len(members)
+
+            out[key] = self._mr_row(key, N, sizes[key])
+
+        self._mr_stats = out
+
+        return out
+
+    @staticmethod
+    def _mr_row(key: str, N: int, E: int) -> Dict[str, Any]:
+        dens = (2.0 * E) / (N * (N - 1)) if N > 1 else 0.0
+
+        return {"microrregiao": key, "ordem": N, "tamanho": E, "densidade": round(dens, 4)}
+
+    # ------------------------------------------------------------------
+    # Mutações (fechamento de ruas, mudança de peso) sem recarregar o CSV.
+    #
+    # Uma aresta é identificada por (bairro, bairro, logradouro). Grau (len(adj[u])), número
+    # de arestas, métricas de ego e estatísticas de microrregião já calculadas são
+    # atualizados incrementalmente; o CSR e a matriz APSP são descartados.
+    # ------------------------------------------------------------------
+
+    def _edge_index(self) -> EdgeIndex:
+        if self._edges is None:
+            self._edges = EdgeIndex(self.adj, lambda e: (e[0], e[2]))
+
+        return self._edges
+
+    def _touch(self) -> None:
+        self.version += 1
+        self._csr = None
+        self._apsp = None
+
+    def degree(self, node: str) -> int:
+        return len(self.adj.get(self._normalize_name(node), []))
+
+    # Número de arestas distintas (o mesmo que len(edges_list()))
+    def edge_count(self) -> int:
+        return self._edge_index().n_edges
+
+    def has_edge(self, u_raw: str, v_raw: str, logradouro: Optional[str] = None) -> bool:
+        u = self._normalize_name(u_raw)
+        v = self._normalize_name(v_raw)
+
+        if logradouro is not None:
+            return self._edge_index().get(u, (v, logradouro)) is not None
+
+        return any(nb == v for nb, _, _ in self.adj.get(u, []))
+
+    # Adiciona a aresta u-v pela rua `logradouro`; se ela já existe, só troca o peso.
+    # Devolve True quando a aresta é nova.
+    def add_edge(self, u_raw: str, v_raw: str, peso: Any = 1.0, logradouro: str = "") -> bool:
+        u = self._normalize_name(u_raw)
+        v = self._normalize_name(v_raw)
+        w = float(peso)
+        idx = self._edge_index()
+
+        if idx.get(u, (v, logradouro)) is not None:
+            self._reweight(u, v, logradouro, w)
+            return False
+
+        idx.insert(u, (v, w, logradouro))
+
+        if u != v:
+            idx.insert(v, (u, w, logradouro))
+
+        for n in (u, v):
+            if n not in self.nodes:
+                self.nodes.add(n)
+
+                if self._ego is not None:
+                    self._ego[n] = self._ego_row(n)
+
+        if idx.link(u, v):
+            self._pair_changed(u, v, added=True)
+
+        self._touch()
+
+        return True
+
+    # Remove a aresta u-v pela rua `logradouro` (todas as ruas entre u e v se None).
+    # Os nós continuam no grafo. Devolve quantas arestas foram removidas.
+    def remove_edge(self, u_raw: str, v_raw: str, logradouro: Optional[str] = None) -> int:
+        u = self._normalize_name(u_raw)
+        v = self._normalize_name(v_raw)
+        idx = self._edge_index()
+        logs = self._logradouros_between(u, v) if logradouro is None else [logradouro]
+        removed = 0
+
+        for log in logs:
+            if idx.get(u, (v, log)) is None:
+                continue
+
+            idx.delete(u, (v, log))
+
+            if u != v:
+                idx.delete(v, (u, log))
+
+            removed += 1
+
+            if idx.unlink(u, v):
+                self._pair_changed(u, v, added=False)
+
+        if removed:
+            self._touch()
+
+        return removed
+
+    # Troca o peso da aresta u-v pela rua `logradouro` (todas as ruas entre u e v se None).
+    # Devolve quantas arestas foram alteradas.
+    def set_weight(self, u_raw: str, v_raw: str, peso: Any, logradouro: Optional[str] = None) -> int:
+        u = self._normalize_name(u_raw)
+        v = self._normalize_name(v_raw)
+        w = float(peso)
+        idx = self._edge_index()
+        logs = self._logradouros_between(u, v) if logradouro is None else [logradouro]
+        changed = 0
+
+        for log in logs:
+            if idx.get(u, (v, log)) is not None:
+                self._reweight(u, v, log, w)
+                changed += 1
+
+        return changed
+
+    def _logradouros_between(self, u: Node, v: Node) -> List[Logradouro]:
+        return list(dict.fromkeys(log for nb, _, log in self.adj.get(u, []) if nb == v))
+
+    def _reweight(self, u: Node, v: Node, logradouro: Logradouro, w: float) -> None:
+        idx = self._edge_index()
+        idx.replace(u, (v, w, logradouro))
+
+        if u != v:
+            idx.replace(v, (u, w, logradouro))
+
+        self._touch()
+
+    # u e v passaram a ser (added) ou deixaram de ser vizinhos: ajusta as métricas de ego
+    # (conjuntos de vizinhos, triângulos, laços) e o tamanho da microrregião, se calculados
+    def _pair_changed(self, u: Node, v: Node, added: bool) -> None:
+        if self._ego is not None:
+            nbrs = self._ego_nbrs
+            tri = self._ego_tri
+            delta = 1 if added else -1
+
+            if u == v:
+                if added:
+                    self._ego_loops.add(u)
+                else:
+                    self._ego_loops.discard(u)
+
+                touched = {u} | nbrs.get(u, set())
+            else:
+                nu = nbrs.setdefault(u, set())
+                nv = nbrs.setdefault(v, set())
+
+                if added:
+                    common = nu & nv
+                    nu.add(v)
+                    nv.add(u)
+                else:
+                    nu.discard(v)
+                    nv.discard(u)
+                    common = nu & nv
+
+                for w in common:
+                    tri[w] = tri.get(w, 0) + delta
+
+                tri[u] = tri.get(u, 0) + delta * len(common)
+                tri[v] = tri.get(v, 0) + delta * len(common)
+                touched = {u, v} | common
+
+            for b in touched:
+                if b in self.nodes:
+                    self._ego[b] = self._ego_row(b)
+
+        if self._mr_stats is not None:
+            key = self._mr_region_of.get(u)
+
+            if key is not None and self._mr_region_of.get(v) == key:
+                row = self._mr_stats[key]
+                self._mr_stats[key] = self._mr_row(key, row["ordem"], row["tamanho"] + (1 if added else -1))
 
-        dens = 0.0
-        
-        if N > 1:
-            dens = (2.0 * E) / (N * (N - 1))
-
-        return {
-            "microrregiao": microrregiao_id, 
-            "ordem": N, 
-            "tamanho": E, 
-            "densidade": round(dens, 4)
-        }
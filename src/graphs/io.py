@@ -1,8 +1,20 @@
 from pathlib import Path
+import hashlib
 import re
-import unicodedata
 import pandas as pd
 
+from src.graphs.names import strip_accents
+
+# Hash SHA-256 do conteúdo de um arquivo (identifica versões dos CSVs de entrada)
+def file_digest(path) -> str:
+    h = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    return h.hexdigest()
+
 def detect_melt_columns(csv_path):
     csv_path = Path(csv_path)
 
@@ -37,12 +49,7 @@ def melt_bairros_csv(csv_path: str) -> pd.DataFrame:
     melted["microrregiao"] = melted["coluna_origem"].str.split(".").str[0]
 
     melted["bairro"] = melted["bairro"].str.strip()
-    melted["bairro"] = melted["bairro"].apply(
-        lambda x: "".join(
-            c for c in unicodedata.normalize("NFD", x) 
-            if unicodedata.category(c) != "Mn"
-            ) if isinstance(x, str) else x
-    )
+    melted["bairro"] = melted["bairro"].apply(lambda x: strip_accents(x) if isinstance(x, str) else x)
 
     melted = melted.drop_duplicates(subset=["bairro"])
     melted = melted.sort_values(by=["microrregiao"]).reset_index(drop=True)
@@ -1,30 +1,81 @@
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Iterator, List, Tuple, Optional, Any
 from pathlib import Path
 import pandas as pd
-import unicodedata
 import random
 
+from src.graphs.csr import CSRGraph
+from src.graphs.edge_index import EdgeIndex
+from src.graphs.names import normalize_name
+
 Node = str
 Peso = float
 
+# Sorteios de apply_negative_fraction/inject_negative_cycle, compartilhados com
+# src.graphs.overlay para que um overlay e o grafo mutado escolham as mesmas arestas/nós
+
+# Pares (u, v) com u <= v na ordem de adj; a fração sorteada com random.seed(seed)
+def sample_negative_edges(adj, negative_fraction: float, seed: Optional[int]) -> set:
+    random.seed(seed)
+    edges = []
+
+    for u, nbrs in adj.items():
+        for nbr in nbrs:
+            if u <= nbr[0]:
+                edges.append((u, nbr[0]))
+
+    m = max(1, int(len(edges) * negative_fraction))
+
+    return set(random.sample(edges, m)) if edges else set()
+
+def sample_cycle_nodes(nodes, cycle_size: int, seed: Optional[int]) -> List[Node]:
+    random.seed(seed)
+
+    if len(nodes) < cycle_size:
+        raise ValueError("not enough nodes to build negative cycle")
+
+    return random.sample(list(nodes), cycle_size)
+
 class MusicGraph:
     # Construtor
     def __init__(self):
-        self.adj: Dict[Node, List[Tuple[Node, Peso]]] = {}
+        # adj de um grafo carregado de snapshot só é montado no primeiro acesso (ver a propriedade)
+        self._adj_loader = None
+        self._adj: Optional[Dict[Node, List[Tuple[Node, Peso]]]] = {}
         self.nodes: set = set()
+        # Representação CSR congelada (None até to_csr() ser chamado)
+        self._csr: Optional[CSRGraph] = None
+        # Matriz de distâncias entre todos os pares (src.graphs.apsp.attach)
+        self._apsp = None
+        # Índice de arestas (par de faixas -> posição em adj) e contador de versão: cada
+        # add/remove/reweight incrementa version e descarta o CSR e a matriz APSP
+        self._edges: Optional[EdgeIndex] = None
+        self.version = 0
+        # Vizinhança ordenada por peso das travessias com desempate (algorithms.sorted_adjacency)
+        self._sorted_adj = None
+        # CSR das consultas ponto-a-ponto quando o grafo não está congelado (algorithms._p2p_view)
+        self._p2p_csr = None
+        # Tabelas de nós/arestas servidas por /nodes e /edges (src.graphs.tables)
+        self._node_table = None
+        self._edge_table = None
 
-    @staticmethod
-    def _normalize_name(s: Optional[str]) -> str:
-        if s is None:
-            return ""
-        
-        if not isinstance(s, str):
-            s = str(s)
+    # Grafos carregados de um snapshot (src.graphs.snapshot) começam só com o CSR mapeado;
+    # as listas de adjacência são montadas a partir dele no primeiro acesso a adj
+    @property
+    def adj(self) -> Dict[Node, List[Tuple[Node, Peso]]]:
+        if self._adj is None:
+            self._adj = self._adj_loader()
+            self._adj_loader = None
+
+        return self._adj
 
-        s2 = unicodedata.normalize("NFD", s)
-        s2 = "".join(c for c in s2 if unicodedata.category(c) != "Mn")
+    @adj.setter
+    def adj(self, value: Dict[Node, List[Tuple[Node, Peso]]]) -> None:
+        self._adj = value
+        self._adj_loader = None
 
-        return s2.strip()
+    @staticmethod
+    def _normalize_name(s: Optional[str]) -> str:
+        return normalize_name(s)
 
     def normalize_node(self, name: str) -> str:
         return self._normalize_name(name)
@@ -35,7 +86,37 @@ class MusicGraph:
     def nodes_list(self) -> List[str]:
         return sorted(self.nodes)
 
-    def add_edge(self, a_raw: str, b_raw: str, peso: Any = 1.0) -> None:
+    # Congela o grafo numa representação CSR; mutações posteriores descartam o CSR
+    def to_csr(self) -> CSRGraph:
+        if self._csr is None:
+            self._csr = CSRGraph.from_adj(self.adj, nodes=list(self.nodes))
+
+        return self._csr
+
+    def _edge_index(self) -> EdgeIndex:
+        if self._edges is None:
+            self._edges = EdgeIndex(self.adj, lambda e: e[0])
+
+        return self._edges
+
+    def _touch(self) -> None:
+        self.version += 1
+        self._csr = None
+        self._apsp = None
+
+    def degree(self, node: str) -> int:
+        return len(self.adj.get(self._normalize_name(node), []))
+
+    # Número de arestas distintas (o mesmo que len(edges_list()))
+    def edge_count(self) -> int:
+        return self._edge_index().n_edges
+
+    def has_edge(self, a_raw: str, b_raw: str) -> bool:
+        return self._edge_index().get(self._normalize_name(a_raw), self._normalize_name(b_raw)) is not None
+
+    # Adiciona a aresta a-b (não-direcionada); se ela já existe, só troca o peso.
+    # Devolve True quando a aresta é nova.
+    def add_edge(self, a_raw: str, b_raw: str, peso: Any = 1.0) -> bool:
         a = self._normalize_name(a_raw)
         b = self._normalize_name(b_raw)
 
@@ -44,18 +125,83 @@ class MusicGraph:
         except Exception:
             w = 1.0
 
-        if a not in self.adj:
-            self.adj[a] = []
-        
-        if b not in self.adj:
-            self.adj[b] = []
+        return self._put_edge(a, b, w)
+
+    def _put_edge(self, a: Node, b: Node, w: float) -> bool:
+        idx = self._edge_index()
+
+        if idx.get(a, b) is not None:
+            self._reweight(a, b, w)
+            return False
 
         # adicionar ambas as direções (grafo não-direcionado)
-        self.adj[a].append((b, w))
-        self.adj[b].append((a, w))
+        idx.insert(a, (b, w))
 
+        if a != b:
+            idx.insert(b, (a, w))
+
+        idx.link(a, b)
         self.nodes.add(a)
         self.nodes.add(b)
+        self._touch()
+
+        return True
+
+    # Remove a aresta a-b; os nós continuam no grafo. Devolve True se ela existia.
+    def remove_edge(self, a_raw: str, b_raw: str) -> bool:
+        a = self._normalize_name(a_raw)
+        b = self._normalize_name(b_raw)
+        idx = self._edge_index()
+
+        if idx.get(a, b) is None:
+            return False
+
+        idx.delete(a, b)
+
+        if a != b:
+            idx.delete(b, a)
+
+        idx.unlink(a, b)
+        self._touch()
+
+        return True
+
+    # Remove o nó e todas as arestas dele. Devolve True se ele existia.
+    def remove_node(self, node_raw: str) -> bool:
+        u = self._normalize_name(node_raw)
+
+        if u not in self.nodes:
+            return False
+
+        for v, _ in list(self.adj.get(u, [])):
+            self.remove_edge(u, v)
+
+        self.adj.pop(u, None)
+        self.nodes.discard(u)
+        self._touch()
+
+        return True
+
+    # Troca o peso da aresta a-b. Devolve True se ela existia.
+    def set_weight(self, a_raw: str, b_raw: str, peso: Any) -> bool:
+        a = self._normalize_name(a_raw)
+        b = self._normalize_name(b_raw)
+
+        if self._edge_index().get(a, b) is None:
+            return False
+
+        self._reweight(a, b, float(peso))
+
+        return True
+
+    def _reweight(self, a: Node, b: Node, w: float) -> None:
+        idx = self._edge_index()
+        idx.replace(a, (b, w))
+
+        if a != b:
+            idx.replace(b, (a, w))
+
+        self._touch()
 
     @classmethod
     def load_from_edges_csv(cls, path: str | Path, a_col: str = "track_a", b_col: str = "track_b", peso_col: str = "peso", genres_col: Optional[str] = "common_genres") -> "MusicGraph":
@@ -82,7 +228,12 @@ class MusicGraph:
             except Exception:
                 w = 1.0
             
-            mg.add_edge(a, b, w)
+            # linhas repetidas do mesmo par (em qualquer sentido) ficam com o menor peso,
+            # o custo que os caminhos mínimos usavam quando adj guardava todas as entradas
+            entry = mg._edge_index().entry(mg._normalize_name(a), mg._normalize_name(b))
+
+            if entry is None or w < entry[1]:
+                mg.add_edge(a, b, w)
             
             if genres_col and genres_col in df.columns:
                 g = str(r.get(genres_col, "")).strip()
@@ -92,8 +243,11 @@ class MusicGraph:
         return mg
 
     def edges_list(self) -> List[Dict[str, Any]]:
+        return list(self.iter_edges())
+
+    # Mesmas arestas e mesma ordem de edges_list(), uma de cada vez
+    def iter_edges(self) -> Iterator[Dict[str, Any]]:
         seen = set()
-        out = []
         genres_map = getattr(self, "_edge_genres", {})
 
         for u, nbrs in self.adj.items():
@@ -110,58 +264,31 @@ class MusicGraph:
                 seen.add(key)
                 
                 g = genres_map.get((a, b), "") or genres_map.get((b, a), "")
-                out.append({"track_a": a, "track_b": b, "common_genres": g, "peso": float(w)})
-        
-        return out
+                yield {"track_a": a, "track_b": b, "common_genres": g, "peso": float(w)}
 
+    # Subtrai negative_shift do peso de uma fração das arestas. A amostra sai da mesma
+    # lista de arestas (ordem de adj) de sempre, então a mesma semente escolhe as mesmas.
     def apply_negative_fraction(self, negative_shift: float = 0.6, negative_fraction: float = 0.03, seed: Optional[int] = 12345) -> None:
-        random.seed(seed)
-        edges = []
-        
-        for u, nbrs in self.adj.items():
-            for v, w in nbrs:
-                if u <= v:
-                    edges.append((u, v))
-        
-        m = max(1, int(len(edges) * negative_fraction))
-        chosen = set(random.sample(edges, m)) if edges else set()
+        chosen = sample_negative_edges(self.adj, negative_fraction, seed)
+        idx = self._edge_index()
         
         for (a, b) in chosen:
-            for idx, (nb, w) in enumerate(self.adj[a]):
-                if nb == b:
-                    self.adj[a][idx] = (nb, float(w) - negative_shift)
-            
-            for idx, (nb, w) in enumerate(self.adj[b]):
-                if nb == a:
-                    self.adj[b][idx] = (nb, float(w) - negative_shift)
+            entry = idx.entry(a, b)
+
+            if entry is not None:
+                self._reweight(a, b, float(entry[1]) - negative_shift)
+
+        self._touch()
 
     def inject_negative_cycle(self, cycle_size: int = 3, cycle_edge_weight: float = -0.8, seed: Optional[int] = 12345) -> List[Node]:
-        random.seed(seed)
-        
-        if len(self.nodes) < cycle_size:
-            raise ValueError("not enough nodes to build negative cycle")
-        
-        chosen = random.sample(list(self.nodes), cycle_size)
+        chosen = sample_cycle_nodes(self.nodes, cycle_size, seed)
         norm = [self._normalize_name(x) for x in chosen]
         
         for i in range(cycle_size):
             a = norm[i]
             b = norm[(i + 1) % cycle_size]
-            found = False
-        
-            for idx, (nb, w) in enumerate(self.adj.get(a, [])):
-                if nb == b:
-                    self.adj[a][idx] = (nb, float(cycle_edge_weight))
-                    found = True
-                    break
-        
-            if not found:
-                self.adj.setdefault(a, []).append((b, float(cycle_edge_weight)))
-                self.adj.setdefault(b, []).append((a, float(cycle_edge_weight)))
-                self.nodes.add(a); self.nodes.add(b)
-        
-            for idx, (nb, w) in enumerate(self.adj.get(b, [])):
-                if nb == a:
-                    self.adj[b][idx] = (nb, float(cycle_edge_weight))
-                    break
+            self._put_edge(a, b, float(cycle_edge_weight))
+
+        self._touch()
+
         return norm
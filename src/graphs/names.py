@@ -0,0 +1,57 @@
+from typing import Any, Dict
+from functools import lru_cache
+import unicodedata
+import sys
+
+# Normalização de nomes compartilhada por Graph, MusicGraph e io.melt_bairros_csv.
+#
+# A decomposição Unicode é cara e os mesmos poucos milhares de nomes (bairros, faixas)
+# chegam a cada has_node, a cada requisição da API e a cada linha carregada; por isso as
+# duas etapas ficam em caches LRU limitados e o nome canônico é internado (sys.intern),
+# de forma que todas as chaves iguais compartilham o mesmo objeto str.
+
+NORMALIZE_CACHE_SIZE = 65536
+
+# Remove os acentos (caracteres de categoria Mn após a decomposição NFD)
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _strip_marks(s: str) -> str:
+    s2 = unicodedata.normalize("NFD", s)
+
+    return sys.intern("".join(c for c in s2 if unicodedata.category(c) != "Mn"))
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _canonical(s: str, upper: bool) -> str:
+    out = _strip_marks(s).strip()
+
+    if upper:
+        out = out.upper()
+
+    return sys.intern(out)
+
+# Nome canônico: sem acentos, sem espaços nas pontas e, se upper=True, em maiúsculas
+def normalize_name(s: Any, upper: bool = False) -> str:
+    if s is None:
+        return ""
+
+    if not isinstance(s, str):
+        s = str(s)
+
+    return _canonical(s, upper)
+
+# Apenas remove os acentos, sem strip/upper (usado no pré-processamento dos CSVs)
+def strip_accents(s: str) -> str:
+    return _strip_marks(s)
+
+# Contadores de acerto/erro dos caches de normalização
+def normalization_stats() -> Dict[str, Dict[str, int]]:
+    out = {}
+
+    for name, fn in (("canonical", _canonical), ("strip_marks", _strip_marks)):
+        info = fn.cache_info()
+        out[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+    return out
+
+def clear_normalization_cache() -> None:
+    _canonical.cache_clear()
+    _strip_marks.cache_clear()
@@ -0,0 +1,241 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections.abc import Mapping
+
+from src.graphs.csr import CSRGraph, csr_view
+from src.graphs.music_graph import sample_negative_edges, sample_cycle_nodes
+
+# Overlay de pesos copy-on-write sobre um Graph/MusicGraph que não é alterado.
+#
+# O overlay guarda só as diferenças: pesos sobrescritos (por posição da entrada em
+# base.adj[u]) e arestas extras. `overlay.adj` é uma visão somente-leitura no formato de
+# adj (u -> lista de entradas) que aplica essas diferenças na hora, então os algoritmos
+# de src.graphs.algorithms leem o overlay como se fosse o grafo alterado. Cenários de
+# benchmark e simulações custam memória proporcional às mudanças, não ao grafo: o SPFA de
+# bellman_ford percorre os vetores do CSR da base com as mudanças por cima (csr_patch).
+
+Node = str
+
+def _with_weight(entry: tuple, w: float) -> tuple:
+    return (entry[0], w) + tuple(entry[2:])
+
+class _OverlayAdj(Mapping):
+    def __init__(self, overlay: "WeightOverlay"):
+        self._o = overlay
+
+    def __getitem__(self, u: Node) -> List[tuple]:
+        o = self._o
+        base = o.base.adj.get(u)
+        extra = o._extra.get(u)
+        overrides = o._overrides.get(u)
+
+        if base is None and extra is None:
+            raise KeyError(u)
+
+        # sem mudanças no nó: a própria lista da base (os algoritmos só leem)
+        if not overrides and not extra:
+            return base
+
+        out = list(base) if base else []
+
+        if overrides:
+            for i, w in overrides.items():
+                out[i] = _with_weight(out[i], w)
+
+        if extra:
+            out.extend(extra)
+
+        return out
+
+    def __iter__(self) -> Iterator[Node]:
+        base = self._o.base.adj
+        yield from base
+
+        for u in self._o._extra:
+            if u not in base:
+                yield u
+
+    def __len__(self) -> int:
+        base = self._o.base.adj
+
+        return len(base) + sum(1 for u in self._o._extra if u not in base)
+
+    def __contains__(self, u: object) -> bool:
+        return u in self._o.base.adj or u in self._o._extra
+
+class WeightOverlay:
+    def __init__(self, base):
+        self.base = base
+        # u -> {posição em base.adj[u]: novo peso}
+        self._overrides: Dict[Node, Dict[int, float]] = {}
+        # u -> entradas acrescentadas depois das da base
+        self._extra: Dict[Node, List[tuple]] = {}
+        self._extra_nodes: set = set()
+        self.adj = _OverlayAdj(self)
+        self._csr: Optional[CSRGraph] = None
+        self._apsp = None
+        self._sorted_adj = None
+        self._p2p_csr = None
+        self.version = 0
+
+    @property
+    def directed(self) -> bool:
+        return getattr(self.base, "directed", False)
+
+    @property
+    def nodes(self) -> set:
+        return self.base.nodes if not self._extra_nodes else self.base.nodes | self._extra_nodes
+
+    def nodes_list(self) -> List[str]:
+        return sorted(self.nodes)
+
+    def _normalize_name(self, s: Any) -> str:
+        return self.base._normalize_name(s)
+
+    def normalize_node(self, name: str) -> str:
+        return self._normalize_name(name)
+
+    def has_node(self, node: str) -> bool:
+        n = self._normalize_name(node)
+
+        return n in self.base.nodes or n in self._extra_nodes
+
+    # Quantidade de mudanças guardadas (pesos sobrescritos + entradas extras)
+    def n_changes(self) -> int:
+        return sum(len(d) for d in self._overrides.values()) + sum(len(l) for l in self._extra.values())
+
+    # Mudanças em ids/posições do CSR da base, para o SPFA de algorithms.bellman_ford:
+    # (CSR da base, {u: {posição: peso novo}}, {u: [(v, peso), ...]}). A ordem das linhas do
+    # CSR é a de base.adj, então a posição i de _overrides[u] vira offsets[u] + i. Uma base
+    # ainda não congelada é congelada aqui (uma vez por grafo, não por overlay). None quando
+    # o overlay tem nós que a base não tem.
+    def csr_patch(self) -> Optional[Tuple[CSRGraph, Dict[int, Dict[int, float]], Dict[int, List[Tuple[int, float]]]]]:
+        if self._extra_nodes:
+            return None
+
+        base = csr_view(self.base)
+
+        if base is None:
+            if not hasattr(self.base, "to_csr"):
+                return None
+
+            base = self.base.to_csr()
+
+        index = base.index
+        patch = {}
+
+        for u, changes in self._overrides.items():
+            i = index[u]
+            lo = base.offsets[i]
+            patch[i] = {lo + pos: w for pos, w in changes.items()}
+
+        extra = {index[u]: [(index[e[0]], float(e[1])) for e in lst] for u, lst in self._extra.items()}
+
+        return base, patch, extra
+
+    # CSR do grafo com as mudanças aplicadas, uma cópia inteira (construído sob demanda e
+    # descartado a cada mudança); bellman_ford usa csr_patch e não passa por aqui
+    def to_csr(self) -> CSRGraph:
+        if self._csr is None:
+            with_meta = next((len(e) > 2 for lst in self.base.adj.values() for e in lst), False)
+            self._csr = CSRGraph.from_adj(self.adj, nodes=list(self.nodes), with_meta=with_meta)
+
+        return self._csr
+
+    def _touch(self) -> None:
+        self.version += 1
+        self._csr = None
+        self._apsp = None
+
+    # Peso atual da primeira aresta u->v (None se não houver)
+    def weight(self, u_raw: str, v_raw: str) -> Optional[float]:
+        u = self._normalize_name(u_raw)
+        v = self._normalize_name(v_raw)
+
+        for nbr in self.adj.get(u, []):
+            if nbr[0] == v:
+                return float(nbr[1])
+
+        return None
+
+    # Reescreve todas as entradas u->v (base e extras); devolve quantas achou
+    def _set_directed(self, u: Node, v: Node, w: float) -> int:
+        found = 0
+
+        for i, nbr in enumerate(self.base.adj.get(u, [])):
+            if nbr[0] == v:
+                self._overrides.setdefault(u, {})[i] = w
+                found += 1
+
+        extra = self._extra.get(u, [])
+
+        for i, nbr in enumerate(extra):
+            if nbr[0] == v:
+                extra[i] = _with_weight(nbr, w)
+                found += 1
+
+        return found
+
+    # Troca o peso da aresta a-b (as duas direções). Devolve True se ela existia.
+    def set_weight(self, a_raw: str, b_raw: str, peso: Any) -> bool:
+        a = self._normalize_name(a_raw)
+        b = self._normalize_name(b_raw)
+
+        return self._set_weight(a, b, float(peso))
+
+    def _set_weight(self, a: Node, b: Node, w: float) -> bool:
+        found = self._set_directed(a, b, w)
+
+        if a != b:
+            self._set_directed(b, a, w)
+
+        if found:
+            self._touch()
+
+        return bool(found)
+
+    # Acrescenta a aresta a-b (entradas extras); se ela já existe, só troca o peso.
+    # `meta` completa a entrada no formato da base (ex.: o logradouro em Graph).
+    def add_edge(self, a_raw: str, b_raw: str, peso: Any = 1.0, *meta: Any) -> bool:
+        a = self._normalize_name(a_raw)
+        b = self._normalize_name(b_raw)
+
+        return self._put_edge(a, b, float(peso), meta)
+
+    def _put_edge(self, a: Node, b: Node, w: float, meta: tuple = ()) -> bool:
+        if self._set_weight(a, b, w):
+            return False
+
+        self._extra.setdefault(a, []).append((b, w) + tuple(meta))
+
+        if a != b:
+            self._extra.setdefault(b, []).append((a, w) + tuple(meta))
+
+        for n in (a, b):
+            if n not in self.base.nodes:
+                self._extra_nodes.add(n)
+
+        self._touch()
+
+        return True
+
+    # Mesmos sorteios e mesmas alterações de MusicGraph.apply_negative_fraction
+    def apply_negative_fraction(self, negative_shift: float = 0.6, negative_fraction: float = 0.03, seed: Optional[int] = 12345) -> None:
+        for (a, b) in sample_negative_edges(self.adj, negative_fraction, seed):
+            w = self.weight(a, b)
+
+            if w is not None:
+                self._set_weight(a, b, w - negative_shift)
+
+        self._touch()
+
+    # Mesmos sorteios e mesmas alterações de MusicGraph.inject_negative_cycle
+    def inject_negative_cycle(self, cycle_size: int = 3, cycle_edge_weight: float = -0.8, seed: Optional[int] = 12345) -> List[Node]:
+        chosen = sample_cycle_nodes(self.nodes, cycle_size, seed)
+        norm = [self._normalize_name(x) for x in chosen]
+
+        for i in range(cycle_size):
+            self._put_edge(norm[i], norm[(i + 1) % cycle_size], float(cycle_edge_weight))
+
+        self._touch()
+
+        return norm
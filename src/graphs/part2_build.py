@@ -1,10 +1,18 @@
-from typing import Dict, Set, Tuple
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
 from itertools import combinations
 from pathlib import Path
 import pandas as pd
 import random
 import math
 import ast
+import csv
+import os
+
+import numpy as np
+
+from src.graphs.part2_similarity import SIMILARITY_WEIGHTS, SimilarityEngine, genre_bitsets, knn_pairs
 
 def _parse_list_string(val):
     if val is None:
@@ -62,17 +70,7 @@ def _year_from_date(s):
 
 def compute_similarity(meta_a, meta_b, globals_, weights=None):
     if weights is None:
-        weights = {
-            "genre": 4.0,
-            "same_artist": 3.0,
-            "same_album": 2.0,
-            "track_pop": 1.0,
-            "artist_pop": 0.5,
-            "followers": 0.5,
-            "duration": 0.3,
-            "recency": 0.5,
-            "explicit": 0.3
-        }
+        weights = SIMILARITY_WEIGHTS
 
     # Gêneros em comum (Jaccard)
     genres_a = set([g.lower() for g in (meta_a.get("genres") or [])])
@@ -142,59 +140,15 @@ def compute_similarity(meta_a, meta_b, globals_, weights=None):
 
     return S, comps
 
-def build_edges_from_spotify(
-    spotify_filtered_csv: str | Path = "data/spotify_filtered.csv",
-    out_edges_csv: str | Path = "data/parte2_adjacencias.csv",
-    node_col: str = "track_name",
-    genres_col: str = "genres_list",
-    verbose: bool = True,
-    negative_shift: float = 0.0,
-    negative_fraction: float = 0.0,
-    make_negative_cycle: bool = False,
-    negative_cycle_size: int = 3,
-    cycle_edge_weight: float = -0.5,
-    random_seed: int = 42,
-    persist_negative: bool = False
-):
-    spotify_p = Path(spotify_filtered_csv)
-  
-    if not spotify_p.exists():
-        raise FileNotFoundError(f"Arquivo não encontrado: {spotify_p}")
-
-    df = pd.read_csv(spotify_p, dtype=str, encoding="utf-8-sig", keep_default_na=False)
-
-    # Filtrar pelas músicas de Ariana Grande, apenas
-    df = df[df["artist_name"].str.strip().str.lower() == "ariana grande"]
-
-    if node_col not in df.columns:
-        raise KeyError(f"Coluna de nó '{node_col}' não encontrada no CSV.")
-    if genres_col not in df.columns:
-        raise KeyError(f"Coluna de gêneros '{genres_col}' não encontrada no CSV.")
-
-    tracks = []
-
-    for _, r in df.iterrows():
-        track = str(r[node_col]).strip()
-        raw_genres = r.get(genres_col)
-        genres = _parse_list_string(raw_genres)
-
-        if not genres:
-            continue
-
-        tracks.append((track, genres))
-
-    genre_map: Dict[str, list] = {}
-
-    for track, genres in tracks:
-        for g in genres:
-            genre_map.setdefault(g, []).append(track)
-
-    if verbose:
-        total_tracks = len(tracks)
-        total_genres = len(genre_map)
-        print(f"[build_edges] tracks com gênero: {total_tracks}")
-        print(f"[build_edges] gêneros distintos: {total_genres}")
+# Geração de candidatos (pares de faixas que viram arestas):
+#   "genre"  todos os pares de faixas que dividem um gênero (combinations por gênero; com
+#            um gênero que cobre quase tudo, como pop, é quadrático no catálogo)
+#   "knn"    para cada faixa, as top_k mais similares entre as que dividem ao menos um
+#            gênero (e/ou todas com score >= min_sim), por busca exata em blocos no motor
+#            de similaridade; o grafo fica com no máximo top_k arestas escolhidas por faixa
+CANDIDATE_MODES = ("genre", "knn")
 
+def _genre_candidates(genre_map: Dict[str, list]) -> Dict[Tuple[str, str], Set[str]]:
     edge_map: Dict[Tuple[str, str], Set[str]] = {}
 
     for g, tlist in genre_map.items():
@@ -214,12 +168,37 @@ def build_edges_from_spotify(
 
             edge_map[key].add(g)
 
+    return edge_map
+
+# Pares (a, b) com a <= b, gêneros em comum e scores; ordenados pela primeira aparição das faixas
+def _knn_candidates(engine: SimilarityEngine, tracks: List[Tuple[str, List[str]]], top_k: Optional[int], min_sim: Optional[float], workers: Optional[int] = None) -> Tuple[List[Tuple[str, str]], List[Set[str]], np.ndarray]:
+    genres_of: Dict[str, Set[str]] = {}
+
+    for track, genres in tracks:
+        genres_of.setdefault(track, set()).update(genres)
+
+    names = list(genres_of)
+    bits, _ = genre_bitsets([genres_of[n] for n in names])
+    p, q, sims = knn_pairs(engine, engine.lookup(names), bits, top_k=top_k, min_sim=min_sim, workers=workers)
+
+    pairs = []
+    commons = []
+
+    for i, j in zip(p.tolist(), q.tolist()):
+        a, b = names[i], names[j]
+        pairs.append((a, b) if a <= b else (b, a))
+        commons.append(genres_of[a] & genres_of[b])
+
+    return pairs, commons, sims
+
+# Metadados por faixa (a última linha de cada nome vence) e os normalizadores globais
+def _track_meta_from_df(df: pd.DataFrame, node_col: str, genres_col: str) -> Tuple[Dict[str, dict], Dict[str, Any]]:
     track_meta: Dict[str, dict] = {}
     all_followers = []
     all_durations = []
     all_years = []
 
-    for _, r in df.iterrows():
+    for r in df.to_dict("records"):
         track = str(r.get(node_col, "")).strip()
 
         if not track:
@@ -264,98 +243,373 @@ def build_edges_from_spotify(
         "max_year_diff": (max(all_years) - min(all_years)) if all_years else 1
     }
 
-    edge_weights: Dict[Tuple[str, str], dict] = {}
+    return track_meta, globals_
 
-    for (a, b), genres_set in edge_map.items():
-        common = sorted(genres_set)
-        n_common = len(common)
-        meta_a = track_meta.get(a, {})
-        meta_b = track_meta.get(b, {})
+# CSV filtrado, só com as faixas de `artist` (Ariana Grande por padrão; None = catálogo todo)
+def _read_spotify_df(spotify_filtered_csv: str | Path, node_col: str, genres_col: str, artist: Optional[str]) -> pd.DataFrame:
+    spotify_p = Path(spotify_filtered_csv)
+  
+    if not spotify_p.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {spotify_p}")
 
-        S, comps = compute_similarity(meta_a, meta_b, globals_)
-        peso = 1.0 - S
+    df = pd.read_csv(spotify_p, dtype=str, encoding="utf-8-sig", keep_default_na=False)
 
-        edge_weights[(a, b)] = {
-            "common_genres": ";".join(common),
-            "n_common": n_common,
-            "sim": S,
-            "peso": float(peso),
-            "comps": comps
-        }
+    if artist is not None:
+        df = df[df["artist_name"].str.strip().str.lower() == artist.strip().lower()]
 
-    random.seed(random_seed)
+    if node_col not in df.columns:
+        raise KeyError(f"Coluna de nó '{node_col}' não encontrada no CSV.")
+    if genres_col not in df.columns:
+        raise KeyError(f"Coluna de gêneros '{genres_col}' não encontrada no CSV.")
 
-    if persist_negative and negative_shift > 0.0 and negative_fraction > 0.0 and len(edge_weights) > 0:
-        k = max(1, int(len(edge_weights) * float(negative_fraction)))
-        keys = list(edge_weights.keys())
-        chosen = random.sample(keys, k)
+    return df
 
-        if verbose:
-            print(f"[build_edges] aplicando negative_shift={negative_shift} em {len(chosen)} arestas ({negative_fraction*100:.2f}%)")
+# (faixa, gêneros) de cada linha com ao menos um gênero, na ordem do CSV
+def _tracks_from_df(df: pd.DataFrame, node_col: str, genres_col: str) -> List[Tuple[str, List[str]]]:
+    tracks = []
 
-        for key in chosen:
-            edge_weights[key]["peso"] = edge_weights[key]["peso"] - float(negative_shift)
+    for r in df.to_dict("records"):
+        track = str(r[node_col]).strip()
+        raw_genres = r.get(genres_col)
+        genres = _parse_list_string(raw_genres)
 
-    if persist_negative and make_negative_cycle:
-        available_tracks = list(track_meta.keys())
+        if not genres:
+            continue
 
+        tracks.append((track, genres))
+
+    return tracks
+
+EDGE_COLUMNS = ["track_a", "track_b", "common_genres", "n_common", "peso", "sim"]
+
+# Linhas por pedaço escrito no modo stream e custo estimado de uma linha em memória (tupla,
+# strings e vetores temporários do motor), usado para converter max_memory_mb em linhas
+STREAM_CHUNK_ROWS = 50_000
+STREAM_ROW_BYTES = 512
+
+# Com workers=None os pedaços só vão para processos a partir de tantos candidatos; abaixo
+# disso subir o pool custa mais que pontuar tudo no processo principal
+MIN_PARALLEL_PAIRS = 200_000
+
+# Sorteios de arestas negativas e do ciclo negativo, feitos antes de calcular os pesos.
+#
+# random.sample(keys, k) só depende de len(keys): sortear posições em range(n) escolhe as
+# mesmas arestas, então o plano não precisa das arestas prontas. shift_at são as posições
+# que perdem negative_shift; cycle_at as posições de arestas existentes que viram arestas do
+# ciclo; cycle_extra as arestas novas do ciclo, escritas depois de todas as outras.
+def _negative_plan(
+    pairs: List[Tuple[str, str]],
+    available_tracks: List[str],
+    random_seed: int,
+    persist_negative: bool,
+    negative_shift: float,
+    negative_fraction: float,
+    make_negative_cycle: bool,
+    negative_cycle_size: int,
+    cycle_edge_weight: float,
+    verbose: bool,
+) -> Dict[str, Any]:
+    plan: Dict[str, Any] = {"shift": float(negative_shift), "shift_at": set(), "cycle_weight": float(cycle_edge_weight), "cycle_at": set(), "cycle_extra": []}
+
+    # gerador próprio: mesma sequência de random.seed(random_seed), sem mexer no estado global
+    rng = random.Random(random_seed)
+
+    if persist_negative and negative_shift > 0.0 and negative_fraction > 0.0 and len(pairs) > 0:
+        k = max(1, int(len(pairs) * float(negative_fraction)))
+        plan["shift_at"] = set(rng.sample(range(len(pairs)), k))
+
+        if verbose:
+            print(f"[build_edges] aplicando negative_shift={negative_shift} em {k} arestas ({negative_fraction*100:.2f}%)")
+
+    if persist_negative and make_negative_cycle:
         if len(available_tracks) < negative_cycle_size:
             raise ValueError("Não há tracks suficientes para construir ciclo negativo do tamanho solicitado.")
-        
-        cycle_nodes = random.sample(available_tracks, negative_cycle_size)
+
+        cycle_nodes = rng.sample(available_tracks, negative_cycle_size)
 
         if verbose:
             print(f"[build_edges] criando ciclo negativo com nodes: {cycle_nodes} e peso por aresta {cycle_edge_weight}")
-        
+
+        keys = []
+
         for i in range(len(cycle_nodes)):
             a = cycle_nodes[i]
             b = cycle_nodes[(i + 1) % len(cycle_nodes)]
-            key = (a, b) if a <= b else (b, a)
+            keys.append((a, b) if a <= b else (b, a))
+
+        wanted = set(keys)
+        pos = {key: i for i, key in enumerate(pairs) if key in wanted}
+
+        for key in keys:
+            if key in pos:
+                plan["cycle_at"].add(pos[key])
+            elif key not in plan["cycle_extra"]:
+                plan["cycle_extra"].append(key)
+
+    return plan
+
+# Linhas das arestas lo..lo+len(block)-1; sims=None calcula os scores do pedaço no motor.
+# Os gêneros em comum chegam como conjuntos ou listas e saem ordenados.
+def _edge_rows(
+    engine: SimilarityEngine,
+    lo: int,
+    block: List[Tuple[str, str]],
+    commons: List[Any],
+    sims: Optional[np.ndarray],
+    plan: Dict[str, Any],
+    allow_negative: bool,
+) -> List[tuple]:
+    epsilon = 1e-6
+    shift = plan["shift"]
+    shift_at = plan["shift_at"]
+    cycle_at = plan["cycle_at"]
+    cycle_weight = plan["cycle_weight"]
 
-            if key in edge_weights:
-                edge_weights[key]["peso"] = float(cycle_edge_weight)
-                edge_weights[key]["common_genres"] = edge_weights[key].get("common_genres", "")
-                edge_weights[key]["n_common"] = edge_weights[key].get("n_common", 0)
-                edge_weights[key]["sim"] = edge_weights[key].get("sim", 0.0)
-            else:
-                edge_weights[key] = {
-                    "common_genres": "",
-                    "n_common": 0,
-                    "sim": 0.0,
-                    "peso": float(cycle_edge_weight),
-                    "comps": {}
-                }
+    if sims is None:
+        S_block = engine.similarity(engine.lookup([a for a, _ in block]), engine.lookup([b for _, b in block])).tolist()
+    else:
+        S_block = sims.tolist()
 
     rows = []
-    epsilon = 1e-6
-    allow_negative = persist_negative
 
-    for (a, b), info in edge_weights.items():
-        peso = float(info["peso"])
+    for i, ((a, b), common, S) in enumerate(zip(block, commons, S_block), start=lo):
+        peso = float(1.0 - S)
+
+        if i in shift_at:
+            peso = peso - shift
+
+        if i in cycle_at:
+            peso = cycle_weight
 
         if not allow_negative and peso < epsilon:
             peso = epsilon
-        
-        rows.append({
-            "track_a": a,
-            "track_b": b,
-            "common_genres": info.get("common_genres", ""),
-            "n_common": info.get("n_common", 0),
-            "peso": round(float(peso), 6),
-            "sim": round(float(info.get("sim", 0.0)), 6)
-        })
-
-    out_df = pd.DataFrame(rows, columns=["track_a", "track_b", "common_genres", "n_common", "peso", "sim"])
+
+        common = sorted(common)
+        rows.append((a, b, ";".join(common), len(common), round(float(peso), 6), round(float(S), 6)))
+
+    return rows
+
+# Arestas do ciclo negativo que não eram candidatas (sem gêneros em comum, sim 0)
+def _cycle_extra_rows(plan: Dict[str, Any]) -> List[tuple]:
+    return [(a, b, "", 0, round(plan["cycle_weight"], 6), 0.0) for a, b in plan["cycle_extra"]]
+
+# Motor, plano e allow_negative usados pelos processos de _edge_row_chunks (preenchidos por _init_edge_worker)
+_WORKER_EDGES: Optional[Tuple[SimilarityEngine, Dict[str, Any], bool]] = None
+
+def _init_edge_worker(engine: SimilarityEngine, plan: Dict[str, Any], allow_negative: bool) -> None:
+    global _WORKER_EDGES
+    _WORKER_EDGES = (engine, plan, allow_negative)
+
+def _edge_rows_worker(lo: int, block: List[Tuple[str, str]], commons: List[Any], sims: Optional[np.ndarray]) -> List[tuple]:
+    engine, plan, allow_negative = _WORKER_EDGES
+
+    return _edge_rows(engine, lo, block, commons, sims, plan, allow_negative)
+
+# Linhas do CSV de arestas em pedaços de chunk_rows, na ordem dos candidatos; os scores
+# (quando não vêm prontos da busca knn) são calculados pedaço a pedaço pelo motor.
+#
+# Com workers > 1 os pedaços são pontuados em processos e devolvidos na ordem em que foram
+# enviados, com no máximo 2 × workers pedaços em voo (até 2 × workers × chunk_rows linhas
+# em memória; build_edges_from_spotify divide max_memory_mb por isso). Cada pedaço só depende das suas posições e do plano de negativas, sorteado
+# antes no processo principal, então a saída é a mesma para qualquer número de workers.
+def _edge_row_chunks(
+    engine: SimilarityEngine,
+    pairs: List[Tuple[str, str]],
+    commons: List[Any],
+    sims: Optional[np.ndarray],
+    plan: Dict[str, Any],
+    allow_negative: bool,
+    chunk_rows: int,
+    workers: int = 1,
+) -> Iterator[List[tuple]]:
+    def _args(lo: int) -> tuple:
+        hi = min(len(pairs), lo + chunk_rows)
+
+        return lo, pairs[lo:hi], commons[lo:hi], (None if sims is None else sims[lo:hi])
+
+    starts = range(0, len(pairs), chunk_rows)
+
+    if workers <= 1 or len(starts) <= 1:
+        for lo in starts:
+            yield _edge_rows(engine, *_args(lo), plan, allow_negative)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_edge_worker, initargs=(engine, plan, allow_negative)) as ex:
+            pending: Deque[Future] = deque()
+
+            for lo in starts:
+                pending.append(ex.submit(_edge_rows_worker, *_args(lo)))
+
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+    if plan["cycle_extra"]:
+        yield _cycle_extra_rows(plan)
+
+class _CsvEdgeWriter:
+    # Mesmo arquivo que DataFrame.to_csv(index=False, encoding="utf-8-sig") geraria
+    def __init__(self, path: Path):
+        self._f = open(path, "w", encoding="utf-8-sig", newline="")
+        self._w = csv.writer(self._f, lineterminator=os.linesep)
+        self._w.writerow(EDGE_COLUMNS)
+
+    def write(self, rows: List[tuple]) -> None:
+        self._w.writerows(rows)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "_CsvEdgeWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class _ParquetEdgeWriter(_CsvEdgeWriter):
+    def __init__(self, path: Path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("saída Parquet precisa do pyarrow (pip install pyarrow)") from e
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("track_a", pa.string()), ("track_b", pa.string()), ("common_genres", pa.string()),
+            ("n_common", pa.int64()), ("peso", pa.float64()), ("sim", pa.float64()),
+        ])
+        self._w = pq.ParquetWriter(str(path), self._schema)
+
+    def write(self, rows: List[tuple]) -> None:
+        if rows:
+            cols = list(zip(*rows))
+            self._w.write_table(self._pa.Table.from_arrays([self._pa.array(c, type=f.type) for c, f in zip(cols, self._schema)], schema=self._schema))
+
+    def close(self) -> None:
+        self._w.close()
+
+# .parquet/.pq viram Parquet (pyarrow); qualquer outra extensão, CSV
+def _open_edge_writer(path: Path) -> _CsvEdgeWriter:
+    if path.suffix.lower() in (".parquet", ".pq"):
+        return _ParquetEdgeWriter(path)
+
+    return _CsvEdgeWriter(path)
+
+# Gera o arquivo de arestas do catálogo (CSV, ou Parquet se out_edges_csv terminar em
+# .parquet/.pq). Com stream=True as linhas são escritas em pedaços de chunk_rows e a função
+# devolve só o caminho; sem stream ela devolve também o DataFrame com todas as linhas.
+#
+# max_memory_mb é um orçamento para os pedaços de linhas em memória (convertido em linhas
+# por STREAM_ROW_BYTES e dividido entre os 2 × workers pedaços em voo para dar chunk_rows),
+# não um limite do processo: a lista de pares candidatos,
+# os metadados das faixas e, sem stream, o DataFrame final ficam fora dele.
+def build_edges_from_spotify(
+    spotify_filtered_csv: str | Path = "data/spotify_filtered.csv",
+    out_edges_csv: str | Path = "data/parte2_adjacencias.csv",
+    node_col: str = "track_name",
+    genres_col: str = "genres_list",
+    verbose: bool = True,
+    negative_shift: float = 0.0,
+    negative_fraction: float = 0.0,
+    make_negative_cycle: bool = False,
+    negative_cycle_size: int = 3,
+    cycle_edge_weight: float = -0.5,
+    random_seed: int = 42,
+    persist_negative: bool = False,
+    artist: Optional[str] = "ariana grande",
+    candidates: str = "genre",
+    top_k: Optional[int] = 10,
+    min_sim: Optional[float] = None,
+    stream: bool = False,
+    chunk_rows: Optional[int] = None,
+    max_memory_mb: Optional[float] = None,
+    workers: Optional[int] = None
+):
+    if candidates not in CANDIDATE_MODES:
+        raise ValueError(f"candidates inválido: {candidates} (use {', '.join(CANDIDATE_MODES)})")
+
+    if candidates == "knn" and top_k is None and min_sim is None:
+        raise ValueError("candidates='knn' precisa de top_k e/ou min_sim")
+
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k deve ser >= 1")
+
+    df = _read_spotify_df(spotify_filtered_csv, node_col, genres_col, artist)
+    tracks = _tracks_from_df(df, node_col, genres_col)
+
+    genre_map: Dict[str, list] = {}
+
+    for track, genres in tracks:
+        for g in genres:
+            genre_map.setdefault(g, []).append(track)
+
+    if verbose:
+        total_tracks = len(tracks)
+        total_genres = len(genre_map)
+        print(f"[build_edges] tracks com gênero: {total_tracks}")
+        print(f"[build_edges] gêneros distintos: {total_genres}")
+
+    track_meta, globals_ = _track_meta_from_df(df, node_col, genres_col)
+    engine = SimilarityEngine(track_meta, globals_)
+
+    if candidates == "genre":
+        edge_map = _genre_candidates(genre_map)
+        pairs = list(edge_map)
+        commons = list(edge_map.values())
+        sims = None
+        del edge_map
+    else:
+        pairs, commons, sims = _knn_candidates(engine, tracks, top_k, min_sim, workers)
+
+    if verbose:
+        print(f"[build_edges] candidatos ({candidates}): {len(pairs)}")
+
+    plan = _negative_plan(
+        pairs, list(track_meta.keys()), random_seed, persist_negative,
+        negative_shift, negative_fraction, make_negative_cycle, negative_cycle_size, cycle_edge_weight, verbose
+    )
+
+    budget_rows = None if max_memory_mb is None else max(1, int(max_memory_mb * 2**20 / STREAM_ROW_BYTES))
+
+    if workers is None:
+        n_chunks = -(-len(pairs) // (chunk_rows or budget_rows or STREAM_CHUNK_ROWS))
+        workers = min(os.cpu_count() or 1, n_chunks) if len(pairs) >= MIN_PARALLEL_PAIRS else 1
+
+    if chunk_rows is None:
+        # com workers > 1 até 2 × workers pedaços ficam em memória ao mesmo tempo
+        in_flight = 2 * workers if workers > 1 else 1
+        chunk_rows = STREAM_CHUNK_ROWS if budget_rows is None else max(1, budget_rows // in_flight)
+
+    chunks = _edge_row_chunks(engine, pairs, commons, sims, plan, persist_negative, chunk_rows, workers)
     out_path = Path(out_edges_csv)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_df.to_csv(out_path, index=False, encoding="utf-8-sig")
+
+    if stream:
+        n_rows = 0
+
+        with _open_edge_writer(out_path) as writer:
+            for rows in chunks:
+                writer.write(rows)
+                n_rows += len(rows)
+    else:
+        rows = [r for chunk in chunks for r in chunk]
+        out_df = pd.DataFrame(rows, columns=EDGE_COLUMNS)
+        n_rows = len(out_df)
+
+        if out_path.suffix.lower() in (".parquet", ".pq"):
+            with _open_edge_writer(out_path) as writer:
+                writer.write(rows)
+        else:
+            out_df.to_csv(out_path, index=False, encoding="utf-8-sig")
 
     if verbose:
-        print(f"[build_edges] arestas únicas geradas: {len(out_df)}")
+        print(f"[build_edges] arestas únicas geradas: {n_rows}")
         print(f"[build_edges] arquivo salvo em: {out_path.resolve()}")
         if persist_negative and negative_shift > 0.0 and negative_fraction > 0.0:
             print(f"[build_edges] (atenção) pesos negativos foram gerados para {negative_fraction*100:.2f}% das arestas.")
         if persist_negative and make_negative_cycle:
             print(f"[build_edges] (atenção) ciclo negativo criado (tamanho {negative_cycle_size}).")
 
-    return out_df
+    return out_path if stream else out_df
@@ -0,0 +1,328 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from pathlib import Path
+import hashlib
+import json
+import csv
+import io
+import os
+
+import pandas as pd
+
+from src.graphs.music_graph import MusicGraph
+from src.graphs.part2_build import (
+    EDGE_COLUMNS, SIMILARITY_WEIGHTS, SimilarityEngine, _edge_rows, _read_spotify_df, _track_meta_from_df,
+    _tracks_from_df, build_edges_from_spotify,
+)
+
+# Atualização incremental de parte2_adjacencias.csv quando spotify_filtered.csv muda.
+#
+# Ao lado do CSV de arestas fica um manifesto (<nome>.manifest.json) com um hash do
+# conteúdo de cada linha do catálogo (só as colunas que entram no score), agrupados por
+# faixa na ordem do CSV, os normalizadores globais (max_followers, max_duration_diff,
+# max_year_diff), os parâmetros da construção e o hash do próprio CSV de arestas.
+#
+# Uma faixa mudou quando a sua lista de hashes mudou (linha nova, removida ou alterada; a
+# ordem conta porque a última linha de cada nome é a que vale). Com os normalizadores
+# iguais, o score de um par só depende das duas faixas, então só os pares com alguma ponta
+# alterada são recalculados: as linhas antigas dessas faixas saem, as novas entram (no
+# lugar da antiga quando o par continua existindo, no fim do arquivo quando é novo) e as
+# demais linhas são copiadas como estão. O conjunto de arestas e os valores ficam iguais
+# aos de uma reconstrução completa; só a ordem das linhas pode diferir.
+#
+# A reconstrução completa (build_edges_from_spotify) é usada quando não há manifesto, o CSV
+# de arestas foi alterado por fora, os parâmetros ou os normalizadores mudaram, ou a
+# construção não é local aos pares: persist_negative (sorteios sobre as posições de todas
+# as arestas), candidates="knn" (os vizinhos de uma faixa dependem de todas as outras) e
+# saída Parquet.
+
+MANIFEST_VERSION = 1
+
+# Colunas do catálogo que entram nas arestas (além da coluna do nó e a dos gêneros)
+SCORE_COLUMNS = (
+    "track_popularity", "artist_popularity", "artist_followers", "track_duration_ms",
+    "album_release_date", "artist_name", "album_id", "explicit",
+)
+
+# Parâmetros de build_edges_from_spotify que não mudam o conteúdo do CSV
+_OUTPUT_NEUTRAL = ("verbose", "stream", "chunk_rows", "max_memory_mb", "workers")
+
+_NO_NEGATIVES: Dict[str, Any] = {"shift": 0.0, "shift_at": set(), "cycle_weight": 0.0, "cycle_at": set(), "cycle_extra": []}
+
+def manifest_path(out_edges_csv: str | Path) -> Path:
+    p = Path(out_edges_csv)
+
+    return p.with_name(p.stem + ".manifest.json")
+
+def _file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+
+    return h.hexdigest()
+
+# Hashes das linhas agrupados por faixa (nome como em build_edges_from_spotify), na ordem do CSV
+def row_hashes(df: pd.DataFrame, node_col: str, genres_col: str) -> Dict[str, List[str]]:
+    cols = [node_col, genres_col] + [c for c in SCORE_COLUMNS if c in df.columns]
+    out: Dict[str, List[str]] = {}
+
+    for row in df[cols].itertuples(index=False, name=None):
+        digest = hashlib.blake2b("\x1f".join(map(str, row)).encode("utf-8"), digest_size=8).hexdigest()
+        out.setdefault(str(row[0]).strip(), []).append(digest)
+
+    return out
+
+def _params(node_col: str, genres_col: str, artist: Optional[str], build_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    params = {k: v for k, v in build_kwargs.items() if k not in _OUTPUT_NEUTRAL}
+    params.update({"node_col": node_col, "genres_col": genres_col, "artist": artist, "weights": SIMILARITY_WEIGHTS})
+
+    return json.loads(json.dumps(params, sort_keys=True))
+
+def _write_json(path: Path, obj: Any) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+
+    os.replace(tmp, path)
+
+def _read_manifest(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            m = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    return m if isinstance(m, dict) and m.get("version") == MANIFEST_VERSION else None
+
+# Motivo para reconstruir tudo (None quando dá para atualizar só os pares afetados)
+def _full_rebuild_reason(out_p: Path, manifest: Optional[Dict[str, Any]], params: Dict[str, Any], globals_: Dict[str, Any], build_kwargs: Dict[str, Any]) -> Optional[str]:
+    if build_kwargs.get("persist_negative"):
+        return "persist_negative"
+
+    if build_kwargs.get("candidates", "genre") != "genre":
+        return "candidates=" + str(build_kwargs["candidates"])
+
+    if out_p.suffix.lower() in (".parquet", ".pq"):
+        return "parquet output"
+
+    if manifest is None:
+        return "no manifest"
+
+    if not out_p.exists() or manifest.get("edges_sha1") != _file_sha1(out_p):
+        return "edges CSV changed outside the manifest"
+
+    if manifest.get("params") != params:
+        return "build parameters changed"
+
+    if manifest.get("globals") != globals_:
+        return "global normalizers changed"
+
+    return None
+
+# Linhas do CSV de arestas como (texto original, campos); só as que têm aspas passam pelo
+# parser de CSV (o texto é copiado como está para as linhas que não mudam)
+def _edge_lines(path: Path) -> Iterator[Tuple[str, List[str]]]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        next(f, None)
+        buf = ""
+
+        for line in f:
+            buf += line
+
+            # campo entre aspas com quebra de linha: a linha continua na próxima
+            if buf.count('"') % 2:
+                continue
+
+            if '"' in buf:
+                fields = next(csv.reader(io.StringIO(buf)))
+            else:
+                fields = buf.rstrip("\r\n").split(",")
+
+            yield buf, fields
+            buf = ""
+
+# Copia o CSV antigo trocando/removendo as linhas que tocam faixas alteradas; os pares
+# novos vão para o fim, em ordem. Devolve (pares removidos, linhas novas ou atualizadas).
+def _patch_edges_csv(out_p: Path, changed: Set[str], new_rows: Dict[Tuple[str, str], tuple]) -> Tuple[List[Tuple[str, str]], List[tuple]]:
+    pending = dict(new_rows)
+    removed: List[Tuple[str, str]] = []
+    upserted: List[tuple] = []
+    tmp = out_p.with_name(out_p.name + ".tmp")
+
+    with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f, lineterminator=os.linesep)
+        w.writerow(EDGE_COLUMNS)
+
+        for raw, row in _edge_lines(out_p):
+            a, b = row[0], row[1]
+
+            if a not in changed and b not in changed:
+                f.write(raw)
+                continue
+
+            new = pending.pop((a, b), None)
+
+            if new is None:
+                removed.append((a, b))
+            elif tuple(row) == tuple(map(str, new)):
+                f.write(raw)
+            else:
+                w.writerow(new)
+                upserted.append(new)
+
+        for key in sorted(pending):
+            w.writerow(pending[key])
+            upserted.append(pending[key])
+
+    os.replace(tmp, out_p)
+
+    return removed, upserted
+
+def _genre_key(graph: MusicGraph, a: str, b: str) -> Tuple[str, str]:
+    return (graph._normalize_name(a), graph._normalize_name(b))
+
+# Aplica no grafo as arestas removidas e as novas/atualizadas (mesmos pesos e gêneros que
+# load_from_edges_csv leria). Os nós de gone e as pontas das arestas removidas que ficaram
+# sem arestas saem do grafo (uma faixa inalterada perde a última aresta quando o vizinho sai)
+def _patch_graph(graph: MusicGraph, removed: List[Tuple[str, str]], upserted: List[tuple], gone: Iterable[str]) -> None:
+    gone = set(gone)
+    genres = getattr(graph, "_edge_genres", None)
+
+    if genres is None:
+        genres = graph._edge_genres = {}
+
+    for a, b in removed:
+        graph.remove_edge(a, b)
+        ka, kb = _genre_key(graph, a, b)
+        genres.pop((ka, kb), None)
+        genres.pop((kb, ka), None)
+        gone.update((a, b))
+
+    for a, b, common, _, peso, _ in upserted:
+        if not graph.set_weight(a, b, peso):
+            graph.add_edge(a, b, peso)
+
+        ka, kb = _genre_key(graph, a, b)
+        genres.pop((kb, ka), None)
+        genres[(ka, kb)] = str(common).strip()
+
+    for n in gone:
+        if graph.has_node(n) and graph.degree(n) == 0:
+            graph.remove_node(n)
+
+# Deixa o grafo com exatamente as arestas do CSV (depois de uma reconstrução completa)
+def _sync_graph(graph: MusicGraph, out_p: Path) -> None:
+    rows = {}
+
+    for _, r in _edge_lines(out_p):
+        rows[_genre_key(graph, r[0], r[1])] = (r[0], r[1], r[2], r[3], float(r[4]), r[5])
+
+    wanted = {(a, b) if a <= b else (b, a) for a, b in rows}
+    removed = [(e["track_a"], e["track_b"]) for e in graph.iter_edges() if (e["track_a"], e["track_b"]) not in wanted]
+    endpoints = {n for key in rows for n in key}
+
+    _patch_graph(graph, removed, list(rows.values()), [n for n in graph.nodes_list() if n not in endpoints])
+
+# Atualiza out_edges_csv (e o MusicGraph `graph`, se dado) a partir do catálogo atual.
+# build_kwargs são os mesmos de build_edges_from_spotify e valem para a reconstrução
+# completa. Devolve um resumo: mode ("incremental", "full" ou "unchanged"), o motivo da
+# reconstrução completa, as faixas novas/removidas/alteradas e as arestas mexidas.
+def update_edges_from_spotify(
+    spotify_filtered_csv: str | Path = "data/spotify_filtered.csv",
+    out_edges_csv: str | Path = "data/parte2_adjacencias.csv",
+    graph: Optional[MusicGraph] = None,
+    node_col: str = "track_name",
+    genres_col: str = "genres_list",
+    artist: Optional[str] = "ariana grande",
+    verbose: bool = True,
+    **build_kwargs: Any
+) -> Dict[str, Any]:
+    out_p = Path(out_edges_csv)
+    man_p = manifest_path(out_p)
+    df = _read_spotify_df(spotify_filtered_csv, node_col, genres_col, artist)
+    hashes = row_hashes(df, node_col, genres_col)
+    track_meta, globals_ = _track_meta_from_df(df, node_col, genres_col)
+    globals_ = json.loads(json.dumps(globals_))
+    params = _params(node_col, genres_col, artist, build_kwargs)
+    manifest = _read_manifest(man_p)
+    reason = _full_rebuild_reason(out_p, manifest, params, globals_, build_kwargs)
+
+    old_hashes: Dict[str, List[str]] = manifest.get("rows", {}) if manifest else {}
+    added = [n for n in hashes if n not in old_hashes]
+    removed_tracks = [n for n in old_hashes if n not in hashes]
+    modified = [n for n in hashes if n in old_hashes and hashes[n] != old_hashes[n]]
+    summary: Dict[str, Any] = {
+        "mode": "full" if reason else "incremental",
+        "reason": reason,
+        "tracks_added": len(added),
+        "tracks_removed": len(removed_tracks),
+        "tracks_changed": len(modified),
+        "edges_removed": 0,
+        "edges_upserted": 0,
+    }
+
+    if reason is not None:
+        if verbose:
+            print(f"[update_edges] reconstrução completa ({reason})")
+
+        build_edges_from_spotify(spotify_filtered_csv, out_p, node_col=node_col, genres_col=genres_col, artist=artist, verbose=verbose, **build_kwargs)
+
+        if graph is not None:
+            _sync_graph(graph, out_p)
+    else:
+        changed = set(added) | set(removed_tracks) | set(modified)
+
+        if not changed:
+            summary["mode"] = "unchanged"
+
+            if verbose:
+                print("[update_edges] catálogo sem alterações")
+
+            return summary
+
+        # gêneros por faixa (união das linhas) e faixas por gênero, como em _genre_candidates
+        genres_of: Dict[str, Set[str]] = {}
+        members: Dict[str, Set[str]] = {}
+
+        for track, genres in _tracks_from_df(df, node_col, genres_col):
+            genres_of.setdefault(track, set()).update(genres)
+
+            for g in genres:
+                members.setdefault(g, set()).add(track)
+
+        keys: Set[Tuple[str, str]] = set()
+
+        for c in changed & genres_of.keys():
+            for g in genres_of[c]:
+                for t in members[g]:
+                    if t != c:
+                        keys.add((c, t) if c <= t else (t, c))
+
+        pairs = sorted(keys)
+        engine = SimilarityEngine(track_meta, globals_)
+        rows = _edge_rows(engine, 0, pairs, [genres_of[a] & genres_of[b] for a, b in pairs], None, _NO_NEGATIVES, False)
+        removed_edges, upserted = _patch_edges_csv(out_p, changed, dict(zip(pairs, rows)))
+        summary["edges_removed"] = len(removed_edges)
+        summary["edges_upserted"] = len(upserted)
+
+        if graph is not None:
+            _patch_graph(graph, removed_edges, upserted, changed)
+
+        if verbose:
+            print(f"[update_edges] faixas: +{len(added)} -{len(removed_tracks)} ~{len(modified)}; pares recalculados: {len(pairs)}")
+            print(f"[update_edges] arestas removidas: {len(removed_edges)}, novas/atualizadas: {len(upserted)}")
+
+    _write_json(man_p, {
+        "version": MANIFEST_VERSION,
+        "params": params,
+        "globals": globals_,
+        "edges_sha1": _file_sha1(out_p),
+        "rows": hashes,
+    })
+
+    if verbose:
+        print(f"[update_edges] manifesto salvo em: {man_p.resolve()}")
+
+    return summary
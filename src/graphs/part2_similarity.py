@@ -0,0 +1,334 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+
+import numpy as np
+
+# Motor colunar de similaridade entre faixas (mesmos números de part2_build.compute_similarity).
+#
+# Os metadados de todas as faixas (o track_meta de build_edges_from_spotify) viram vetores
+# NumPy uma vez só: popularidades, seguidores, duração, ano, explícito, códigos inteiros de
+# artista/álbum e os gêneros como bitsets (uint64 por bloco de 64 gêneros). Um bloco de pares
+# (vetores de índices ia, ib) é pontuado de uma vez: o Jaccard dos gêneros sai de popcounts
+# de AND/OR dos bitsets e os outros oito componentes são aritmética elemento a elemento.
+#
+# Cada componente repete as operações de compute_similarity na mesma ordem (inclusive a soma
+# ponderada, componente por componente, e os clamps com o comportamento de min/max do Python
+# para NaN), então os scores batem com os da versão por par.
+#
+# A última posição das tabelas é uma faixa "sem metadados" (meta {} em compute_similarity),
+# usada para nomes que não estão em track_meta.
+
+SIMILARITY_WEIGHTS: Dict[str, float] = {
+    "genre": 4.0,
+    "same_artist": 3.0,
+    "same_album": 2.0,
+    "track_pop": 1.0,
+    "artist_pop": 0.5,
+    "followers": 0.5,
+    "duration": 0.3,
+    "recency": 0.5,
+    "explicit": 0.3
+}
+
+# Pares pontuados por bloco (limita os vetores temporários)
+SIMILARITY_BLOCK = 1 << 16
+
+# Pares (linha × faixa) avaliados por bloco na busca de vizinhos de knn_pairs
+CANDIDATE_BLOCK_PAIRS = 1 << 20
+
+# Código de artista/álbum ausente
+_MISSING = -1
+
+# max(0.0, min(1.0, x)) do Python, NaN incluído (min(1.0, nan) é 1.0)
+def _clamp01(x: np.ndarray) -> np.ndarray:
+    x = np.where(x < 1.0, x, 1.0)
+
+    return np.where(x > 0.0, x, 0.0)
+
+# math.log1p elemento a elemento: np.log1p (SIMD) às vezes difere de math.log1p no último
+# bit, e os scores têm de bater com os de compute_similarity. As diferenças de seguidores
+# se repetem muito (poucos artistas), então só os valores distintos passam pelo math.
+def _log1p(x: np.ndarray) -> np.ndarray:
+    uniq, inv = np.unique(x, return_inverse=True)
+
+    return np.array([math.log1p(v) for v in uniq.tolist()], dtype=np.float64)[inv.reshape(-1)]
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+
+    # numpy < 2.0: tabela de 256 entradas sobre os bytes
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+    return table[words.view(np.uint8)].sum(axis=1)
+
+# Uma linha de bits por conjunto de gêneros (bit g = gênero de id g no vocabulário)
+def genre_bitsets(genre_sets: Sequence[Iterable[str]], vocab: Optional[Dict[str, int]] = None) -> Tuple[np.ndarray, Dict[str, int]]:
+    vocab = {} if vocab is None else vocab
+    ids = [{vocab.setdefault(g, len(vocab)) for g in gs} for gs in genre_sets]
+    bits = np.zeros((len(ids), max(1, (len(vocab) + 63) // 64)), dtype=np.uint64)
+
+    for i, gids in enumerate(ids):
+        for g in gids:
+            bits[i, g >> 6] |= np.uint64(1 << (g & 63))
+
+    return bits, vocab
+
+class SimilarityEngine:
+    def __init__(self, track_meta: Dict[str, dict], globals_: Dict[str, Any], weights: Optional[Dict[str, float]] = None):
+        self.weights = dict(SIMILARITY_WEIGHTS if weights is None else weights)
+        self.names: List[str] = list(track_meta)
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+        self.missing = len(self.names)
+        rows = [track_meta[n] for n in self.names] + [{}]
+        n = len(rows)
+
+        self.genre_bits, self.genre_vocab = genre_bitsets([[g.lower() for g in (m.get("genres") or [])] for m in rows])
+
+        # artista: "" é um nome como outro qualquer; só a faixa sem metadados fica com _MISSING
+        artists: Dict[Any, int] = {}
+        self.artist = np.array([_MISSING if m.get("artist_name") is None else artists.setdefault(m["artist_name"], len(artists)) for m in rows], dtype=np.int64)
+
+        # álbum vazio nunca conta como "mesmo álbum"
+        albums: Dict[Any, int] = {}
+        self.album = np.array([albums.setdefault(m["album_id"], len(albums)) if m.get("album_id") else _MISSING for m in rows], dtype=np.int64)
+
+        self.track_pop = np.array([int(m.get("track_popularity", 0)) for m in rows], dtype=np.int64)
+        self.artist_pop = np.array([int(m.get("artist_popularity", 0)) for m in rows], dtype=np.int64)
+        self.followers = np.array([float(m.get("artist_followers", 0.0)) for m in rows], dtype=np.float64)
+        self.duration = np.array([float(m.get("duration_ms", 0.0)) for m in rows], dtype=np.float64)
+        self.has_year = np.array([m.get("album_year") is not None for m in rows], dtype=bool)
+        self.year = np.array([m.get("album_year") if m.get("album_year") is not None else 0 for m in rows], dtype=np.int64)
+        self.explicit = np.array([bool(m.get("explicit", False)) for m in rows], dtype=bool)
+
+        self.log_maxf = math.log1p(max(1.0, globals_.get("max_followers", 1.0)))
+        self.maxd = max(1.0, globals_.get("max_duration_diff", 1.0))
+        self.maxy = max(1.0, globals_.get("max_year_diff", 1.0))
+        self.den = sum(self.weights.values())
+
+    # Índices dos nomes (a faixa sem metadados para os desconhecidos)
+    def lookup(self, names: Sequence[str]) -> np.ndarray:
+        get = self.index.get
+        missing = self.missing
+
+        return np.fromiter((get(n, missing) for n in names), dtype=np.int64, count=len(names))
+
+    def components(self, ia: np.ndarray, ib: np.ndarray) -> Dict[str, np.ndarray]:
+        ba = self.genre_bits[ia]
+        bb = self.genre_bits[ib]
+        inter = _popcount(ba & bb)
+        union = _popcount(ba | bb)
+        genre = np.divide(inter, union, out=np.zeros(len(ia), dtype=np.float64), where=union > 0)
+
+        same_artist = (self.artist[ia] == self.artist[ib]).astype(np.float64)
+        album_a = self.album[ia]
+        same_album = ((album_a != _MISSING) & (album_a == self.album[ib])).astype(np.float64)
+
+        track_pop = 1.0 - (np.abs(self.track_pop[ia] - self.track_pop[ib]) / 100.0)
+        artist_pop = 1.0 - (np.abs(self.artist_pop[ia] - self.artist_pop[ib]) / 100.0)
+
+        followers = _clamp01(1.0 - (_log1p(np.abs(self.followers[ia] - self.followers[ib])) / self.log_maxf))
+        duration = _clamp01(1.0 - (np.abs(self.duration[ia] - self.duration[ib]) / self.maxd))
+
+        recency = _clamp01(1.0 - (np.abs(self.year[ia] - self.year[ib]) / self.maxy))
+        recency = np.where(self.has_year[ia] & self.has_year[ib], recency, 0.5)
+
+        explicit = np.where(self.explicit[ia] == self.explicit[ib], 1.0, 0.7)
+
+        return {
+            "genre": genre,
+            "same_artist": same_artist,
+            "same_album": same_album,
+            "track_pop": track_pop,
+            "artist_pop": artist_pop,
+            "followers": followers,
+            "duration": duration,
+            "recency": recency,
+            "explicit": explicit,
+        }
+
+    # Score S de cada par (ia[i], ib[i]), em blocos de SIMILARITY_BLOCK pares
+    def similarity(self, ia: np.ndarray, ib: np.ndarray, block: int = SIMILARITY_BLOCK) -> np.ndarray:
+        out = np.empty(len(ia), dtype=np.float64)
+
+        for lo in range(0, len(ia), block):
+            hi = min(len(ia), lo + block)
+            comps = self.components(ia[lo:hi], ib[lo:hi])
+            num = np.zeros(hi - lo, dtype=np.float64)
+
+            for k, c in comps.items():
+                num = num + self.weights[k] * c
+
+            out[lo:hi] = _clamp01(num / self.den) if self.den != 0 else 0.0
+
+        return out
+
+# Listas invertidas gênero -> faixas, tiradas das linhas de bits de knn_pairs.
+#
+# members[ptr[g]:ptr[g + 1]] são as posições das faixas do gênero g (crescentes) e
+# genres[gptr[t]:gptr[t + 1]] os gêneros da faixa t; reach[t] é a soma dos tamanhos das
+# listas dos gêneros de t (quantos pares, com repetição, a faixa gera antes da deduplicação).
+class GenrePostings:
+    def __init__(self, share_bits: np.ndarray):
+        n = share_bits.shape[0]
+        tracks: List[np.ndarray] = []
+        genres: List[np.ndarray] = []
+
+        for w in range(share_bits.shape[1]):
+            rows = np.nonzero(share_bits[:, w])[0]
+            words = share_bits[rows, w]
+
+            for bit in range(64):
+                hit = (words >> np.uint64(bit)) & np.uint64(1) != 0
+
+                if hit.any():
+                    tracks.append(rows[hit])
+                    genres.append(np.full(int(hit.sum()), w * 64 + bit, dtype=np.int64))
+
+        t = np.concatenate(tracks).astype(np.int64) if tracks else np.zeros(0, dtype=np.int64)
+        g = np.concatenate(genres) if genres else np.zeros(0, dtype=np.int64)
+        n_genres = int(g.max()) + 1 if len(g) else 0
+
+        by_genre = np.lexsort((t, g))
+        self.members = t[by_genre]
+        self.ptr = np.concatenate(([0], np.cumsum(np.bincount(g, minlength=n_genres)))).astype(np.int64)
+
+        by_track = np.lexsort((g, t))
+        self.genres = g[by_track]
+        self.gptr = np.concatenate(([0], np.cumsum(np.bincount(t, minlength=n)))).astype(np.int64)
+
+        sizes = np.diff(self.ptr)
+        self.reach = np.add.reduceat(sizes[self.genres], self.gptr[:-1]) if len(self.genres) else np.zeros(n, dtype=np.int64)
+        self.reach[np.diff(self.gptr) == 0] = 0
+
+    # Pares (linha, coluna) distintos, sem a diagonal, das linhas lo..hi-1 que dividem
+    # algum gênero; ordenados por linha e coluna
+    def pairs(self, lo: int, hi: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        g = self.genres[self.gptr[lo]:self.gptr[hi]]
+        rows = np.repeat(np.arange(lo, hi), np.diff(self.gptr[lo:hi + 1]))
+        lens = self.ptr[g + 1] - self.ptr[g]
+        total = int(lens.sum())
+
+        if total == 0:
+            empty = np.zeros(0, dtype=np.int64)
+
+            return empty, empty
+
+        # concatenação das listas dos gêneros de cada entrada (linha, gênero)
+        offs = np.cumsum(lens) - lens
+        pos = np.arange(total) - np.repeat(offs, lens) + np.repeat(self.ptr[g], lens)
+        keys = np.unique(np.repeat(rows, lens) * n + self.members[pos])
+        r = keys // n
+        c = keys % n
+        keep = r != c
+
+        return r[keep], c[keep]
+
+# Motor e listas invertidas usados pelos processos de knn_pairs (preenchidos por _init_knn_worker)
+_WORKER_KNN: Optional[Tuple[SimilarityEngine, np.ndarray, GenrePostings, Optional[int], Optional[float]]] = None
+
+def _init_knn_worker(engine: SimilarityEngine, idx: np.ndarray, postings: GenrePostings, top_k: Optional[int], min_sim: Optional[float]) -> None:
+    global _WORKER_KNN
+    _WORKER_KNN = (engine, idx, postings, top_k, min_sim)
+
+def _knn_rows_worker(bounds: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    return _knn_rows(*_WORKER_KNN[:3], bounds[0], bounds[1], *_WORKER_KNN[3:])
+
+# Pares escolhidos pelas linhas lo..hi-1 (posições p < q, sem ordem nem deduplicação).
+# Só os pares que dividem um gênero são pontuados; o ranking de cada linha é por score
+# decrescente com empate pela coluna, o mesmo de um argsort estável sobre a linha inteira.
+def _knn_rows(
+    engine: SimilarityEngine,
+    idx: np.ndarray,
+    postings: GenrePostings,
+    lo: int,
+    hi: int,
+    top_k: Optional[int],
+    min_sim: Optional[float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    p, q = postings.pairs(lo, hi, len(idx))
+    sims = engine.similarity(idx[p], idx[q])
+
+    if min_sim is not None:
+        ok = sims >= min_sim
+        p, q, sims = p[ok], q[ok], sims[ok]
+
+    if top_k is not None and len(p):
+        order = np.lexsort((q, -sims, p))
+        p = p[order]
+        q = q[order]
+        starts = np.flatnonzero(np.r_[True, p[1:] != p[:-1]])
+        rank = np.arange(len(p)) - np.repeat(starts, np.diff(np.r_[starts, len(p)]))
+        keep = rank < top_k
+        p, q = p[keep], q[keep]
+
+    return np.minimum(p, q), np.maximum(p, q)
+
+# Blocos de linhas consecutivas com até block_pairs pares candidatos cada (uma linha que
+# sozinha passa do limite fica num bloco só dela)
+def _row_blocks(reach: np.ndarray, block_pairs: int) -> List[Tuple[int, int]]:
+    n = len(reach)
+    cum = np.cumsum(reach)
+    bounds = []
+    lo = 0
+
+    while lo < n:
+        base = cum[lo - 1] if lo else 0
+        hi = max(lo + 1, int(np.searchsorted(cum, base + block_pairs, side="right")))
+        bounds.append((lo, min(n, hi)))
+        lo = hi
+
+    return bounds
+
+# Busca exata, em blocos de linhas, dos vizinhos de cada faixa.
+#
+# idx são os índices das faixas no motor; share_bits (uma linha por faixa) diz quais pares
+# são elegíveis: só os que dividem ao menos um gênero. Para cada faixa ficam as top_k de
+# maior score (empates pela posição) e/ou todas com score >= min_sim; o par entra se
+# qualquer uma das pontas o escolheu. Devolve as posições (p < q) ordenadas e os scores.
+#
+# Os candidatos de cada linha saem das listas invertidas de gêneros (GenrePostings), então
+# só pares elegíveis são pontuados: o custo é proporcional à soma, sobre os gêneros, de
+# (faixas do gênero)², e não a n². Um gênero que cobre quase todo o catálogo (como pop)
+# ainda deixa essa soma perto de n². Cada bloco gera até block_pairs candidatos, então a
+# memória não depende do tamanho do catálogo além das n × top_k escolhas.
+#
+# Os blocos de linhas são independentes: com workers > 1 eles são repartidos entre
+# processos e o resultado não muda (as escolhas de cada linha só dependem dela, e a junção
+# final ordena e deduplica os pares). Com workers=None o pool só é usado a partir de
+# min_parallel_rows faixas.
+def knn_pairs(
+    engine: SimilarityEngine,
+    idx: np.ndarray,
+    share_bits: np.ndarray,
+    top_k: Optional[int] = 10,
+    min_sim: Optional[float] = None,
+    block_pairs: int = CANDIDATE_BLOCK_PAIRS,
+    workers: Optional[int] = None,
+    min_parallel_rows: int = 2048,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    n = len(idx)
+    postings = GenrePostings(share_bits)
+    bounds = _row_blocks(postings.reach, block_pairs)
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(bounds)) if n >= min_parallel_rows else 1
+
+    if workers <= 1 or len(bounds) <= 1:
+        found = [_knn_rows(engine, idx, postings, lo, hi, top_k, min_sim) for lo, hi in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_knn_worker, initargs=(engine, idx, postings, top_k, min_sim)) as ex:
+            found = list(ex.map(_knn_rows_worker, bounds))
+
+    if not found:
+        empty = np.zeros(0, dtype=np.int64)
+
+        return empty, empty, np.zeros(0, dtype=np.float64)
+
+    keys = np.unique(np.concatenate([a for a, _ in found]).astype(np.int64) * n + np.concatenate([b for _, b in found]))
+    a = keys // n
+    b = keys % n
+
+    return a, b, engine.similarity(idx[a], idx[b])
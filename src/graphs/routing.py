@@ -0,0 +1,115 @@
+from typing import Dict, List, Tuple, Optional, Any, Iterator, Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+
+from src.graphs import algorithms as algorithms
+from src.graphs.csr import csr_view
+from src.graphs import apsp as apsp
+
+# Roteamento em lote (muitos-para-muitos).
+#
+# Os pares (origem, destino) são agrupados por origem; cada origem distinta roda uma única
+# busca de Dijkstra completa e todos os destinos daquela origem são respondidos a partir
+# da mesma árvore de caminhos. Com muitas origens, os grupos são distribuídos num pool de
+# processos que recebe o grafo (em CSR) uma única vez, no inicializador. Se o grafo tiver
+# uma matriz de distâncias anexada (src.graphs.apsp), os pares são respondidos direto dela.
+
+Pair = Tuple[str, str]
+RouteResult = Tuple[int, float, List[str]]
+
+# Grafo usado pelos processos do pool (preenchido por _init_worker)
+_WORKER_GRAPH: Any = None
+
+def _init_worker(graph) -> None:
+    global _WORKER_GRAPH
+    _WORKER_GRAPH = graph
+
+# Agrupa os índices dos pares por origem, preservando a ordem de primeira aparição
+def group_pairs_by_origin(pairs: Iterable[Pair]) -> Dict[str, List[Tuple[int, str]]]:
+    groups: Dict[str, List[Tuple[int, str]]] = {}
+
+    for idx, (origem, destino) in enumerate(pairs):
+        groups.setdefault(origem, []).append((idx, destino))
+
+    return groups
+
+# Resolve todos os destinos de uma origem com uma única busca
+def route_from_origin(graph, origem: str, destinos: List[Tuple[int, str]]) -> List[RouteResult]:
+    res = algorithms.dijkstra(graph, origem)
+    out: List[RouteResult] = []
+
+    if res.get("error"):
+        for idx, _ in destinos:
+            out.append((idx, float("inf"), []))
+
+        return out
+
+    prev = res.get("prev", {}) or {}
+    dist = res.get("dist", {}) or {}
+
+    for idx, destino in destinos:
+        custo = float(dist.get(destino, float("inf")))
+        out.append((idx, custo, algorithms.reconstruct_path(prev, destino)))
+
+    return out
+
+def _route_batch(batch: List[Tuple[str, List[Tuple[int, str]]]]) -> List[RouteResult]:
+    out: List[RouteResult] = []
+
+    for origem, destinos in batch:
+        out.extend(route_from_origin(_WORKER_GRAPH, origem, destinos))
+
+    return out
+
+# Versão do grafo enviada aos processos: o CSR (compacto e serializável) quando disponível
+def _routing_view(graph):
+    csr = csr_view(graph)
+
+    if csr is not None:
+        return csr
+
+    if hasattr(graph, "to_csr"):
+        return graph.to_csr()
+
+    return graph
+
+# Gera (índice do par, custo, caminho) à medida que cada grupo de origens termina.
+# A ordem de saída não é a dos pares quando há paralelismo; use o índice para reordenar.
+# Com workers=None o pool só é usado a partir de min_parallel_origins origens distintas,
+# abaixo disso o custo de subir os processos supera o das buscas.
+def many_to_many(graph, pairs: List[Pair], workers: Optional[int] = None, batch_size: int = 16, min_parallel_origins: int = 256) -> Iterator[RouteResult]:
+    matrix = apsp.matrix_for(graph)
+
+    if matrix is not None:
+        for idx, (origem, destino) in enumerate(pairs):
+            if not matrix.has_node(origem):
+                yield idx, float("inf"), []
+            else:
+                # mesmo formato do reconstruct_path: destino inalcançável vira [destino]
+                yield idx, matrix.distance(origem, destino), matrix.path(origem, destino) or [destino]
+
+        return
+
+    groups = list(group_pairs_by_origin(pairs).items())
+
+    if not groups:
+        return
+
+    batches = [groups[i:i + batch_size] for i in range(0, len(groups), batch_size)]
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(batches)) if len(groups) >= min_parallel_origins else 1
+
+    if workers <= 1 or len(batches) <= 1:
+        for origem, destinos in groups:
+            yield from route_from_origin(graph, origem, destinos)
+
+        return
+
+    view = _routing_view(graph)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(view,)) as ex:
+        futures = [ex.submit(_route_batch, batch) for batch in batches]
+
+        for fut in as_completed(futures):
+            yield from fut.result()
@@ -0,0 +1,205 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from pathlib import Path
+from functools import partial
+import shutil
+import json
+import os
+
+import numpy as np
+
+from src.graphs.csr import CSRGraph
+from src.graphs.graph import Graph
+from src.graphs.music_graph import MusicGraph
+from src.graphs.io import file_digest
+
+# Snapshot binário de Graph/MusicGraph.
+#
+# Uma pasta com:
+#   header.json     tipo do grafo, hash das fontes, tabela de nós internados, ordem das
+#                   chaves de adj, tabela de logradouros, bairro_to_microrregiao e _edge_genres
+#   offsets.npy, targets.npy, weights.npy[, edge_meta.npy]   vetores CSR (ver src.graphs.csr)
+#
+# Os .npy são abertos com memory-map e o CSR do grafo carregado aponta direto para as
+# páginas mapeadas (processos que carregam o mesmo snapshot dividem essas páginas no cache
+# do sistema). Os vetores são expostos como memoryview com o tipo de CSRGraph.from_adj:
+# os laços dos algoritmos indexam um elemento por vez, e indexar uma memoryview devolve
+# int/float do Python, sem o custo de criar um escalar NumPy a cada acesso ao memmap.
+#
+# adj não é reconstruído na carga: Graph/MusicGraph montam as listas a partir do CSR no
+# primeiro acesso a graph.adj (mutações, iter_edges, métricas de ego...). As travessias
+# leem só o CSR.
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+def save_snapshot(graph, out_dir: str | Path, source_hash: Optional[str] = None) -> Path:
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp{os.getpid()}")
+
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+
+    tmp_dir.mkdir(parents=True)
+
+    try:
+        _write_snapshot(graph, tmp_dir, source_hash)
+
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+
+        os.replace(tmp_dir, out_dir)
+    except BaseException:
+        # não deixa a pasta temporária para trás (disco cheio, out_dir ocupado, ...)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return out_dir
+
+def _write_snapshot(graph, tmp_dir: Path, source_hash: Optional[str]) -> None:
+    csr = graph.to_csr()
+    offsets, targets, weights = csr.as_numpy()
+    np.save(tmp_dir / "offsets.npy", offsets)
+    np.save(tmp_dir / "targets.npy", targets)
+    np.save(tmp_dir / "weights.npy", weights)
+
+    if csr.edge_meta is not None:
+        np.save(tmp_dir / "edge_meta.npy", np.asarray(csr.edge_meta, dtype=np.int32))
+
+    header: Dict[str, Any] = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "kind": type(graph).__name__,
+        "source_hash": source_hash,
+        "nodes": csr.node_names,
+        # ordem de inserção das chaves de adj (edges_list e afins dependem dela)
+        "adj_order": [csr.index[u] for u in graph.adj],
+        "meta_table": csr.meta_table,
+        "directed": csr.directed,
+    }
+
+    if isinstance(graph, Graph):
+        header["bairro_to_microrregiao"] = list(graph.bairro_to_microrregiao.items())
+
+    if isinstance(graph, MusicGraph):
+        header["edge_genres"] = [[a, b, g] for (a, b), g in getattr(graph, "_edge_genres", {}).items()]
+
+    with open(tmp_dir / "header.json", "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False)
+
+def _load_array(path: Path, mmap: bool):
+    if not mmap:
+        return np.load(path)
+
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # arquivos vazios não podem ser mapeados
+        return np.load(path)
+
+# memoryview tipada sobre o buffer do .npy (sem cópia, também para memmaps)
+def _typed_view(arr, typecode: str) -> memoryview:
+    return memoryview(arr).cast("B").cast(typecode)
+
+# Listas de adjacência de um grafo carregado, na ordem de chaves original (ver Graph.adj)
+def _adj_from_csr(csr: CSRGraph, order: Sequence[int]) -> Dict[str, list]:
+    names = csr.node_names
+    off = csr.offsets
+    tgt = csr.targets
+    wts = csr.weights
+    mids = csr.edge_meta
+    table = csr.meta_table
+    adj: Dict[str, list] = {}
+
+    for u in order:
+        lo, hi = off[u], off[u + 1]
+
+        if mids is not None:
+            adj[names[u]] = [(names[tgt[j]], wts[j], table[mids[j]]) for j in range(lo, hi)]
+        else:
+            adj[names[u]] = [(names[tgt[j]], wts[j]) for j in range(lo, hi)]
+
+    return adj
+
+def read_snapshot_header(in_dir: str | Path) -> Dict[str, Any]:
+    with open(Path(in_dir) / "header.json", encoding="utf-8") as f:
+        header = json.load(f)
+
+    if header.get("version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"versão de snapshot incompatível em {in_dir}")
+
+    return header
+
+def load_snapshot(in_dir: str | Path, mmap: bool = True):
+    in_dir = Path(in_dir)
+    header = read_snapshot_header(in_dir)
+    kind = header.get("kind")
+
+    if kind == "Graph":
+        graph = Graph()
+    elif kind == "MusicGraph":
+        graph = MusicGraph()
+    else:
+        raise ValueError(f"tipo de grafo desconhecido no snapshot: {kind}")
+
+    offsets = _load_array(in_dir / "offsets.npy", mmap)
+    targets = _load_array(in_dir / "targets.npy", mmap)
+    weights = _load_array(in_dir / "weights.npy", mmap)
+    meta_path = in_dir / "edge_meta.npy"
+    edge_meta = _load_array(meta_path, mmap) if meta_path.exists() else None
+
+    names: List[str] = header["nodes"]
+
+    # mesmos tipos de CSRGraph.from_adj
+    csr = CSRGraph(
+        names, _typed_view(offsets, "q"), _typed_view(targets, "i"), _typed_view(weights, "d"),
+        edge_meta=_typed_view(edge_meta, "i") if edge_meta is not None else None,
+        meta_table=header.get("meta_table"), directed=header.get("directed", False),
+    )
+
+    graph._adj = None
+    graph._adj_loader = partial(_adj_from_csr, csr, header.get("adj_order", range(len(names))))
+    graph.nodes.update(names)
+
+    if kind == "Graph":
+        graph.bairro_to_microrregiao.update((b, mr) for b, mr in header.get("bairro_to_microrregiao", []))
+        graph.build_microrregiao_index()
+    else:
+        graph._edge_genres = {(a, b): g for a, b, g in header.get("edge_genres", [])}
+
+    graph._csr = csr
+
+    return graph
+
+# Hash combinado das fontes (a ausência de um arquivo opcional também entra no hash)
+def sources_digest(paths: Sequence[str | Path]) -> str:
+    parts = []
+
+    for p in paths:
+        p = Path(p)
+        parts.append(file_digest(p) if p.exists() else "-")
+
+    return parts[0] if len(parts) == 1 else "+".join(parts)
+
+# Carrega o snapshot de `name` se o hash das fontes bater; senão chama build(), salva e
+# devolve o grafo recém-construído (congelado no CSR)
+def load_or_build_snapshot(name: str, sources: Sequence[str | Path], build: Callable[[], Any], cache_dir: Optional[str | Path] = None):
+    if cache_dir is None:
+        from src.config import CACHE_DIR
+        cache_dir = CACHE_DIR
+
+    digest = sources_digest(sources)
+    target = Path(cache_dir) / f"snapshot-{name}"
+
+    if (target / "header.json").exists():
+        try:
+            if read_snapshot_header(target).get("source_hash") == digest:
+                return load_snapshot(target)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    graph = build()
+
+    try:
+        save_snapshot(graph, target, source_hash=digest)
+    except OSError:
+        pass
+
+    return graph
@@ -0,0 +1,159 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.graphs.names import normalize_name
+
+# Tabelas de nós e de arestas prontas para a API (/nodes e /edges).
+#
+# As linhas são os mesmos dicionários de nodes_metadata()/edges_list(), montados uma vez e
+# guardados no grafo junto com a `version` em que foram montados (como a vizinhança
+# ordenada de algorithms.sorted_adjacency): qualquer mutação de aresta muda a versão e a
+# tabela é refeita na próxima leitura. Ao lado das linhas ficam as colunas usadas pelos
+# filtros (grau, chave da microrregião, peso, texto normalizado), então filtrar e paginar
+# não reconstroem nem renormalizam nada por requisição.
+#
+# As linhas são compartilhadas entre requisições: quem as recebe não deve alterá-las.
+
+# Mesma chave do índice de microrregiões de Graph (str(mr).strip())
+def _mr_key(mr: Any) -> Optional[str]:
+    return None if mr is None else str(mr).strip()
+
+def _text_key(s: Any) -> str:
+    return normalize_name(s, upper=True)
+
+class NodeTable:
+    def __init__(self, graph, version: int):
+        self.version = version
+
+        if hasattr(graph, "iter_nodes_metadata"):
+            self.rows: List[Dict[str, Any]] = list(graph.iter_nodes_metadata())
+        else:
+            self.rows = [{"id": n, "grau": len(graph.adj.get(n, []))} for n in graph.nodes_list()]
+
+        self.grau: List[int] = [r.get("grau", 0) for r in self.rows]
+        self.mr: List[Optional[str]] = [_mr_key(r.get("microrregiao")) for r in self.rows]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # Predicado sobre a posição da linha (None = sem filtro)
+    def predicate(self, microrregiao: Any = None, min_grau: Optional[int] = None) -> Optional[Callable[[int], bool]]:
+        tests: List[Callable[[int], bool]] = []
+
+        if microrregiao is not None:
+            key = _mr_key(microrregiao)
+            mr = self.mr
+            tests.append(lambda i: mr[i] == key)
+
+        if min_grau is not None:
+            grau = self.grau
+            tests.append(lambda i: grau[i] >= min_grau)
+
+        return _all_of(tests)
+
+class EdgeTable:
+    def __init__(self, graph, version: int, region_of: Optional[Dict[str, Any]] = None):
+        self.version = version
+        edges = graph.iter_edges() if hasattr(graph, "iter_edges") else iter(graph.edges_list())
+        self.rows: List[Dict[str, Any]] = list(edges)
+
+        if self.rows and "bairro_origem" in self.rows[0]:
+            ends = ("bairro_origem", "bairro_destino")
+            text = "logradouro"
+        else:
+            ends = ("track_a", "track_b")
+            text = "common_genres"
+
+        self.peso: List[float] = [float(r.get("peso", 0.0)) for r in self.rows]
+        self.text: List[str] = [_text_key(r.get(text)) for r in self.rows]
+
+        # microrregião da aresta: a das duas pontas quando coincidem
+        self.mr: List[Optional[str]] = []
+        region_of = region_of or {}
+
+        for r in self.rows:
+            ma = _mr_key(region_of.get(r[ends[0]]))
+            mb = _mr_key(region_of.get(r[ends[1]]))
+            self.mr.append(ma if ma == mb else None)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def predicate(
+        self,
+        microrregiao: Any = None,
+        logradouro: Optional[str] = None,
+        peso_min: Optional[float] = None,
+        peso_max: Optional[float] = None,
+    ) -> Optional[Callable[[int], bool]]:
+        tests: List[Callable[[int], bool]] = []
+
+        if microrregiao is not None:
+            key = _mr_key(microrregiao)
+            mr = self.mr
+            tests.append(lambda i: mr[i] == key)
+
+        if logradouro:
+            needle = _text_key(logradouro)
+            text = self.text
+            tests.append(lambda i: needle in text[i])
+
+        if peso_min is not None:
+            peso = self.peso
+            tests.append(lambda i: peso[i] >= peso_min)
+
+        if peso_max is not None:
+            peso = self.peso
+            tests.append(lambda i: peso[i] <= peso_max)
+
+        return _all_of(tests)
+
+def _all_of(tests: List[Callable[[int], bool]]) -> Optional[Callable[[int], bool]]:
+    if not tests:
+        return None
+
+    if len(tests) == 1:
+        return tests[0]
+
+    return lambda i: all(t(i) for t in tests)
+
+# Percorre as linhas a partir de `start` devolvendo até `limit` posições que passam no
+# filtro e a posição onde a próxima página começa (None quando acabou)
+def scan(n_rows: int, start: int, limit: Optional[int], pred: Optional[Callable[[int], bool]]) -> Tuple[List[int], Optional[int]]:
+    if pred is None:
+        end = n_rows if limit is None else min(n_rows, start + limit)
+
+        return list(range(start, end)), (end if end < n_rows else None)
+
+    out: List[int] = []
+    i = start
+
+    while i < n_rows:
+        if pred(i):
+            if limit is not None and len(out) >= limit:
+                return out, i
+
+            out.append(i)
+
+        i += 1
+
+    return out, None
+
+def node_table(graph) -> NodeTable:
+    version = getattr(graph, "version", 0)
+    table = getattr(graph, "_node_table", None)
+
+    if table is None or table.version != version:
+        table = NodeTable(graph, version)
+        graph._node_table = table
+
+    return table
+
+def edge_table(graph) -> EdgeTable:
+    version = getattr(graph, "version", 0)
+    table = getattr(graph, "_edge_table", None)
+
+    if table is None or table.version != version:
+        table = EdgeTable(graph, version, getattr(graph, "bairro_to_microrregiao", None))
+        graph._edge_table = table
+
+    return table
@@ -1,61 +1,23 @@
-from src.graphs.exporters import export_route_tree_html
+from src.graphs.exporters import export_route_tree_html, export_all_pyvis_htmls
 from src.graphs import algorithms as algorithms
+from src.graphs import routing as routing
+from src.graphs import apsp as apsp
+from src.graphs import tables as tables
 from tempfile import NamedTemporaryFile
 from src.graphs.graph import Graph
 from pyvis.network import Network
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 from pathlib import Path
-import requests
+import asyncio
 import json
 import time
-import sys
 import csv
 import os
 
 OUT_DIR = Path(__file__).resolve().parent.parent / "out"
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
-API_BASE = os.environ.get("GRAFOS_API_URL", "http://127.0.0.1:3000")
-
-def fetch_nodes():
-    r = requests.get(f"{API_BASE}/nodes")
-    r.raise_for_status()
-
-    return r.json()
-
-def fetch_edges():
-    r = requests.get(f"{API_BASE}/edges")
-    r.raise_for_status()
-
-    return r.json()
-
-def fetch_microrregiao(mr_id):
-    r = requests.get(f"{API_BASE}/microrregiao/{mr_id}")
-
-    if r.status_code == 404:
-        return None
-    
-    r.raise_for_status()
-
-    return r.json()
-
-def fetch_ego(node):
-    r = requests.get(f"{API_BASE}/ego/{node}")
-
-    if r.status_code == 404:
-        return None
-    
-    r.raise_for_status()
-    
-    return r.json()
-
-def trigger_static_html_generation():
-    r = requests.post(f"{API_BASE}/export/static-html")
-    r.raise_for_status()
-    resp = r.json()
-    generated = resp.get("generated", [])
-    print(f"[solve] HTMLs gerados via API: {generated}")
-    
-    return generated
 
 def build_local_graph():
     adj_path = DATA_DIR / "adjacencias_bairros.csv"
@@ -67,11 +29,16 @@ def build_local_graph():
     if not mr_path.exists():
         print(f"[solve] AVISO: {mr_path} não existe; o mapeamento microrregiao ficará vazio.")
     
-        return Graph.load_from_files(adj_path, None)
-    
-    return Graph.load_from_files(adj_path, mr_path)
+        graph = Graph.load_from_files(adj_path, None)
+    else:
+        graph = Graph.load_from_files(adj_path, mr_path)
+
+    # matriz de distâncias em cache (memory-map) para responder os pares sem busca
+    apsp.attach_cached(graph, adj_path)
+
+    return graph
 
-def generate_distancias_enderecos(graph: Graph):
+def generate_distancias_enderecos(graph: Graph, workers: Optional[int] = None):
     enderecos_file = DATA_DIR / "enderecos.csv"
     out_file = OUT_DIR / "distancias_enderecos.csv"
 
@@ -79,7 +46,8 @@ def generate_distancias_enderecos(graph: Graph):
         print(f"[solve] Aviso: {enderecos_file} não existe. Pulando geração de distancias_enderecos.csv")
         return
 
-    rows_out = []
+    raw_pairs = []
+    pairs = []
     normalizer = getattr(graph, "normalize_node", lambda x: x)
 
     with open(enderecos_file, newline="", encoding="utf-8") as f:
@@ -92,35 +60,35 @@ def generate_distancias_enderecos(graph: Graph):
             if not origem_raw or not destino_raw:
                 continue
 
-            origem = normalizer(origem_raw)
-            destino = normalizer(destino_raw)
-
-            res = algorithms.dijkstra(graph, origem, destino)
-
-            if res.get("error"):
-                custo_val = float("inf")
-                caminho = []
-            else:
-                prev = res.get("prev", {}) or {}
-                caminho = algorithms.reconstruct_path(prev, destino)
-                custo_val = float(res.get("dist", {}).get(destino, float("inf")))
-
-            caminho_str = " -> ".join(caminho) if caminho else ""
-            rows_out.append({
-                "bairro_origem": origem_raw,
-                "bairro_destino": destino_raw,
-                "custo": round(custo_val, 4) if custo_val != float("inf") else "",
-                "caminho": caminho_str
-            })
+            raw_pairs.append((origem_raw, destino_raw))
+            pairs.append((normalizer(origem_raw), normalizer(destino_raw)))
 
     keys = ["bairro_origem", "bairro_destino", "custo", "caminho"]
 
+    # Uma busca por origem distinta (em paralelo quando há muitas origens); as linhas são
+    # escritas assim que todas as anteriores ficam prontas, mantendo a ordem do CSV de entrada.
     with open(out_file, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=keys)
         writer.writeheader()
 
-        for r in rows_out:
-            writer.writerow(r)
+        pending = {}
+        next_idx = 0
+
+        for idx, custo_val, caminho in routing.many_to_many(graph, pairs, workers=workers):
+            pending[idx] = (custo_val, caminho)
+
+            while next_idx in pending:
+                custo_val, caminho = pending.pop(next_idx)
+                origem_raw, destino_raw = raw_pairs[next_idx]
+                caminho_str = " -> ".join(caminho) if caminho else ""
+
+                writer.writerow({
+                    "bairro_origem": origem_raw,
+                    "bairro_destino": destino_raw,
+                    "custo": round(custo_val, 4) if custo_val != float("inf") else "",
+                    "caminho": caminho_str
+                })
+                next_idx += 1
 
     print(f"[solve] distancias_enderecos.csv gerado: {out_file}")
 
@@ -128,7 +96,7 @@ def generate_percurso_nova_descoberta(graph: Graph):
     origem = "NOVA DESCOBERTA"
     destino = "BOA VIAGEM"
     
-    res = algorithms.dijkstra(graph, origem, destino)
+    res = algorithms.dijkstra(graph, origem, destino, method="bidirectional")
 
     prev = res.get("prev", {})
     prev_edge = res.get("prev_edge", {})
@@ -161,7 +129,7 @@ def generate_percurso_nova_descoberta(graph: Graph):
         print(f"[solve] ERRO ao gerar arvore_percurso.html: {e}")
 
 def generate_top_bairros_summary(graph: Graph):
-    nodes_meta = graph.nodes_metadata()
+    nodes_meta = tables.node_table(graph).rows
 
     if not nodes_meta:
         print("[solve] AVISO: graph.nodes_metadata() vazio. Pulando top summary.")
@@ -169,9 +137,10 @@ def generate_top_bairros_summary(graph: Graph):
 
     maior_grau = max(nodes_meta, key=lambda x: x.get("grau", 0))
     melhor_dens = None
+    ego = graph.ego_metrics_all()
 
     for n in graph.nodes_list():
-        m = graph.ego_metrics(n)
+        m = ego[n]
 
         if melhor_dens is None or m["densidade_ego"] > melhor_dens["densidade_ego"]:
             melhor_dens = m
@@ -189,10 +158,10 @@ def generate_top_bairros_summary(graph: Graph):
 def generate_densidade_conexao_html(graph: Graph):
     out_html = OUT_DIR / "densidade_conexoes_bairros.html"
     dens_map = {}
+    ego = graph.ego_metrics_all()
 
     for n in graph.nodes_list():
-        m = graph.ego_metrics(n)
-        dens_map[n] = float(m["densidade_ego"])
+        dens_map[n] = float(ego[n]["densidade_ego"])
 
     dens_values = list(dens_map.values()) if dens_map else [0.0]
     min_dens = min(dens_values)
@@ -250,7 +219,7 @@ def generate_densidade_conexao_html(graph: Graph):
     
         return int(size)
 
-    all_edges = graph.edges_list()
+    all_edges = tables.edge_table(graph).rows
     peso_vals = [float(e.get("peso", 1.0) or 0.0) for e in all_edges] if all_edges else [1.0]
     max_peso = max(peso_vals) if peso_vals else 1.0
     
@@ -295,7 +264,7 @@ def generate_interactive_bairro_vizinhos_html(graph: Graph):
     for n in graph.nodes_list():
         net.add_node(n, label=n, title=n, color="orange", size=18)
 
-    for e in graph.edges_list():
+    for e in tables.edge_table(graph).rows:
         net.add_edge(e["bairro_origem"], e["bairro_destino"], title=f"Peso: {e['peso']}\\nRua: {e['logradouro']}", color="lightblue", width=1)
 
     tmp = NamedTemporaryFile(delete=False, suffix=".html")
@@ -374,12 +343,9 @@ def generate_interactive_bairro_vizinhos_html(graph: Graph):
 
     print(f"[solve] interactive_bairro_vizinhos.html gerado: {out_html}")
 
-def generate_global_summary():
-    nodes_resp = fetch_nodes()
-    edges_resp = fetch_edges()
-
-    N = nodes_resp["count"]
-    E = edges_resp["count"]
+def generate_global_summary(graph: Graph):
+    N = len(graph.nodes)
+    E = graph.edge_count()
     dens = 0.0
     
     if N > 1:
@@ -395,16 +361,17 @@ def generate_global_summary():
     
     return payload
 
-def generate_microrregioes():
-    nodes_resp = fetch_nodes()
-    nodes = nodes_resp["nodes"]
+def generate_microrregioes(graph: Graph):
+    nodes = tables.node_table(graph).rows
 
     mrs = sorted({str(n.get("microrregiao")) for n in nodes if n.get("microrregiao") not in (None, "", float("nan"))})
+    all_stats = graph.microrregiao_stats_all()
     out_list = []
     
     for mr in mrs:
+        # mesmo id (texto) que a rota /microrregiao/{mr_id} recebia
         try:
-            stats = fetch_microrregiao(int(mr))
+            stats = all_stats.get(str(int(mr)))
         except Exception:
             stats = None
     
@@ -420,19 +387,16 @@ def generate_microrregioes():
     
     return out_list
 
-def generate_ego_csvs():
-    nodes_resp = fetch_nodes()
-    nodes = nodes_resp["nodes"]
+def generate_ego_csvs(graph: Graph):
     out_rows = []
     
-    for n in nodes:
-        bairro = n["id"]
-        metrics = fetch_ego(bairro)
-        
-        if metrics is None:
+    for n in tables.node_table(graph).rows:
+        bairro = graph.normalize_node(n["id"])
+
+        if not graph.has_node(bairro):
             continue
         
-        out_rows.append(metrics)
+        out_rows.append(graph.ego_metrics(bairro))
 
     ego_file = OUT_DIR / "ego_bairro.csv"
     keys = ["bairro", "grau", "ordem_ego", "tamanho_ego", "densidade_ego"]
@@ -458,38 +422,91 @@ def generate_ego_csvs():
     
     return out_rows
 
-def main():
-    print("[solve] esperando a API estar disponível...", end="", flush=True)
+# grafo_completo.html e um HTML por microrregião
+def generate_static_htmls(graph: Graph):
+    generated = export_all_pyvis_htmls(graph)
+    print(f"[solve] HTMLs gerados: {generated}")
+
+    return generated
+
+# Entregáveis agrupados em trilhas independentes: cada trilha roda num worker do pool e os
+# passos de uma trilha rodam em sequência. Os HTMLs ficam todos numa trilha só porque o
+# pyvis copia a pasta lib/ para o diretório atual sem nenhuma trava.
+DELIVERABLE_LANES: List[List[Callable[[Graph], Any]]] = [
+    [generate_global_summary],
+    [generate_microrregioes],
+    [generate_ego_csvs],
+    [generate_top_bairros_summary],
+    [generate_distancias_enderecos],
+    [
+        generate_percurso_nova_descoberta,
+        generate_densidade_conexao_html,
+        generate_interactive_bairro_vizinhos_html,
+        generate_static_htmls,
+    ],
+]
+
+def _run_lane(graph: Graph, lane: List[Callable[[Graph], Any]]) -> List[Dict[str, Any]]:
+    results = []
+
+    for step in lane:
+        t0 = time.perf_counter()
 
-    for i in range(10):
         try:
-            r = requests.get(f"{API_BASE}/health", timeout=2.0)
-            if r.status_code == 200:
-                print(" OK")
-                break
-        except Exception:
-            print(".", end="", flush=True)
-            time.sleep(0.7)
+            step(graph)
+            error = None
+        except Exception as e:
+            error = str(e)
+
+        results.append({"step": step.__name__, "seconds": round(time.perf_counter() - t0, 4), "error": error})
+
+    return results
+
+# Gera todos os entregáveis direto sobre o grafo em memória (sem passar pela API).
+# Devolve {"steps": [...], "errors": [...], "timings": {...}} com os passos na ordem de
+# DELIVERABLE_LANES; um passo que falha não interrompe os outros.
+def run_deliverables(graph: Graph, workers: Optional[int] = None) -> Dict[str, Any]:
+    lanes = DELIVERABLE_LANES
+
+    if workers is None:
+        workers = min(len(lanes), os.cpu_count() or 1)
+
+    if workers <= 1:
+        lane_results = [_run_lane(graph, lane) for lane in lanes]
     else:
-        print("\n[solve] erro: não consegui conectar na API. Rode `python -m src.cli` em outro terminal e tente de novo.")
-        sys.exit(1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deliverables") as ex:
+            lane_results = list(ex.map(lambda lane: _run_lane(graph, lane), lanes))
+
+    summary: Dict[str, Any] = {"steps": [], "errors": [], "timings": {}}
+
+    for results in lane_results:
+        for r in results:
+            summary["steps"].append(r["step"])
+            summary["timings"][r["step"]] = r["seconds"]
+
+            if r["error"] is not None:
+                summary["errors"].append({"step": r["step"], "error": r["error"]})
 
-    generate_global_summary()
-    generate_microrregioes()
-    generate_ego_csvs()
-    trigger_static_html_generation()
+    return summary
 
+# Versão assíncrona para rotas async: o pipeline roda fora do event loop
+async def run_deliverables_async(graph: Graph, workers: Optional[int] = None) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(None, run_deliverables, graph, workers)
+
+def main():
     try:
         graph = build_local_graph()
     except Exception as e:
         print(f"[solve] ERRO: nao consegui construir grafo local: {e}")
         return
 
-    generate_distancias_enderecos(graph)
-    generate_percurso_nova_descoberta(graph)
-    generate_top_bairros_summary(graph)
-    generate_densidade_conexao_html(graph)
-    generate_interactive_bairro_vizinhos_html(graph)
+    summary = run_deliverables(graph)
+
+    for err in summary["errors"]:
+        print(f"[solve] ERRO em {err['step']}: {err['error']}")
+
     print("[solve] todos os entregáveis gerados (ver pasta out/)")
 
 if __name__ == "__main__":
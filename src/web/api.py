@@ -2,25 +2,22 @@ from fastapi import FastAPI, Depends, HTTPException, Query
 from src.graphs.exporters import export_all_pyvis_htmls
 from fastapi.middleware.cors import CORSMiddleware
 from src.graphs import algorithms as algorithms
+from src.graphs import apsp as apsp
+from src.graphs.overlay import WeightOverlay
 from typing import Dict, Any, List, Optional
-from src.web.deps import get_graph
+from src.web.deps import get_graph, graph_key, registry
+from src.config import GRAPH_WATCH_INTERVAL
+from src.web.cache import result_cache
+from src.web.registry import snapshot_version
+from src.web import streaming as streaming
+from src.web import paging as paging
+from src.graphs import tables as tables
+from src.graphs.names import normalization_stats
 from pathlib import Path
 import random
 import json
-import copy
-
-from src.solve import (
-    generate_global_summary,
-    generate_microrregioes,
-    generate_ego_csvs,
-    trigger_static_html_generation,
-    build_local_graph,
-    generate_distancias_enderecos,
-    generate_percurso_nova_descoberta,
-    generate_top_bairros_summary,
-    generate_densidade_conexao_html,
-    generate_interactive_bairro_vizinhos_html,
-)
+
+from src.solve import run_deliverables_async
 
 app = FastAPI(title="Projeto Grafos - API", version="0.1")
 
@@ -32,46 +29,142 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Vigia os CSVs dos grafos e recarrega em segundo plano quando mudam
+@app.on_event("startup")
+def _start_graph_watcher() -> None:
+    registry.start_watching(GRAPH_WATCH_INTERVAL)
+
+@app.on_event("shutdown")
+def _stop_graph_watcher() -> None:
+    registry.stop_watching()
+
 # Endpoint de check da API 
 @app.get("/health", tags=["infra"])
 def health() -> Dict[str, Any]:
     return {"status": "ok"}
 
-# Endpoint que retorna os nós do grafo
-@app.get("/nodes", tags=["graph"])
-def api_nodes(graph = Depends(get_graph)):
-    # Se for o dataset dos bairros
-    if hasattr(graph, "nodes_metadata"):
-        nodes = graph.nodes_metadata()
+# Métricas do cache de resultados e da normalização de nomes
+@app.get("/cache/stats", tags=["infra"])
+def api_cache_stats() -> Dict[str, Any]:
+    return {"results": result_cache.stats(), "normalization": normalization_stats()}
 
-        return {"count": len(nodes), "nodes": nodes}
-    
-    # Se for o dataset das músicas
-    if hasattr(graph, "nodes_list"):
-        nodes = graph.nodes_list()
+# Grafos registrados e versão do snapshot carregado
+@app.get("/graphs", tags=["infra"])
+def api_graphs() -> List[Dict[str, Any]]:
+    return registry.describe()
 
-        return {"count": len(nodes), "nodes": nodes}
+@app.post("/graphs/{key}/reload", tags=["infra"])
+def api_graph_reload(key: str) -> Dict[str, Any]:
+    gkey = graph_key(key)
 
-# Endpoint que retorna todas as arestas do grafo
-@app.get("/edges", tags=["graph"])
-def api_edges(graph = Depends(get_graph)):
-    # Ambos têm o mesmo método
-    edges = graph.edges_list()
+    try:
+        snap = registry.reload(gkey)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-    return {"count": len(edges), "edges": edges}
+    return {"key": snap.key, "version": snap.version, "loaded_at": snap.loaded_at}
+
+# Endpoint que retorna os nós do grafo.
+#
+# Sem parâmetros de paginação/filtro a resposta é a de sempre (tudo). Com limit, cursor,
+# fields ou algum filtro a resposta é uma página {"count", "nodes", "next_cursor"} de
+# dicionários; o próximo pedaço vem de ?cursor=<next_cursor> com os mesmos filtros.
+@app.get("/nodes", tags=["graph"])
+def api_nodes(
+    stream: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=paging.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    microrregiao: Optional[str] = Query(None),
+    min_grau: Optional[int] = Query(None, ge=0),
+    graph = Depends(get_graph),
+):
+    if stream:
+        return streaming.ndjson_response(streaming.node_records(graph))
+
+    table = tables.node_table(graph)
+
+    if all(p is None for p in (limit, cursor, fields, microrregiao, min_grau)):
+        # Se for o dataset dos bairros
+        if hasattr(graph, "nodes_metadata"):
+            return {"count": len(table), "nodes": table.rows}
+
+        # Se for o dataset das músicas
+        return {"count": len(table), "nodes": [r["id"] for r in table.rows]}
+
+    if microrregiao is not None and not hasattr(graph, "bairro_to_microrregiao"):
+        raise HTTPException(status_code=400, detail="microrregiao filter is only available for bairros graph")
+
+    cols = paging.parse_fields(fields, list(table.rows[0]) if table.rows else [])
+    stamp = paging.table_stamp(table, graph)
+    start = paging.decode_cursor(cursor, stamp) if cursor else 0
+    idx, nxt = tables.scan(len(table), start, limit, table.predicate(microrregiao=microrregiao, min_grau=min_grau))
+
+    return paging.page("nodes", [table.rows[i] for i in idx], cols, stamp, nxt)
+
+# Endpoint que retorna todas as arestas do grafo (paginação como em /nodes)
+@app.get("/edges", tags=["graph"])
+def api_edges(
+    stream: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=paging.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    microrregiao: Optional[str] = Query(None),
+    logradouro: Optional[str] = Query(None),
+    peso_min: Optional[float] = Query(None),
+    peso_max: Optional[float] = Query(None),
+    graph = Depends(get_graph),
+):
+    if stream:
+        return streaming.ndjson_response(streaming.edge_records(graph))
+
+    table = tables.edge_table(graph)
+
+    if all(p is None for p in (limit, cursor, fields, microrregiao, logradouro, peso_min, peso_max)):
+        return {"count": len(table), "edges": table.rows}
+
+    if (microrregiao is not None or logradouro is not None) and not hasattr(graph, "bairro_to_microrregiao"):
+        raise HTTPException(status_code=400, detail="microrregiao/logradouro filters are only available for bairros graph")
+
+    cols = paging.parse_fields(fields, list(table.rows[0]) if table.rows else [])
+    stamp = paging.table_stamp(table, graph)
+    start = paging.decode_cursor(cursor, stamp) if cursor else 0
+    pred = table.predicate(microrregiao=microrregiao, logradouro=logradouro, peso_min=peso_min, peso_max=peso_max)
+    idx, nxt = tables.scan(len(table), start, limit, pred)
+
+    return paging.page("edges", [table.rows[i] for i in idx], cols, stamp, nxt)
 
 # Dijkstra (usa graph.dijkstra se disponível, senão algorithms.dijkstra + reconstruct)
 from src.graphs import algorithms as algorithms  # já deve existir no topo
 
 @app.get("/dijkstra", tags=["algorithms"])
-def api_dijkstra(orig: str = Query(...), dest: str = Query(...), graph = Depends(get_graph)):
+def api_dijkstra(orig: str = Query(...), dest: str = Query(...), method: str = Query("auto"), graph = Depends(get_graph), gkey: str = Depends(graph_key)):
+    if method not in ("auto", "matrix", "dijkstra", "bidirectional", "astar"):
+        raise HTTPException(status_code=400, detail="method deve ser 'auto', 'matrix', 'dijkstra', 'bidirectional' ou 'astar'")
+
     origem_n = getattr(graph, "normalize_node", lambda x: x)(orig)
     dest_n = getattr(graph, "normalize_node", lambda x: x)(dest)
 
     if hasattr(graph, "has_node") and (not graph.has_node(origem_n) or not graph.has_node(dest_n)):
         raise HTTPException(status_code=404, detail="origem ou destino não encontrados no grafo")
 
-    res = algorithms.dijkstra(graph, origem_n, dest_n)
+    return result_cache.get_or_compute(gkey, "dijkstra", (snapshot_version(graph), graph.version, origem_n, dest_n, method), lambda: _dijkstra_response(graph, origem_n, dest_n, method))
+
+def _dijkstra_response(graph, origem_n: str, dest_n: str, method: str) -> Dict[str, Any]:
+    # auto/matrix: responde pela matriz de distâncias pré-calculada, se houver
+    matrix = apsp.matrix_for(graph) if method in ("auto", "matrix") else None
+
+    if matrix is not None and matrix.has_node(origem_n):
+        path_nodes = matrix.path(origem_n, dest_n) or [dest_n]
+        path_ruas = apsp.path_edge_metas(graph, path_nodes)
+        custo = matrix.distance(origem_n, dest_n)
+
+        return {"orig": origem_n, "dest": dest_n, "custo": custo, "caminho": path_nodes, "ruas": path_ruas}
+
+    if method in ("auto", "matrix"):
+        method = "bidirectional"
+
+    res = algorithms.dijkstra(graph, origem_n, dest_n, method=method)
     
     if res.get("error"):
         raise HTTPException(status_code=400, detail=res.get("error"))
@@ -120,92 +213,28 @@ def api_export_static_html(graph = Depends(get_graph)):
     
     return {"generated": files}
 
+# Gera todos os entregáveis em processo, sobre o grafo já carregado no registro
 @app.post("/generate/all", tags=["generate"])
-def api_generate_all(graph: str = Query("part1")):
-    summary = {"steps": [], "errors": []}
-
-    # Constrói o grafo local de bairros
-    try:
-        summary["steps"].append("build_local_graph")
-        graph_local = build_local_graph()
-    except Exception as e:
-        summary["errors"].append({"step": "build_local_graph", "error": str(e)})
-        return {"summary": summary}
-
-    # Gera o recife_global.json
-    try:
-        summary["steps"].append("generate_global_summary")
-        generate_global_summary()
-    except Exception as e:
-        summary["errors"].append({"step": "generate_global_summary", "error": str(e)})
-
-    # Gera o microrregioes.json
-    try:
-        summary["steps"].append("generate_microrregioes")
-        generate_microrregioes()
-    except Exception as e:
-        summary["errors"].append({"step": "generate_microrregioes", "error": str(e)})
-
-    # Gera o ego_bairro.csv
-    try:
-        summary["steps"].append("generate_ego_csvs")
-        generate_ego_csvs()
-    except Exception as e:
-        summary["errors"].append({"step": "generate_ego_csvs", "error": str(e)})
-
-    # Gera o top_bairros_summary.json
-    try:
-        summary["steps"].append("generate_top_bairros_summary")
-        generate_top_bairros_summary(graph_local)
-    except Exception as e:
-        summary["errors"].append({"step": "generate_top_bairros_summary", "error": str(e)})
-
-    # Gera o distancias_enderecos.csv
-    try:
-        summary["steps"].append("generate_distancias_enderecos")
-        generate_distancias_enderecos(graph_local)
-    except Exception as e:
-        summary["errors"].append({"step": "generate_distancias_enderecos", "error": str(e)})
-
-    # Gera o percurso_nova_descoberta_setubal.json e o arvore_percurso.html
-    try:
-        summary["steps"].append("generate_percurso_nova_descoberta")
-        generate_percurso_nova_descoberta(graph_local)
-    except Exception as e:
-        summary["errors"].append({"step": "generate_percurso_nova_descoberta", "error": str(e)})    
-
-    # Gera o densidade_conexoes_bairros.html
-    try:
-        summary["steps"].append("generate_densidade_conexao_html")
-        generate_densidade_conexao_html(graph_local)
-    except Exception as e:
-        summary["errors"].append({"step": "generate_densidade_conexao_html", "error": str(e)})
-
-    # Gera o interactive_bairro_vizinhos.html
-    try:
-        summary["steps"].append("generate_interactive_bairro_vizinhos_html")
-        generate_interactive_bairro_vizinhos_html(graph_local)
-    except Exception as e:
-        summary["errors"].append({"step": "generate_interactive_bairro_vizinhos_html", "error": str(e)})
+async def api_generate_all(graph = Depends(get_graph)):
+    if not hasattr(graph, "ego_metrics"):
+        raise HTTPException(status_code=400, detail="endpoint /generate/all is only available for bairros graph")
 
-    # Gera os HTMLs das microrregiões e o grafo_completo.html
-    try:
-        summary["steps"].append("trigger_static_html_generation")
-        trigger_static_html_generation()
-    except Exception as e:
-        summary["errors"].append({"step": "trigger_static_html_generation", "error": str(e)})
+    summary = await run_deliverables_async(graph)
 
     return {"summary": summary}
 
 @app.get("/bfs", tags=["algorithms"])
-def api_bfs(source: str = Query(...), graph = Depends(get_graph)):
+def api_bfs(source: str = Query(...), stream: bool = Query(False), graph = Depends(get_graph), gkey: str = Depends(graph_key)):
     src_n = getattr(graph, "normalize_node", lambda x: x)(source)
     has_node_fn = getattr(graph, "has_node", None)
     
     if has_node_fn and not has_node_fn(src_n):
         raise HTTPException(status_code=404, detail="source not found in graph")
     
-    res = algorithms.bfs(graph, src_n)
+    if stream:
+        return streaming.ndjson_response(streaming.bfs_records(algorithms.iter_bfs(graph, src_n)))
+
+    res = result_cache.get_or_compute(gkey, "bfs", (snapshot_version(graph), graph.version, src_n), lambda: algorithms.bfs(graph, src_n))
     
     return {"source": src_n, **res}
 
@@ -221,8 +250,20 @@ def api_bfs(source: str = Query(...), graph = Depends(get_graph)):
     
     return {"source": src_n, **res}
 
+# Vetores do formato compacto viram listas para a resposta JSON
+def _jsonable_dfs(res: Dict[str, Any]) -> Dict[str, Any]:
+    ec = res.get("edge_classes")
+
+    if isinstance(ec, dict):
+        res["edge_classes"] = {k: (list(v) if not isinstance(v, list) else v) for k, v in ec.items()}
+
+    return res
+
 @app.get("/dfs", tags=["algorithms"])
-def api_dfs(sources: Optional[List[str]] = Query(None), graph = Depends(get_graph)):
+def api_dfs(sources: Optional[List[str]] = Query(None), edge_classes: str = Query("tuples"), stream: bool = Query(False), graph = Depends(get_graph)):
+    if edge_classes not in algorithms.EDGE_CLASS_MODES:
+        raise HTTPException(status_code=400, detail=f"edge_classes must be one of: {', '.join(algorithms.EDGE_CLASS_MODES)}")
+
     norm_sources = None
     
     if sources:
@@ -232,12 +273,20 @@ def api_dfs(sources: Optional[List[str]] = Query(None), graph = Depends(get_grap
             if hasattr(graph, "has_node") and not graph.has_node(s):
                 raise HTTPException(status_code=404, detail=f"source '{s}' not found in graph")
     
-    res = algorithms.dfs(graph, sources=norm_sources)
+    if stream:
+        walk = algorithms.iter_dfs(graph, sources=norm_sources, weighted=False)
+
+        return streaming.ndjson_response(streaming.dfs_records(walk, norm_sources, edge_classes))
+
+    res = algorithms.dfs(graph, sources=norm_sources, edge_classes=edge_classes)
     
-    return {"sources": norm_sources or [], **res}
+    return {"sources": norm_sources or [], **_jsonable_dfs(res)}
 
 @app.get("/dfs-playlist", tags=["algorithms"])
-def api_dfs(sources: Optional[List[str]] = Query(None), graph = Depends(get_graph)):
+def api_dfs(sources: Optional[List[str]] = Query(None), edge_classes: str = Query("tuples"), stream: bool = Query(False), graph = Depends(get_graph)):
+    if edge_classes not in algorithms.EDGE_CLASS_MODES:
+        raise HTTPException(status_code=400, detail=f"edge_classes must be one of: {', '.join(algorithms.EDGE_CLASS_MODES)}")
+
     norm_sources = None
     
     if sources:
@@ -247,18 +296,26 @@ def api_dfs(sources: Optional[List[str]] = Query(None), graph = Depends(get_grap
             if hasattr(graph, "has_node") and not graph.has_node(s):
                 raise HTTPException(status_code=404, detail=f"source '{s}' not found in graph")
     
-    res = algorithms.dfs_weighted_tiebreak(graph, sources=norm_sources)
+    if stream:
+        walk = algorithms.iter_dfs(graph, sources=norm_sources, weighted=True)
+
+        return streaming.ndjson_response(streaming.dfs_records(walk, norm_sources, edge_classes))
+
+    res = algorithms.dfs_weighted_tiebreak(graph, sources=norm_sources, edge_classes=edge_classes)
     
-    return {"sources": norm_sources or [], **res}
+    return {"sources": norm_sources or [], **_jsonable_dfs(res)}
 
 @app.get("/bellman-ford", tags=["algorithms"])
-def api_bellman_ford(orig: str = Query(...), dest: Optional[str] = Query(None), graph = Depends(get_graph)):
+def api_bellman_ford(orig: str = Query(...), dest: Optional[str] = Query(None), method: str = Query("classic"), stream: bool = Query(False), graph = Depends(get_graph), gkey: str = Depends(graph_key)):
     src_n = getattr(graph, "normalize_node", lambda x: x)(orig)
     
     if hasattr(graph, "has_node") and not graph.has_node(src_n):
         raise HTTPException(status_code=404, detail="origem não encontrada")
+
+    if method not in ("auto", "classic", "spfa", "numpy"):
+        raise HTTPException(status_code=400, detail=f"unknown method: {method}")
     
-    res = algorithms.bellman_ford(graph, src_n)
+    res = result_cache.get_or_compute(gkey, "bellman-ford", (snapshot_version(graph), graph.version, src_n, method), lambda: algorithms.bellman_ford(graph, src_n, method=method))
     
     if dest:
         dst_n = getattr(graph, "normalize_node", lambda x: x)(dest)
@@ -271,6 +328,9 @@ def api_bellman_ford(orig: str = Query(...), dest: Optional[str] = Query(None),
         dist = res.get("dist", {}).get(dst_n)
     
         return {"orig": src_n, "dest": dst_n, "time_sec": res.get("time_sec"), "dist": dist, "path": path, "negative_cycle": res.get("negative_cycle")}
+
+    if stream:
+        return streaming.ndjson_response(streaming.bellman_ford_records(src_n, res))
     
     return {"orig": src_n, "time_sec": res.get("time_sec"), "negative_cycle": res.get("negative_cycle"), "distances": res.get("dist")}
 
@@ -391,8 +451,12 @@ def api_bench(graph = Depends(get_graph)):
         b_norm = normalizer(b)
 
         try:
-            # trabalhar em cópia para NÃO alterar o grafo global
-            g_copy = copy.deepcopy(graph)
+            # overlay de pesos para NÃO alterar o grafo global (guarda só as mudanças);
+            # sem os helpers de injeção o BF roda direto no grafo, que não é alterado
+            if hasattr(graph, "apply_negative_fraction") and hasattr(graph, "inject_negative_cycle"):
+                g_copy = WeightOverlay(graph)
+            else:
+                g_copy = graph
 
             # cenário decide o que injetar:
             # i == 0..1 -> negativos espalhados (sem ciclo forçado)
@@ -424,8 +488,9 @@ def api_bench(graph = Depends(get_graph)):
                 # fallback: se graph não tem helpers, tentar modificar manualmente m edges (pode falhar)
                 injected["notes"] = "no_injection_methods_available"
 
-            # executar BF na cópia (origem = a_norm)
-            res = algorithms.bellman_ford(g_copy, a_norm)
+            # executar BF na cópia (origem = a_norm); o SPFA lê o overlay sobre os vetores
+            # do CSR da base, sem copiar o grafo a cada cenário
+            res = algorithms.bellman_ford(g_copy, a_norm, method="spfa")
             neg = res.get("negative_cycle")
             dist = res.get("dist", {}).get(b_norm, None)
 
@@ -0,0 +1,92 @@
+from typing import Any, Callable, Dict, Hashable, Tuple
+from collections import OrderedDict
+import threading
+
+# Cache LRU de resultados dos algoritmos servidos pela API.
+#
+# As chaves são (chave do grafo, algoritmo, argumentos normalizados); quando deps recarrega
+# um grafo, todas as entradas daquele grafo são descartadas (invalidate_graph). As rotas
+# incluem nos argumentos a versão do snapshot do registro (que só cresce entre recargas) e
+# graph.version, então nem mutações no grafo em memória nem um grafo recarregado reusam a
+# chave. Um resultado calculado sobre um grafo invalidado durante o cálculo não é guardado.
+
+RESULT_CACHE_SIZE = 2048
+
+class ResultCache:
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[Hashable, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # invalidações por grafo: get_or_compute não guarda o que foi calculado antes da última
+        self._generation: Dict[str, int] = {}
+
+    def get_or_compute(self, graph_key: str, algorithm: str, args: Tuple[Hashable, ...], compute: Callable[[], Any]) -> Any:
+        key = (graph_key, algorithm) + tuple(args)
+
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+
+                return self._data[key]
+
+            self.misses += 1
+            generation = self._generation.get(graph_key, 0)
+
+        # calcula fora do lock: requisições diferentes não se bloqueiam
+        value = compute()
+
+        with self._lock:
+            if self._generation.get(graph_key, 0) != generation:
+                return value
+
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+        return value
+
+    def invalidate_graph(self, graph_key: str) -> int:
+        with self._lock:
+            self._generation[graph_key] = self._generation.get(graph_key, 0) + 1
+            stale = [k for k in self._data if k[0] == graph_key]
+
+            for k in stale:
+                del self._data[k]
+
+            self.invalidations += len(stale)
+
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_graph: Dict[str, int] = {}
+
+            for k in self._data:
+                per_graph[k[0]] = per_graph.get(k[0], 0) + 1
+
+            total = self.hits + self.misses
+
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "per_graph": per_graph,
+            }
+
+result_cache = ResultCache()
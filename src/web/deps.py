@@ -1,41 +1,52 @@
 from fastapi import HTTPException
-from typing import Dict
 
 from src.graphs.graph import Graph
 from src.graphs.music_graph import MusicGraph
+from src.graphs import apsp as apsp
+from src.graphs import snapshot as snapshot
+from src.web.cache import result_cache
+from src.web.registry import GraphRegistry
+from src.config import ADJACENCIAS_CSV, BAIRROS_UNIQUE_CSV, PARTE2_ADJACENCIAS_CSV
 
-_GRAPHS: Dict[str, object] = {}
+# Os loaders leem o snapshot binário (memory-map) quando o hash dos CSVs não mudou e
+# só reprocessam os CSVs com pandas quando mudou
+def _load_bairros() -> Graph:
+    sources = [ADJACENCIAS_CSV, BAIRROS_UNIQUE_CSV]
+    g = snapshot.load_or_build_snapshot("bairros", sources, lambda: Graph.load_from_files(ADJACENCIAS_CSV, bairros_path=BAIRROS_UNIQUE_CSV))
 
-_PART1_CSV = "data/adjacencias_bairros.csv"
-_PART1_BAIRROS_CSV = "data/bairros_unique.csv"
-_PART2_CSV = "data/parte2_adjacencias.csv"
+    # Congela em CSR para os algoritmos percorrerem ids inteiros (já vem congelado do snapshot)
+    g.to_csr()
+    apsp.attach_cached(g, ADJACENCIAS_CSV)
 
-def get_graph(graph: str = "part1"):
-    key = (graph or "part1").lower()
+    return g
+
+def _load_musicas() -> MusicGraph:
+    mg = snapshot.load_or_build_snapshot("musicas", [PARTE2_ADJACENCIAS_CSV], lambda: MusicGraph.load_from_edges_csv(PARTE2_ADJACENCIAS_CSV))
+    mg.to_csr()
+    apsp.attach_cached(mg, PARTE2_ADJACENCIAS_CSV)
 
-    if key in ("part1", "bairros"):
-        if "bairros" not in _GRAPHS:
-            try:
-                g = Graph.load_from_files(_PART1_CSV, bairros_path=_PART1_BAIRROS_CSV)
-            except FileNotFoundError:
-                g = None
+    return mg
 
-            if g is None:
-                raise HTTPException(status_code=404, detail=f"Bairros CSV not found: {_PART1_CSV}")
+registry = GraphRegistry()
+registry.register("bairros", _load_bairros, [ADJACENCIAS_CSV, BAIRROS_UNIQUE_CSV], aliases=("part1",))
+registry.register("musicas", _load_musicas, [PARTE2_ADJACENCIAS_CSV], aliases=("part2", "songs"))
 
-            _GRAPHS["bairros"] = g
+# Um grafo recarregado descarta os resultados cacheados do anterior
+registry.add_listener(lambda key, snap: result_cache.invalidate_graph(key))
 
-        return _GRAPHS["bairros"]
+# Chave canônica do grafo a partir do parâmetro ?graph= das rotas
+def graph_key(graph: str = "part1") -> str:
+    key = registry.resolve(graph or "part1")
 
-    if key in ("part2", "musicas", "songs"):
-        if "musicas" not in _GRAPHS:
-            try:
-                mg = MusicGraph.load_from_edges_csv(_PART2_CSV)
-            except FileNotFoundError:
-                raise HTTPException(status_code=404, detail=f"Musicas CSV not found: {_PART2_CSV}")
-            
-            _GRAPHS["musicas"] = mg
+    if key is None:
+        raise HTTPException(status_code=400, detail=f"unknown graph key: {graph}")
 
-        return _GRAPHS["musicas"]
+    return key
+
+def get_graph(graph: str = "part1"):
+    key = graph_key(graph)
 
-    raise HTTPException(status_code=400, detail=f"unknown graph key: {graph}")
+    try:
+        return registry.get(key)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"CSV not found for graph '{key}': {e}")
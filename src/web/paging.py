@@ -0,0 +1,63 @@
+from typing import Any, Dict, List, Optional, Sequence
+import base64
+
+from fastapi import HTTPException
+
+from src.web.registry import snapshot_version
+
+# Paginação por cursor de /nodes e /edges.
+#
+# O cursor é opaco para o cliente: codifica o carimbo da tabela (src.graphs.tables) —
+# versão do snapshot do registro, versão do grafo e número de linhas — e a posição onde a
+# próxima página começa. graph.version recomeça do 0 a cada recarga, por isso a versão do
+# snapshot (que só cresce) entra no carimbo. Um cursor com outro carimbo (mutação ou
+# recarga no meio da paginação) é recusado com 409, porque as posições deixaram de valer.
+# O carimbo não depende do processo, então qualquer worker da API que carregou o mesmo
+# snapshot aceita o cursor.
+
+PAGE_MAX_LIMIT = 5000
+
+def table_stamp(table, graph) -> str:
+    return f"{snapshot_version(graph)}.{table.version}.{len(table)}"
+
+def encode_cursor(stamp: str, pos: int) -> str:
+    return base64.urlsafe_b64encode(f"{stamp}:{pos}".encode("ascii")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, stamp: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        got, pos_s = raw.rsplit(":", 1)
+        pos = int(pos_s)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+    if got != stamp:
+        raise HTTPException(status_code=409, detail="cursor is from an older version of the graph; restart pagination")
+
+    if pos < 0:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+    return pos
+
+# Campos pedidos em ?fields=a,b (None = todos); campos desconhecidos dão 400
+def parse_fields(fields: Optional[str], available: Sequence[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+
+    out = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in out if available and f not in available]
+
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown fields: {', '.join(unknown)} (available: {', '.join(available)})")
+
+    return out
+
+def page(key: str, rows: List[Dict[str, Any]], fields: Optional[List[str]], stamp: str, next_pos: Optional[int]) -> Dict[str, Any]:
+    if fields is not None:
+        rows = [{f: r.get(f) for f in fields} for r in rows]
+
+    return {
+        "count": len(rows),
+        key: rows,
+        "next_cursor": encode_cursor(stamp, next_pos) if next_pos is not None else None,
+    }
@@ -0,0 +1,210 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from pathlib import Path
+import threading
+import time
+
+from src.graphs.io import file_digest
+
+# Registro de grafos da API com recarga a quente.
+#
+# Cada grafo registrado tem um loader e a lista de CSVs de onde vem. O registro guarda um
+# GraphSnapshot imutável por chave; um thread vigia mtime/tamanho dos CSVs e, se o hash do
+# conteúdo mudou, reconstrói o grafo em segundo plano e troca o snapshot de uma vez só.
+# Requisições em andamento continuam com o grafo que já receberam.
+
+# (caminho, mtime_ns, tamanho) de cada fonte; None quando o arquivo não existe
+Stat = Optional[Tuple[int, int]]
+
+@dataclass(frozen=True)
+class GraphSnapshot:
+    key: str
+    version: int
+    graph: Any
+    digests: Tuple[Optional[str], ...]
+    loaded_at: float
+
+@dataclass
+class _Entry:
+    key: str
+    loader: Callable[[], Any]
+    sources: Tuple[Path, ...]
+    aliases: Tuple[str, ...] = ()
+    snapshot: Optional[GraphSnapshot] = None
+    stats: Tuple[Stat, ...] = ()
+    last_error: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+def _stat(p: Path) -> Stat:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+
+    return (st.st_mtime_ns, st.st_size)
+
+def _digest(p: Path) -> Optional[str]:
+    try:
+        return file_digest(p)
+    except OSError:
+        return None
+
+# Versão do snapshot de onde o grafo veio (0 para grafos fora do registro); só cresce
+def snapshot_version(graph: Any) -> int:
+    return getattr(graph, "snapshot_version", 0)
+
+class GraphRegistry:
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._aliases: Dict[str, str] = {}
+        self._listeners: List[Callable[[str, GraphSnapshot], None]] = []
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, key: str, loader: Callable[[], Any], sources: Sequence[str | Path], aliases: Sequence[str] = ()) -> None:
+        key = key.lower()
+
+        with self._lock:
+            self._entries[key] = _Entry(key, loader, tuple(Path(p) for p in sources), tuple(a.lower() for a in aliases))
+            self._aliases[key] = key
+
+            for a in aliases:
+                self._aliases[a.lower()] = key
+
+    # Chamado com (chave, novo snapshot) sempre que um grafo é (re)carregado
+    def add_listener(self, fn: Callable[[str, GraphSnapshot], None]) -> None:
+        self._listeners.append(fn)
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        return self._aliases.get((name or "").lower())
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    # Snapshot atual; carrega de forma síncrona no primeiro acesso
+    def snapshot(self, name: str) -> GraphSnapshot:
+        key = self.resolve(name)
+
+        if key is None:
+            raise KeyError(name)
+
+        entry = self._entries[key]
+        snap = entry.snapshot
+
+        if snap is None:
+            with entry.lock:
+                if entry.snapshot is None:
+                    self._build(entry)
+
+            snap = entry.snapshot
+
+        return snap
+
+    def get(self, name: str) -> Any:
+        return self.snapshot(name).graph
+
+    # Reconstrói o grafo agora (mesmo sem mudança nos CSVs)
+    def reload(self, name: str) -> GraphSnapshot:
+        key = self.resolve(name)
+
+        if key is None:
+            raise KeyError(name)
+
+        entry = self._entries[key]
+
+        with entry.lock:
+            self._build(entry)
+
+        return entry.snapshot
+
+    def _build(self, entry: _Entry) -> None:
+        stats = tuple(_stat(p) for p in entry.sources)
+        digests = tuple(_digest(p) for p in entry.sources)
+        graph = entry.loader()
+
+        prev = entry.snapshot
+        snap = GraphSnapshot(entry.key, (prev.version + 1) if prev else 1, graph, digests, time.time())
+
+        # o grafo carrega a versão do snapshot: graph.version recomeça do 0 a cada recarga,
+        # então chaves de cache e cursores usam as duas (snapshot_version)
+        try:
+            graph.snapshot_version = snap.version
+        except AttributeError:
+            pass
+
+        # troca atômica: quem já pegou o snapshot anterior continua com ele
+        entry.snapshot = snap
+        entry.stats = stats
+        entry.last_error = None
+
+        for fn in self._listeners:
+            fn(entry.key, snap)
+
+    # Verifica as fontes de um grafo já carregado; reconstrói se o conteúdo mudou
+    def refresh(self, key: str) -> bool:
+        entry = self._entries[key]
+
+        if entry.snapshot is None:
+            return False
+
+        stats = tuple(_stat(p) for p in entry.sources)
+
+        if stats == entry.stats:
+            return False
+
+        with entry.lock:
+            digests = tuple(_digest(p) for p in entry.sources)
+
+            # só o mtime mudou (ex.: touch): atualiza o stat e mantém o grafo
+            if entry.snapshot is not None and digests == entry.snapshot.digests:
+                entry.stats = stats
+                return False
+
+            try:
+                self._build(entry)
+            except Exception as e:
+                # mantém o snapshot anterior e tenta de novo na próxima mudança
+                entry.stats = stats
+                entry.last_error = str(e)
+                return False
+
+        return True
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            for key in self.keys():
+                self.refresh(key)
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="graph-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+        if self._watcher is not None:
+            self._watcher.join(timeout=5.0)
+            self._watcher = None
+
+    def describe(self) -> List[Dict[str, Any]]:
+        out = []
+
+        for key, entry in self._entries.items():
+            snap = entry.snapshot
+            out.append({
+                "key": key,
+                "aliases": list(entry.aliases),
+                "sources": [str(p) for p in entry.sources],
+                "loaded": snap is not None,
+                "version": snap.version if snap else None,
+                "loaded_at": snap.loaded_at if snap else None,
+                "digests": list(snap.digests) if snap else None,
+                "last_error": entry.last_error,
+            })
+
+        return out
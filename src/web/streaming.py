@@ -0,0 +1,141 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import json
+import math
+import time
+
+from fastapi.responses import StreamingResponse
+
+from src.graphs import algorithms as algorithms
+
+# Respostas NDJSON (um JSON por linha) das rotas cuja saída cresce com o grafo: /edges,
+# /bfs, /dfs, /dfs-playlist e /bellman-ford sem destino, quando chamadas com ?stream=true.
+#
+# Toda resposta começa com {"kind": "meta", ...}, segue com uma linha por registro
+# ({"kind": "edge", ...} ou {"kind": "node", ...}) e termina com {"kind": "end", "count": n}.
+# Em /edges, /bfs e /dfs as linhas saem de geradores (iter_edges, iter_nodes_metadata,
+# BFSWalk.nodes, DFSWalk.edges), então o primeiro byte sai logo e a resposta nunca é montada
+# inteira em memória. /bellman-ford só começa a transmitir depois que o algoritmo converge:
+# as distâncias já estão todas calculadas e o streaming só evita serializá-las de uma vez.
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Linhas agrupadas por pedaço enviado (evita uma escrita no socket por linha)
+STREAM_CHUNK_LINES = 256
+
+def _dumps(obj: Any) -> str:
+    # mesmas opções do JSONResponse do Starlette
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+# Distâncias infinitas (nó inalcançável) viram null, como no JSON das respostas normais
+def _finite(x: Any) -> Any:
+    if isinstance(x, float) and not math.isfinite(x):
+        return None
+
+    return x
+
+def _encode(records: Iterable[Any]) -> Iterator[bytes]:
+    buf: List[str] = []
+
+    for rec in records:
+        buf.append(_dumps(rec))
+
+        if len(buf) >= STREAM_CHUNK_LINES:
+            yield ("\n".join(buf) + "\n").encode("utf-8")
+            buf = []
+
+    if buf:
+        yield ("\n".join(buf) + "\n").encode("utf-8")
+
+def ndjson_response(records: Iterable[Any]) -> StreamingResponse:
+    return StreamingResponse(_encode(records), media_type=NDJSON_MEDIA_TYPE)
+
+def edge_records(graph) -> Iterator[Dict[str, Any]]:
+    t0 = time.time()
+    edges = graph.iter_edges() if hasattr(graph, "iter_edges") else iter(graph.edges_list())
+    count = 0
+
+    yield {"kind": "meta"}
+
+    for e in edges:
+        count += 1
+        yield {"kind": "edge", **e}
+
+    yield {"kind": "end", "count": count, "time_sec": time.time() - t0}
+
+def node_records(graph) -> Iterator[Dict[str, Any]]:
+    if hasattr(graph, "iter_nodes_metadata"):
+        nodes = graph.iter_nodes_metadata()
+    else:
+        nodes = ({"id": n} for n in graph.nodes_list())
+
+    count = 0
+
+    yield {"kind": "meta"}
+
+    for n in nodes:
+        count += 1
+        yield {"kind": "node", **n}
+
+    yield {"kind": "end", "count": count}
+
+# A BFS anda enquanto a resposta é enviada: cada nó vira uma linha quando sai da fila (com a
+# posição em "order"); os não alcançados vêm depois, com order e dist null.
+def bfs_records(walk: "algorithms.BFSWalk") -> Iterator[Dict[str, Any]]:
+    t0 = time.time()
+    error = None if walk.source in walk.dist else f"source '{walk.source}' not in graph"
+
+    yield {"kind": "meta", "source": walk.source, "error": error}
+
+    for n, i, d, p in walk.nodes():
+        yield {"kind": "node", "id": n, "order": i, "dist": d, "parent": p}
+
+    dist = walk.dist
+
+    if error is None:
+        for n, d in dist.items():
+            if d is None:
+                yield {"kind": "node", "id": n, "order": None, "dist": None, "parent": None}
+
+    yield {"kind": "end", "count": len(dist) if error is None else 0, "time_sec": time.time() - t0}
+
+# A DFS anda enquanto a resposta é enviada: cada aresta classificada vira uma linha
+# {"kind": "edge", ...} (em edge_classes="compact", {"kind": "edge", "e": [id_u, id_v, código]}
+# com ids na ordem de nodes_list() e código indexando "labels" do meta); descoberta/término/pai
+# de cada nó, na ordem de descoberta, vêm depois das arestas.
+def dfs_records(walk: "algorithms.DFSWalk", sources: Optional[List[str]], edge_classes: str) -> Iterator[Dict[str, Any]]:
+    t0 = time.time()
+
+    yield {"kind": "meta", "sources": sources or [], "edge_classes": edge_classes, "labels": list(algorithms.EDGE_CLASS_LABELS)}
+
+    n_edges = 0
+
+    if edge_classes == "tuples":
+        for u, v, k in walk.edges():
+            n_edges += 1
+            yield {"kind": "edge", "u": u, "v": v, "class": algorithms.EDGE_CLASS_LABELS[k]}
+    elif edge_classes == "compact":
+        ids = {n: i for i, n in enumerate(walk.nodes)}
+
+        for u, v, k in walk.edges():
+            n_edges += 1
+            yield {"kind": "edge", "e": [ids[u], ids[v], k]}
+    else:
+        for _ in walk.edges():
+            n_edges += 1
+
+    for n in walk.order:
+        yield {"kind": "node", "id": n, "discovery": walk.discovery[n], "finish": walk.finish[n], "parent": walk.parent[n]}
+
+    yield {"kind": "end", "count": len(walk.order), "edges": n_edges, "time_sec": time.time() - t0}
+
+# Só transmite o resultado já convergido (o Bellman-Ford precisa de todas as passadas antes
+# de qualquer distância ser final): nada sai antes de o algoritmo terminar.
+def bellman_ford_records(source: str, res: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield {"kind": "meta", "orig": source, "time_sec": res.get("time_sec"), "negative_cycle": res.get("negative_cycle"), "error": res.get("error")}
+
+    dist = res.get("dist") or {}
+
+    for n, d in dist.items():
+        yield {"kind": "node", "id": n, "dist": _finite(d)}
+
+    yield {"kind": "end", "count": len(dist)}
@@ -0,0 +1,108 @@
+import math
+
+import pytest
+
+from src.graphs import algorithms, apsp, routing
+from src.graphs.csr import CSRGraph
+from src.graphs.graph import Graph
+
+ADJ_CSV = "data/adjacencias_bairros.csv"
+
+@pytest.fixture(scope="module")
+def graph():
+    return Graph.load_from_files(ADJ_CSV, "data/bairros_unique.csv")
+
+def _path_cost(graph, path):
+    return sum(min(float(e[1]) for e in graph.adj[u] if e[0] == v) for u, v in zip(path, path[1:]))
+
+def _assert_matches_dijkstra(graph, m):
+    assert m.nodes == graph.nodes_list()
+
+    for source in graph.nodes_list():
+        dist = algorithms.dijkstra(graph, source)["dist"]
+
+        for target, d in dist.items():
+            assert m.distance(source, target) == pytest.approx(d)
+
+            if not math.isinf(d):
+                path = m.path(source, target)
+
+                assert path[0] == source and path[-1] == target
+                assert _path_cost(graph, path) == pytest.approx(d)
+
+@pytest.mark.parametrize("method", ["floyd", "dijkstra"])
+def test_matrix_matches_dijkstra(graph, method):
+    m = apsp.all_pairs(graph, method=method)
+
+    assert not m.negative_cycle
+    _assert_matches_dijkstra(graph, m)
+
+def test_floyd_warshall_dict(graph):
+    fw = algorithms.floyd_warshall(graph)
+    source = graph.nodes_list()[0]
+
+    assert fw[source] == pytest.approx(algorithms.dijkstra(graph, source)["dist"])
+
+def test_disk_cache_roundtrip(graph, tmp_path):
+    built = apsp.load_or_build(graph, ADJ_CSV, cache_dir=tmp_path)
+    cached = apsp.load_or_build(graph, ADJ_CSV, cache_dir=tmp_path)
+
+    assert cached.source_hash == built.source_hash
+    assert cached.nodes == built.nodes
+    assert (cached.dist == built.dist).all()
+    assert (cached.pred == built.pred).all()
+
+def test_routing_from_attached_matrix(graph, tmp_path):
+    g = Graph.load_from_files(ADJ_CSV, "data/bairros_unique.csv")
+    apsp.attach(g, apsp.load_or_build(g, ADJ_CSV, cache_dir=tmp_path))
+    nodes = g.nodes_list()
+    pairs = [(o, d) for o in nodes[::9] for d in nodes[::4]] + [("nao existe", nodes[0])]
+
+    got = {idx: (custo, caminho) for idx, custo, caminho in routing.many_to_many(g, pairs)}
+    expected = {idx: (custo, caminho) for idx, custo, caminho in routing.many_to_many(graph, pairs, workers=1)}
+
+    assert got.keys() == expected.keys()
+
+    for idx, (custo, caminho) in expected.items():
+        assert got[idx][0] == pytest.approx(custo)
+
+        if caminho and not math.isinf(custo):
+            assert _path_cost(graph, got[idx][1]) == pytest.approx(custo)
+
+    # mutações descartam a matriz anexada
+    g.add_edge(nodes[0], nodes[1], 0.01)
+
+    assert apsp.matrix_for(g) is None
+
+def _negative_directed():
+    adj = {
+        "a": [("b", 4.0), ("c", 2.0)],
+        "b": [("d", -3.0)],
+        "c": [("b", -1.0), ("d", 5.0)],
+        "d": [("e", 1.0), ("a", 3.0)],
+        "e": [("c", 4.0)],
+        "f": [],
+    }
+
+    return CSRGraph.from_adj(adj, directed=True)
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_johnson_matches_bellman_ford(workers):
+    csr = _negative_directed()
+    m = apsp.johnson_matrix(csr, workers=workers, chunk_size=2, min_parallel_sources=0)
+
+    for source in csr.node_names:
+        dist = algorithms.bellman_ford(csr, source, method="classic")["dist"]
+
+        for target, d in dist.items():
+            assert m.distance(source, target) == pytest.approx(d)
+
+def test_johnson_matches_dijkstra_without_negatives(graph):
+    _assert_matches_dijkstra(graph, apsp.all_pairs(graph, method="johnson"))
+
+def test_johnson_reports_negative_cycle():
+    csr = CSRGraph.from_adj({"a": [("b", 1.0)], "b": [("c", -2.0)], "c": [("a", 0.5)]}, directed=True)
+    res = algorithms.johnson(csr)
+
+    assert res["matrix"] is None
+    assert set(res["negative_cycle"]) == {"a", "b", "c"}
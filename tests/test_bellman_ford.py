@@ -0,0 +1,128 @@
+import math
+
+import pytest
+
+from src.graphs import algorithms
+from src.graphs.csr import CSRGraph
+from src.graphs.graph import Graph
+
+METHODS = ("classic", "spfa", "numpy")
+
+@pytest.fixture(scope="module")
+def graph():
+    return Graph.load_from_files("data/adjacencias_bairros.csv", "data/bairros_unique.csv")
+
+def _directed(extra=None):
+    adj = {
+        "a": [("b", 4.0), ("c", 2.0)],
+        "b": [("d", -3.0)],
+        "c": [("b", -1.0), ("d", 5.0)],
+        "d": [("e", 1.0)],
+        "e": [],
+        "f": [],
+    }
+    adj.update(extra or {})
+
+    return CSRGraph.from_adj(adj, directed=True)
+
+@pytest.mark.parametrize("method", METHODS)
+def test_matches_dijkstra_on_bairros(graph, method):
+    for source in graph.nodes_list()[::10]:
+        expected = algorithms.dijkstra(graph, source)["dist"]
+        res = algorithms.bellman_ford(graph, source, method=method)
+
+        assert res["negative_cycle"] is None
+        assert res["dist"].keys() == expected.keys()
+
+        for node, d in expected.items():
+            assert res["dist"][node] == pytest.approx(d)
+
+@pytest.mark.parametrize("method", METHODS)
+def test_negative_weights(method):
+    res = algorithms.bellman_ford(_directed(), "a", method=method)
+
+    assert res["negative_cycle"] is None
+    assert res["dist"] == {"a": 0.0, "b": 1.0, "c": 2.0, "d": -2.0, "e": -1.0, "f": math.inf}
+    assert algorithms.reconstruct_path(res["prev"], "e") == ["a", "c", "b", "d", "e"]
+
+@pytest.mark.parametrize("method", METHODS)
+def test_negative_cycle(method):
+    res = algorithms.bellman_ford(_directed({"e": [("c", -5.0)]}), "a", method=method)
+
+    # cada método pode começar o ciclo num nó diferente
+    assert set(res["negative_cycle"]) == {"b", "c", "d", "e"}
+
+def test_frozen_and_dict_graphs_agree(graph):
+    source = graph.nodes_list()[0]
+    expected = algorithms.bellman_ford(graph, source, method="classic")["dist"]
+    frozen = Graph.load_from_files("data/adjacencias_bairros.csv", "data/bairros_unique.csv")
+    frozen.to_csr()
+
+    for method in METHODS:
+        assert algorithms.bellman_ford(frozen, source, method=method)["dist"] == pytest.approx(expected)
+
+def _music_graph():
+    from src.graphs.music_graph import MusicGraph
+
+    return MusicGraph.load_from_edges_csv("data/parte2_adjacencias.csv")
+
+@pytest.mark.parametrize("method", ["spfa", "numpy"])
+def test_overlay_matches_mutated_copy(method, monkeypatch):
+    import copy
+
+    from src.graphs import csr as csr_module
+    from src.graphs.overlay import WeightOverlay
+
+    base = _music_graph()
+    base.to_csr()
+    source = base.nodes_list()[5]
+    scenarios = []
+
+    # deslocamento menor que o menor peso: pesos trocados sem ciclo negativo
+    for seed in (1, 2):
+        overlay = WeightOverlay(base)
+        overlay.apply_negative_fraction(negative_shift=0.001, negative_fraction=0.2, seed=seed)
+        mutated = copy.deepcopy(base)
+        mutated.apply_negative_fraction(negative_shift=0.001, negative_fraction=0.2, seed=seed)
+        scenarios.append((overlay, mutated))
+
+    # arestas novas entre nós que já existem
+    nodes = base.nodes_list()
+    overlay = WeightOverlay(base)
+    mutated = copy.deepcopy(base)
+
+    for a, b in zip(nodes[::40], nodes[7::40]):
+        overlay.add_edge(a, b, 0.01)
+        mutated.add_edge(a, b, 0.01)
+
+    scenarios.append((overlay, mutated))
+
+    overlay = WeightOverlay(base)
+    overlay.inject_negative_cycle(cycle_size=3, cycle_edge_weight=-0.8, seed=3)
+    mutated = copy.deepcopy(base)
+    mutated.inject_negative_cycle(cycle_size=3, cycle_edge_weight=-0.8, seed=3)
+    scenarios.append((overlay, mutated))
+
+    expected = [algorithms.bellman_ford(m, source, method="classic") for _, m in scenarios]
+
+    # o overlay não pode montar um CSR do grafo inteiro
+    def _no_copy(*args, **kwargs):
+        raise AssertionError("CSR copiado")
+
+    monkeypatch.setattr(csr_module.CSRGraph, "from_adj", _no_copy)
+
+    for (overlay, _), ref in zip(scenarios, expected):
+        res = algorithms.bellman_ford(overlay, source, method=method)
+
+        if ref["negative_cycle"] is None:
+            assert res["negative_cycle"] is None
+            assert res["dist"] == pytest.approx(ref["dist"])
+        else:
+            assert res["negative_cycle"]
+
+def test_default_is_classic(graph):
+    for source in graph.nodes_list()[::10]:
+        res = algorithms.bellman_ford(graph, source)
+        classic = algorithms.bellman_ford(graph, source, method="classic")
+
+        assert (res["dist"], res["prev"]) == (classic["dist"], classic["prev"])
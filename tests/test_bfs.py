@@ -0,0 +1,59 @@
+import pytest
+
+from src.graphs import algorithms
+from src.graphs.graph import Graph
+
+def _load():
+    return Graph.load_from_files("data/adjacencias_bairros.csv", "data/bairros_unique.csv")
+
+@pytest.fixture(scope="module")
+def graphs():
+    frozen = _load()
+    frozen.to_csr()
+
+    return _load(), frozen
+
+def _strip(res):
+    return {k: v for k, v in res.items() if k != "time_sec"}
+
+def test_csr_matches_dict_graph(graphs):
+    plain, frozen = graphs
+
+    for source in plain.nodes_list():
+        assert _strip(algorithms.bfs(frozen, source)) == _strip(algorithms.bfs(plain, source))
+
+def test_unknown_source(graphs):
+    for g in graphs:
+        assert "error" in algorithms.bfs(g, "nao existe")
+
+def test_walk_matches_bfs(graphs):
+    for g in graphs:
+        for source in g.nodes_list()[:10]:
+            res = algorithms.bfs(g, source)
+            walk = algorithms.iter_bfs(g, source)
+            visited = list(walk.nodes())
+
+            assert [n for n, _, _, _ in visited] == res["order"]
+            assert all(i == pos and d == res["dist"][n] and p == res["parent"][n] for pos, (n, i, d, p) in enumerate(visited))
+            assert (walk.dist, walk.parent, walk.order) == (res["dist"], res["parent"], res["order"])
+
+def test_walk_yields_before_finishing(graphs):
+    plain, _ = graphs
+    source = plain.nodes_list()[0]
+    walk = algorithms.iter_bfs(plain, source)
+
+    assert next(walk.nodes())[0] == source
+    assert walk.order == []
+
+def test_stream_records(graphs):
+    streaming = pytest.importorskip("src.web.streaming")
+
+    for g in graphs:
+        source = g.nodes_list()[0]
+        res = algorithms.bfs(g, source)
+        records = list(streaming.bfs_records(algorithms.iter_bfs(g, source)))
+        nodes = [r for r in records if r["kind"] == "node"]
+
+        assert records[0]["kind"] == "meta" and records[-1]["kind"] == "end"
+        assert {r["id"]: (r["dist"], r["parent"]) for r in nodes} == {n: (res["dist"][n], res["parent"][n]) for n in res["dist"]}
+        assert [r["id"] for r in nodes if r["order"] is not None] == res["order"]
@@ -0,0 +1,95 @@
+import sys
+
+import pytest
+
+from src.graphs import algorithms
+from src.graphs.graph import Graph
+
+@pytest.fixture(scope="module")
+def graph():
+    return Graph.load_from_files("data/adjacencias_bairros.csv", "data/bairros_unique.csv")
+
+# DFS recursiva de referência (a implementação antiga), com os vizinhos na ordem dada
+def _recursive_dfs(graph, sources, neighbors):
+    nodes = graph.nodes_list()
+    color = {n: "white" for n in nodes}
+    discovery = {n: None for n in nodes}
+    finish = {n: None for n in nodes}
+    parent = {n: None for n in nodes}
+    order = []
+    classes = []
+    timer = 0
+
+    def _visit(u):
+        nonlocal timer
+        color[u] = "gray"
+        timer += 1
+        discovery[u] = timer
+        order.append(u)
+
+        for v in neighbors(u):
+            if color[v] == "white":
+                parent[v] = u
+                classes.append((u, v, "tree"))
+                _visit(v)
+            elif color[v] == "gray":
+                classes.append((u, v, "back"))
+            elif discovery[u] < discovery[v]:
+                classes.append((u, v, "forward"))
+            else:
+                classes.append((u, v, "cross"))
+
+        color[u] = "black"
+        timer += 1
+        finish[u] = timer
+
+    for s in list(sources or []) + nodes:
+        if s in color and color[s] == "white":
+            _visit(s)
+
+    return {"discovery": discovery, "finish": finish, "parent": parent, "order": order, "edge_classes": classes}
+
+def _plain(graph):
+    return lambda u: [e[0] for e in graph.adj.get(u, [])]
+
+def _by_weight(graph):
+    return lambda u: [v for _, v in sorted((float(e[1]), e[0]) for e in graph.adj.get(u, []))]
+
+def _strip(res):
+    return {k: v for k, v in res.items() if k != "time_sec"}
+
+@pytest.mark.parametrize("sources", [None, ["Boa Viagem"], ["Recife", "Várzea"]])
+def test_matches_recursive(graph, sources):
+    sources = [graph.normalize_node(s) for s in sources] if sources else None
+
+    assert _strip(algorithms.dfs(graph, sources)) == _recursive_dfs(graph, sources, _plain(graph))
+    assert _strip(algorithms.dfs_weighted_tiebreak(graph, sources)) == _recursive_dfs(graph, sources, _by_weight(graph))
+
+def test_compact_edge_classes(graph):
+    tuples = algorithms.dfs(graph)["edge_classes"]
+    compact = algorithms.dfs(graph, edge_classes="compact")["edge_classes"]
+    names = graph.nodes_list()
+    labels = compact["labels"]
+
+    assert [(names[s], names[d], labels[k]) for s, d, k in zip(compact["src"], compact["dst"], compact["kind"])] == tuples
+    assert algorithms.dfs(graph, edge_classes="none")["edge_classes"] is None
+
+def test_deep_path_does_not_recurse():
+    g = Graph()
+    n = sys.getrecursionlimit() * 2
+
+    for i in range(n):
+        g.add_edge(f"n{i:06d}", f"n{i + 1:06d}", 1.0)
+
+    res = algorithms.dfs(g, [g.normalize_node("n000000")], edge_classes="none")
+
+    assert len(res["order"]) == n + 1
+    assert res["finish"][g.normalize_node("n000000")] == 2 * (n + 1)
+
+def test_stream_records_are_tagged(graph):
+    streaming = pytest.importorskip("src.web.streaming")
+    records = list(streaming.dfs_records(algorithms.iter_dfs(graph), None, "compact"))
+    compact = algorithms.dfs(graph, edge_classes="compact")["edge_classes"]
+
+    assert all(isinstance(r, dict) and "kind" in r for r in records)
+    assert [r["e"] for r in records if r["kind"] == "edge"] == [list(t) for t in zip(compact["src"], compact["dst"], compact["kind"])]
@@ -0,0 +1,53 @@
+import pytest
+
+from src.graphs import algorithms
+from src.graphs.graph import Graph
+
+def _load():
+    return Graph.load_from_files("data/adjacencias_bairros.csv", "data/bairros_unique.csv")
+
+@pytest.fixture(scope="module")
+def graphs():
+    frozen = _load()
+    frozen.to_csr()
+
+    return _load(), frozen
+
+def test_csr_matches_dict_graph(graphs):
+    plain, frozen = graphs
+
+    for source in plain.nodes_list():
+        expected = algorithms.dijkstra(plain, source)
+        res = algorithms.dijkstra(frozen, source)
+
+        assert res["dist"] == pytest.approx(expected["dist"])
+
+        for target in plain.nodes_list():
+            assert algorithms.reconstruct_path(res["prev"], target) == algorithms.reconstruct_path(expected["prev"], target)
+            assert algorithms.reconstruct_path_edges(res["prev"], res["prev_edge"], target) == algorithms.reconstruct_path_edges(expected["prev"], expected["prev_edge"], target)
+
+def test_unknown_source(graphs):
+    for g in graphs:
+        assert "error" in algorithms.dijkstra(g, "nao existe")
+
+@pytest.mark.parametrize("method", ["bidirectional", "astar"])
+def test_point_to_point_matches_dijkstra(method):
+    g = _load()
+    nodes = g.nodes_list()
+
+    for source in nodes[::6]:
+        expected = algorithms.dijkstra(g, source)["dist"]
+
+        for target in nodes[::5]:
+            res = algorithms.dijkstra(g, source, target, method=method)
+            path = algorithms.reconstruct_path(res["prev"], target)
+
+            assert res["dist"][target] == pytest.approx(expected[target])
+            assert path[0] == source and path[-1] == target
+
+    # a busca ponto-a-ponto não congela o grafo, e uma mutação refaz a visão usada
+    assert g._csr is None
+
+    g.add_edge(nodes[0], nodes[-1], 0.001)
+
+    assert algorithms.dijkstra(g, nodes[0], nodes[-1], method=method)["dist"][nodes[-1]] == pytest.approx(0.001)
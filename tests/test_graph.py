@@ -5,6 +5,14 @@ from pathlib import Path
 # garantir que o src está no path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import random
+
+import pandas as pd
+import pytest
+
+from src.graphs.algorithms import dijkstra
+from src.graphs.graph import Graph
+from src.graphs.music_graph import MusicGraph
 from src.web.deps import get_graph
 
 def print_section(title: str):
@@ -49,5 +57,114 @@ def main():
     print("Mesmo objeto em memória?", g is g2)
 
 
+# ----------------------------------------------------------------------------
+# Testes das mutações incrementais (pytest)
+# ----------------------------------------------------------------------------
+
+ADJ_CSV = "data/adjacencias_bairros.csv"
+BAIRROS_CSV = "data/bairros_unique.csv"
+
+def _load():
+    return Graph.load_from_files(ADJ_CSV, BAIRROS_CSV)
+
+# Arestas de g uma vez cada, laços incluídos (edges_list() não lista os laços)
+def _edges(g):
+    return sorted((u, v, log, w) for u, lst in g.adj.items() for v, w, log in lst if u <= v)
+
+# Grafo montado do zero com as arestas atuais de g (nós isolados incluídos)
+def _rebuild(g):
+    rows = [(u, v, w, log) for u, v, log, w in _edges(g)]
+    ref = Graph.build_from_df(pd.DataFrame(rows, columns=["bairro_origem", "bairro_destino", "peso", "logradouro"]), pd.read_csv(BAIRROS_CSV))
+    ref.nodes.update(g.nodes)
+
+    return ref
+
+def _assert_same_state(g):
+    ref = _rebuild(g)
+
+    assert _edges(g) == _edges(ref)
+    assert g.edge_count() == ref.edge_count() == len(g.edges_list())
+    assert {n: g.degree(n) for n in g.nodes} == {n: ref.degree(n) for n in ref.nodes}
+    assert g.ego_metrics_all() == ref.ego_metrics_all()
+    assert g.microrregiao_stats_all() == ref.microrregiao_stats_all()
+
+def _mutate(g, rng, nodes, logs):
+    op = rng.random()
+    u = rng.choice(nodes)
+    v = u if rng.random() < 0.05 else rng.choice(nodes)
+    neighbours = g.adj.get(u, [])
+
+    if op < 0.4:
+        # aresta nova ou peso trocado: as duas mudam o grafo
+        g.add_edge(u, v, round(rng.uniform(0.1, 5.0), 2), rng.choice(logs))
+
+        return True
+
+    if not neighbours:
+        return False
+
+    nb, _, log = rng.choice(neighbours)
+
+    if op < 0.7:
+        return g.remove_edge(u, nb, log if rng.random() < 0.7 else None) > 0
+
+    return g.set_weight(u, nb, round(rng.uniform(0.1, 5.0), 2), log if rng.random() < 0.7 else None) > 0
+
+@pytest.mark.parametrize("seed", range(6))
+def test_random_mutations_match_rebuild(seed):
+    rng = random.Random(seed)
+    g = _load()
+    nodes = g.nodes_list() + ["bairro novo a", "bairro novo b"]
+    logs = sorted({e["logradouro"] for e in g.edges_list()})[:8] + ["Rua Nova"]
+
+    # caches já calculados: as mutações passam a atualizá-los incrementalmente
+    g.ego_metrics_all()
+    g.microrregiao_stats_all()
+
+    for step in range(300):
+        version = g.version
+        changed = _mutate(g, rng, nodes, logs)
+
+        assert (g.version > version) == changed
+
+        if step % 50 == 49:
+            _assert_same_state(g)
+
+    _assert_same_state(g)
+
+def test_parallel_rows_keep_minimum_weight():
+    df = pd.DataFrame({
+        "bairro_origem": ["A", "B", "A"],
+        "bairro_destino": ["B", "A", "B"],
+        "logradouro": ["Rua 1", "Rua 1", "Rua 2"],
+        "peso": [0.9, 0.2, 0.5],
+    })
+    g = Graph.build_from_df(df)
+
+    assert g.edge_count() == 2
+    assert sorted(w for _, w, _ in g.adj[g.normalize_node("A")]) == [0.2, 0.5]
+
+def test_music_graph_parallel_rows_keep_minimum_weight(tmp_path):
+    csv_path = tmp_path / "edges.csv"
+    csv_path.write_text("track_a,track_b,common_genres,peso\nA,B,pop,0.2\nB,A,pop,0.9\n", encoding="utf-8")
+    g = MusicGraph.load_from_edges_csv(csv_path)
+    a, b = g.normalize_node("A"), g.normalize_node("B")
+
+    assert g.edge_count() == 1
+    assert dijkstra(g, a)["dist"][b] == 0.2
+
+def test_edge_index_rejects_repeated_entries():
+    g = Graph()
+    g.adj = {"a": [("b", 1.0, "r"), ("b", 2.0, "r")], "b": [("a", 1.0, "r")]}
+    g.nodes.update(g.adj)
+    before = [list(lst) for lst in g.adj.values()]
+
+    with pytest.raises(ValueError):
+        g.edge_count()
+
+    # a leitura não mexe em adj
+    assert [list(lst) for lst in g.adj.values()] == before
+
+
 if __name__ == "__main__":
     main()
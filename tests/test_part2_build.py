@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from src.graphs import part2_build
+from src.graphs.part2_build import build_edges_from_spotify
+
+CATALOGUE = "data/spotify_filtered.csv"
+
+NEGATIVES = dict(negative_shift=0.6, negative_fraction=0.1, make_negative_cycle=True, persist_negative=True)
+
+def _build(path, **kwargs):
+    build_edges_from_spotify(CATALOGUE, path, artist=None, verbose=False, **kwargs)
+
+    return path.read_bytes()
+
+@pytest.mark.parametrize("candidates", ["genre", "knn"])
+@pytest.mark.parametrize("negatives", [{}, NEGATIVES])
+def test_stream_output_independent_of_chunking(tmp_path, candidates, negatives):
+    expected = _build(tmp_path / "full.csv", candidates=candidates, **negatives)
+
+    for i, chunking in enumerate([dict(chunk_rows=13), dict(chunk_rows=997), dict(max_memory_mb=0.01)]):
+        assert _build(tmp_path / f"s{i}.csv", candidates=candidates, stream=True, **chunking, **negatives) == expected
+
+def test_parquet_output_without_stream(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    out = build_edges_from_spotify(CATALOGUE, tmp_path / "edges.parquet", artist=None, verbose=False, **NEGATIVES)
+    streamed = build_edges_from_spotify(CATALOGUE, tmp_path / "streamed.parquet", artist=None, verbose=False, stream=True, chunk_rows=50, **NEGATIVES)
+
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "edges.parquet"), out)
+    pd.testing.assert_frame_equal(pd.read_parquet(streamed), out)
+
+@pytest.mark.parametrize("candidates", ["genre", "knn"])
+@pytest.mark.parametrize("stream", [False, True])
+def test_output_independent_of_workers(tmp_path, candidates, stream):
+    expected = _build(tmp_path / "serial.csv", candidates=candidates, workers=1, **NEGATIVES)
+
+    for workers in (2, 3):
+        out = tmp_path / f"w{workers}.csv"
+
+        assert _build(out, candidates=candidates, stream=stream, chunk_rows=2000, workers=workers, **NEGATIVES) == expected
+
+def test_memory_budget_split_across_chunks_in_flight(tmp_path, monkeypatch):
+    seen = []
+    chunks = part2_build._edge_row_chunks
+
+    def _spy(*args):
+        seen.append((args[6], args[7]))
+
+        return chunks(*args)
+
+    monkeypatch.setattr(part2_build, "_edge_row_chunks", _spy)
+    budget_rows = int(2 * 2**20 / part2_build.STREAM_ROW_BYTES)
+
+    for workers in (1, 3):
+        _build(tmp_path / f"w{workers}.csv", stream=True, max_memory_mb=2, workers=workers)
+
+    assert seen == [(budget_rows, 1), (budget_rows // 6, 3)]
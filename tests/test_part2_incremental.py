@@ -0,0 +1,76 @@
+import csv
+
+import pandas as pd
+
+from src.graphs.music_graph import MusicGraph
+from src.graphs.part2_build import build_edges_from_spotify
+from src.graphs.part2_incremental import update_edges_from_spotify
+
+CATALOGUE = "data/spotify_filtered.csv"
+
+def _rows(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return sorted(map(tuple, csv.reader(f)))
+
+def _state(g):
+    edges = sorted((e["track_a"], e["track_b"], e["common_genres"], e["peso"]) for e in g.iter_edges())
+
+    return edges, sorted(g.nodes)
+
+def _catalogue():
+    df = pd.read_csv(CATALOGUE, dtype=str, encoding="utf-8-sig", keep_default_na=False)
+
+    # duas faixas que só se ligam entre si: remover uma deixa a outra sem arestas
+    pair = df.iloc[[0, 1]].copy()
+    pair["track_name"] = ["zz lonely a", "zz lonely b"]
+    pair["genres_list"] = "['zz genre']"
+
+    return pd.concat([df, pair], ignore_index=True)
+
+def _assert_matches_rebuild(tmp_path, cat, edges, graph):
+    full = tmp_path / "full.csv"
+    build_edges_from_spotify(cat, full, artist=None, verbose=False)
+
+    assert _rows(edges) == _rows(full)
+    assert _state(graph) == _state(MusicGraph.load_from_edges_csv(full))
+
+def test_incremental_update_matches_rebuild(tmp_path):
+    cat = tmp_path / "cat.csv"
+    edges = tmp_path / "edges.csv"
+    df = _catalogue()
+    df.to_csv(cat, index=False, encoding="utf-8-sig")
+
+    assert update_edges_from_spotify(cat, edges, artist=None, verbose=False)["mode"] == "full"
+
+    graph = MusicGraph.load_from_edges_csv(edges)
+
+    # popularidade alterada, gêneros alterados, duas faixas removidas e uma nova
+    df.loc[5, "track_popularity"] = str((int(float(df.loc[5, "track_popularity"])) + 7) % 100)
+    df.loc[11, "genres_list"] = "['pop', 'dance pop']"
+    new = df.iloc[[3]].copy()
+    new["track_name"] = "zz brand new song"
+    df = pd.concat([df.drop([20, 21]), new], ignore_index=True)
+    df.to_csv(cat, index=False, encoding="utf-8-sig")
+
+    summary = update_edges_from_spotify(cat, edges, graph=graph, artist=None, verbose=False)
+
+    assert summary["mode"] == "incremental"
+    _assert_matches_rebuild(tmp_path, cat, edges, graph)
+    assert update_edges_from_spotify(cat, edges, graph=graph, artist=None, verbose=False)["mode"] == "unchanged"
+
+def test_incremental_update_drops_isolated_neighbour(tmp_path):
+    cat = tmp_path / "cat.csv"
+    edges = tmp_path / "edges.csv"
+    df = _catalogue()
+    df.to_csv(cat, index=False, encoding="utf-8-sig")
+    update_edges_from_spotify(cat, edges, artist=None, verbose=False)
+    graph = MusicGraph.load_from_edges_csv(edges)
+
+    assert graph.has_node("zz lonely b")
+
+    df[df["track_name"] != "zz lonely a"].to_csv(cat, index=False, encoding="utf-8-sig")
+    summary = update_edges_from_spotify(cat, edges, graph=graph, artist=None, verbose=False)
+
+    assert summary["mode"] == "incremental"
+    assert not graph.has_node("zz lonely b")
+    _assert_matches_rebuild(tmp_path, cat, edges, graph)
@@ -0,0 +1,82 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from src.graphs.part2_build import _read_spotify_df, _tracks_from_df, _track_meta_from_df, compute_similarity
+from src.graphs.part2_similarity import SimilarityEngine, genre_bitsets, knn_pairs
+
+CATALOGUE = "data/spotify_filtered.csv"
+
+@pytest.fixture(scope="module")
+def catalogue():
+    df = _read_spotify_df(CATALOGUE, "track_name", "genres_list", None)
+    track_meta, globals_ = _track_meta_from_df(df, "track_name", "genres_list")
+    genres_of = {}
+
+    for track, genres in _tracks_from_df(df, "track_name", "genres_list"):
+        genres_of.setdefault(track, set()).update(genres)
+
+    return track_meta, globals_, SimilarityEngine(track_meta, globals_), genres_of
+
+def test_scores_bit_identical_to_compute_similarity(catalogue):
+    track_meta, globals_, engine, _ = catalogue
+    names = list(track_meta)
+    pairs = list(itertools.combinations(names, 2))
+    a = engine.lookup([p for p, _ in pairs])
+    b = engine.lookup([q for _, q in pairs])
+    sims = engine.similarity(a, b, block=1000)
+
+    expected = np.array([compute_similarity(track_meta[p], track_meta[q], globals_)[0] for p, q in pairs])
+
+    # mesma aritmética de ponto flutuante: igualdade exata, não aproximada
+    assert sims.tolist() == expected.tolist()
+
+def test_components_match_compute_similarity(catalogue):
+    track_meta, globals_, engine, _ = catalogue
+    names = list(track_meta)[:40]
+    pairs = list(itertools.combinations(names, 2))
+    comps = engine.components(engine.lookup([p for p, _ in pairs]), engine.lookup([q for _, q in pairs]))
+
+    for i, (p, q) in enumerate(pairs):
+        for key, value in compute_similarity(track_meta[p], track_meta[q], globals_)[1].items():
+            assert float(comps[key][i]) == value, (p, q, key)
+
+# Referência densa: cada linha pontua todas as outras faixas com gênero em comum
+def _dense_knn(engine, idx, genre_sets, top_k, min_sim):
+    chosen = set()
+
+    for i in range(len(idx)):
+        cols = [j for j in range(len(idx)) if j != i and genre_sets[i] & genre_sets[j]]
+        sims = engine.similarity(np.full(len(cols), idx[i]), idx[cols]).tolist()
+        ranked = sorted(zip(sims, cols), key=lambda t: (-t[0], t[1]))
+
+        for rank, (sim, j) in enumerate(ranked):
+            if min_sim is not None and sim < min_sim:
+                continue
+
+            if top_k is None or rank < top_k:
+                chosen.add((min(i, j), max(i, j)))
+
+    return sorted(chosen)
+
+@pytest.mark.parametrize("top_k, min_sim", [(5, None), (None, 0.8), (3, 0.7)])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_knn_pairs_matches_dense_search(catalogue, top_k, min_sim, workers):
+    _, _, engine, genres_of = catalogue
+    names = list(genres_of)
+
+    # o catálogo filtrado quase só tem pop: gêneros sorteados deixam a elegibilidade esparsa
+    rng = random.Random(7)
+    genre_sets = [{f"g{rng.randrange(80)}" for _ in range(rng.randint(1, 3))} for _ in names]
+    bits, vocab = genre_bitsets(genre_sets)
+    idx = engine.lookup(names)
+
+    # mais de 64 gêneros: as linhas de bits têm mais de uma palavra
+    assert len(vocab) > 64
+
+    a, b, sims = knn_pairs(engine, idx, bits, top_k=top_k, min_sim=min_sim, block_pairs=500, workers=workers)
+
+    assert list(zip(a.tolist(), b.tolist())) == _dense_knn(engine, idx, genre_sets, top_k, min_sim)
+    assert sims.tolist() == engine.similarity(idx[a], idx[b]).tolist()
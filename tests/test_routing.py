@@ -0,0 +1,51 @@
+import pytest
+
+from src.graphs import algorithms, routing
+from src.graphs.graph import Graph
+
+@pytest.fixture(scope="module")
+def graph():
+    return Graph.load_from_files("data/adjacencias_bairros.csv", "data/bairros_unique.csv")
+
+@pytest.fixture(scope="module")
+def pairs(graph):
+    nodes = graph.nodes_list()
+    out = [(o, d) for o in nodes[::7] for d in nodes[::5]]
+
+    # origens repetidas fora de ordem e uma origem desconhecida
+    return out + [(nodes[3], nodes[40]), (nodes[0], nodes[1]), ("nao existe", nodes[2])]
+
+# Resposta de referência: uma busca por par, como o solve fazia antes do lote
+def _one_by_one(graph, pairs):
+    out = []
+
+    for origem, destino in pairs:
+        res = algorithms.dijkstra(graph, origem, destino)
+
+        if res.get("error"):
+            out.append((float("inf"), []))
+        else:
+            out.append((res["dist"][destino], algorithms.reconstruct_path(res["prev"], destino)))
+
+    return out
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_many_to_many_matches_pairwise_dijkstra(graph, pairs, workers):
+    got = {}
+
+    for idx, custo, caminho in routing.many_to_many(graph, pairs, workers=workers, batch_size=3, min_parallel_origins=0):
+        assert idx not in got
+        got[idx] = (custo, caminho)
+
+    expected = _one_by_one(graph, pairs)
+
+    assert sorted(got) == list(range(len(pairs)))
+
+    for idx, (custo, caminho) in enumerate(expected):
+        assert got[idx][0] == pytest.approx(custo)
+        assert got[idx][1] == caminho
+
+def test_group_pairs_by_origin_keeps_first_seen_order():
+    groups = routing.group_pairs_by_origin([("b", "x"), ("a", "y"), ("b", "z")])
+
+    assert list(groups.items()) == [("b", [(0, "x"), (2, "z")]), ("a", [(1, "y")])]